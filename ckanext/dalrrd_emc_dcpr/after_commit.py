@@ -0,0 +1,68 @@
+"""Running of work that must only happen once the current DB transaction is committed
+
+CKAN's `IPackageController` hooks and most actions run before the DB transaction is
+committed. CKAN also updates the search index only when committing. Background jobs
+enqueued from these places may thus be picked up by a worker while the DB and Solr
+still hold the previous state of the data, and caches invalidated from there may be
+refilled with outdated content before the change becomes visible.
+
+Such work is registered with `call_after_commit()` instead and is run once CKAN's
+session commits its transaction, which happens after the search index has been
+updated. Work registered in a transaction that is rolled back is discarded.
+
+"""
+
+import logging
+import threading
+import typing
+
+import sqlalchemy
+from ckan import model
+
+logger = logging.getLogger(__name__)
+
+_PENDING_CALLBACKS_KEY = "emc_after_commit_callbacks"
+_listener_lock = threading.Lock()
+_listeners_registered = False
+
+
+def call_after_commit(key: typing.Hashable, callback: typing.Callable[[], None]):
+    """Run the input callback after CKAN's session commits its current transaction.
+
+    Callbacks registered with the same key during a transaction are only run once,
+    which means that many changes to the same entity only trigger one callback.
+    Callbacks are run in the order in which they were first registered. They run
+    outside of the committed transaction and must therefore not use CKAN's session.
+
+    """
+
+    _register_listeners()
+    pending = model.Session.info.setdefault(_PENDING_CALLBACKS_KEY, {})
+    pending.setdefault(key, callback)
+
+
+def _register_listeners() -> None:
+    global _listeners_registered
+    with _listener_lock:
+        if not _listeners_registered:
+            sqlalchemy.event.listen(
+                model.Session, "after_commit", _run_pending_callbacks
+            )
+            sqlalchemy.event.listen(
+                model.Session, "after_soft_rollback", _discard_pending_callbacks
+            )
+            _listeners_registered = True
+
+
+def _run_pending_callbacks(session) -> None:
+    pending = session.info.pop(_PENDING_CALLBACKS_KEY, {})
+    for key, callback in pending.items():
+        try:
+            callback()
+        except Exception:
+            logger.exception(f"Could not run the after commit callback {key!r}")
+
+
+def _discard_pending_callbacks(session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_CALLBACKS_KEY, None)
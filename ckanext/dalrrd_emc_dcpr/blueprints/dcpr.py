@@ -1,3 +1,5 @@
+import datetime as dt
+import hashlib
 import json
 import logging
 import typing
@@ -6,7 +8,7 @@ import ckan.lib.navl.dictization_functions as dict_fns
 import ckan.lib.helpers as h
 from ckan.common import config
 import ckan.model
-from flask import Blueprint, redirect, request
+from flask import Blueprint, make_response, redirect, request, session
 from flask.views import MethodView
 from ckan.views.home import CACHE_PARAMETERS
 from ckan.views.dataset import url_with_params
@@ -334,20 +336,75 @@ dcpr_blueprint.add_url_rule(
 
 @dcpr_blueprint.route("/request/<csi_reference_id>")
 def dcpr_request_show(csi_reference_id):
+    """Show a DCPR request
+
+    This view supports conditional requests, responding with `304 Not Modified` if
+    neither the request nor the page's user-specific content have changed since the
+    client last fetched the page. The page's ETag is therefore made of the DCPR
+    request's ETag plus an identifier of the current user and language.
+    `If-Modified-Since` is not evaluated, as it cannot tell apart pages rendered for
+    different users. The page is not meant to be stored by shared caches.
+
+    """
+
+    page_variant = _get_page_variant()
+    if_none_match = _get_dcpr_request_if_none_match(page_variant)
+    data_dict = {"csi_reference_id": csi_reference_id}
+    if if_none_match is not None:
+        data_dict["if_none_match"] = if_none_match
     try:
         dcpr_request = toolkit.get_action("dcpr_request_show")(
-            context={"dictize_for_ui": True},
-            data_dict={"csi_reference_id": csi_reference_id},
+            context={"dictize_for_ui": True}, data_dict=data_dict
         )
     except toolkit.ObjectNotFound:
         result = toolkit.abort(404, toolkit._("DCPR request not found"))
     except toolkit.NotAuthorized:
         result = toolkit.base.abort(401, toolkit._("Not authorized"))
     else:
-        extra_vars = {
-            "dcpr_request": dcpr_request,
-        }
-        result = toolkit.render("dcpr/show.html", extra_vars=extra_vars)
+        if dcpr_request.get("not_modified", False):
+            result = make_response("", 304)
+        else:
+            extra_vars = {
+                "dcpr_request": dcpr_request,
+            }
+            result = make_response(
+                toolkit.render("dcpr/show.html", extra_vars=extra_vars)
+            )
+        result.set_etag(f"{dcpr_request['etag']}-{page_variant}")
+        result.last_modified = dt.datetime.fromisoformat(
+            dcpr_request["metadata_modified"]
+        ).replace(tzinfo=dt.timezone.utc)
+        result.cache_control.private = True
+        result.cache_control.no_cache = True
+        result.vary.add("Cookie")
+    return result
+
+
+def _get_page_variant() -> str:
+    """Identify the user and language that a page is rendered for"""
+    user_obj = getattr(toolkit.g, "userobj", None)
+    variant = f"{user_obj.id if user_obj is not None else ''}:{h.lang()}"
+    return hashlib.sha1(variant.encode("utf-8")).hexdigest()[:16]
+
+
+def _get_dcpr_request_if_none_match(page_variant: str) -> typing.Optional[str]:
+    """Return the DCPR request ETags of the pages that the client has a copy of.
+
+    Only ETags of pages rendered for the current user and language are considered.
+    None are considered if there are pending flash messages, as these must be shown.
+
+    """
+
+    if session.get("_flashes"):
+        result = None
+    else:
+        suffix = f"-{page_variant}"
+        candidates = [
+            tag[: -len(suffix)]
+            for tag in request.if_none_match.as_set(include_weak=True)
+            if tag.endswith(suffix)
+        ]
+        result = ",".join(candidates) if len(candidates) > 0 else None
     return result
 
 
@@ -707,6 +764,7 @@ def _prepare_context() -> typing.Dict:
 def _unflatten_dcpr_request_datasets(flat_data_dict: typing.Dict) -> typing.Dict:
     dataset_fields = [
         "proposed_dataset_title",
+        "dataset_id",
         "dataset_purpose",
         "dataset_custodian",
         "data_type",
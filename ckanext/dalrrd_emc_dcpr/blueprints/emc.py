@@ -1,7 +1,9 @@
 import logging
 
 from ckan.plugins import toolkit
-from flask import Blueprint
+from flask import Blueprint, Response
+
+from .. import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -40,3 +42,17 @@ def request_dataset_management(dataset_id, management_command):
         )
     )
     return toolkit.redirect_to("dataset.read", id=dataset_id)
+
+
+@emc_blueprint.route("/metrics")
+def show_metrics():
+    try:
+        toolkit.check_access("emc_show_metrics", {"user": toolkit.g.user})
+    except toolkit.NotAuthorized:
+        toolkit.abort(403, toolkit._("Not authorized to see metrics"))
+    if not metrics.metrics_enabled():
+        toolkit.abort(404, toolkit._("Metrics are not enabled"))
+    return Response(
+        metrics.render_prometheus_metrics(),
+        mimetype="text/plain; version=0.0.4",
+    )
@@ -0,0 +1,427 @@
+"""Bulk loading of EMC datasets straight into the CKAN DB.
+
+The functions in this module bypass CKAN's action layer in order to be able to load
+very large numbers of datasets in a reasonable amount of time. Datasets are written
+in batches, with each batch being loaded into the `package`, `package_extra`,
+`package_tag` and `resource` tables via PostgreSQL's `COPY` command. The search index
+is not updated while loading - call `rebuild_search_index()` after all batches are
+done.
+
+This is only meant for non-production deployments, where it is used to reproduce
+production-scale catalogues locally. It does not create activities, does not run
+validation and does not notify other plugins of the new datasets.
+
+The parallel reindexing done by `rebuild_search_index()` is also used by the
+`search reindex` CLI command, which is safe to run on production deployments.
+
+"""
+
+import contextlib
+import csv
+import datetime as dt
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import time
+import typing
+import uuid
+from concurrent import futures
+from pathlib import Path
+
+from ckan import model
+from ckan.lib import search
+from ckan.lib.search import index as search_index
+from sqlalchemy import text as sla_text
+
+from ..constants import (
+    ISO_TOPIC_CATEGOY_VOCABULARY_NAME,
+    SASDI_THEMES_VOCABULARY_NAME,
+)
+from . import _CkanEmcDataset
+
+logger = logging.getLogger(__name__)
+
+_CORE_PACKAGE_FIELDS: typing.Final[typing.Tuple[str, ...]] = (
+    "name",
+    "title",
+    "notes",
+    "private",
+    "type",
+    "maintainer",
+    "maintainer_email",
+    "license_id",
+    "version",
+)
+
+# these fields are handled separately and must not end up as package extras
+_NON_EXTRA_FIELDS: typing.Final[typing.Tuple[str, ...]] = _CORE_PACKAGE_FIELDS + (
+    "owner_org",
+    "resources",
+    "tags",
+    "sasdi_theme",
+    "iso_topic_category",
+    "source",
+)
+
+_VOCABULARY_FIELDS: typing.Final[typing.Dict[str, str]] = {
+    "sasdi_theme": SASDI_THEMES_VOCABULARY_NAME,
+    "iso_topic_category": ISO_TOPIC_CATEGOY_VOCABULARY_NAME,
+}
+
+
+class _BulkBatch:
+    """Rows for a single batch of datasets, ready to be sent to `COPY`"""
+
+    def __init__(self):
+        self.package_ids: typing.List[str] = []
+        self.packages = io.StringIO()
+        self.extras = io.StringIO()
+        self.package_tags = io.StringIO()
+        self.resources = io.StringIO()
+        self._writers = {
+            name: csv.writer(getattr(self, name))
+            for name in ("packages", "extras", "package_tags", "resources")
+        }
+
+    def write(self, table: str, row: typing.Sequence) -> None:
+        self._writers[table].writerow(row)
+
+
+def bulk_insert_datasets(
+    datasets: typing.Iterable[_CkanEmcDataset],
+    creator_user_id: str,
+    batch_size: int = 5000,
+) -> typing.List[str]:
+    """Insert datasets into the CKAN DB in batches, bypassing the action layer.
+
+    Datasets whose name already exists in the DB are skipped. Returns the ids of the
+    created datasets.
+
+    """
+
+    org_ids = {}
+    vocabulary_tags = _get_vocabulary_tags()
+    free_tags = {}
+    created_ids = []
+    iterator = iter(datasets)
+    while True:
+        chunk = list(itertools.islice(iterator, batch_size))
+        if len(chunk) == 0:
+            break
+        existing_names = _get_existing_package_names([ds.name for ds in chunk])
+        batch = _BulkBatch()
+        now = dt.datetime.utcnow().isoformat()
+        for dataset in chunk:
+            if dataset.name in existing_names:
+                logger.debug(f"dataset {dataset.name!r} already exists, skipping...")
+                continue
+            owner_org_id = org_ids.get(dataset.owner_org)
+            if owner_org_id is None:
+                owner_org_id = _get_organization_id(dataset.owner_org)
+                org_ids[dataset.owner_org] = owner_org_id
+            _add_dataset_to_batch(
+                batch,
+                dataset,
+                owner_org_id=owner_org_id,
+                creator_user_id=creator_user_id,
+                timestamp=now,
+                vocabulary_tags=vocabulary_tags,
+                free_tags=free_tags,
+            )
+        _copy_batch(batch)
+        created_ids.extend(batch.package_ids)
+        logger.info(
+            f"Inserted {len(batch.package_ids)} datasets "
+            f"({len(created_ids)} in total so far)"
+        )
+    return created_ids
+
+
+def rebuild_search_index(
+    package_ids: typing.List[str],
+    workers: int = 4,
+    chunk_size: int = 1000,
+    checkpoint_path: typing.Optional[Path] = None,
+    resume: bool = False,
+) -> int:
+    """Index the input packages using a pool of worker processes.
+
+    Each worker sends its whole chunk to Solr in a single request, which also commits
+    the chunk. When a `checkpoint_path` is given, the ids of indexed packages are
+    appended to it after each chunk is committed, such that an interrupted rebuild
+    can later be resumed by passing `resume=True`. The checkpoint file is removed
+    once all chunks are done.
+
+    Returns the number of packages that were indexed.
+
+    """
+
+    if checkpoint_path is not None:
+        if resume and checkpoint_path.exists():
+            already_indexed = set(checkpoint_path.read_text().split())
+            package_ids = [i for i in package_ids if i not in already_indexed]
+            logger.info(
+                f"Resuming from checkpoint, skipping {len(already_indexed)} datasets "
+                f"that have already been indexed"
+            )
+        else:
+            checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            checkpoint_path.write_text("")
+    chunks = [
+        package_ids[i : i + chunk_size] for i in range(0, len(package_ids), chunk_size)
+    ]
+    # worker processes inherit the parent's DB connection pool when forked, so we
+    # get rid of it before starting them
+    model.Session.remove()
+    model.meta.engine.dispose()
+    start_time = time.perf_counter()
+    num_indexed = 0
+    with futures.ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_initialize_index_worker,
+    ) as executor:
+        to_do = {executor.submit(_index_chunk, chunk): chunk for chunk in chunks}
+        for done_future in futures.as_completed(to_do):
+            num_indexed += done_future.result()
+            if checkpoint_path is not None:
+                with checkpoint_path.open("a") as fh:
+                    fh.write("\n".join(to_do[done_future]) + "\n")
+            docs_per_second = num_indexed / (time.perf_counter() - start_time)
+            logger.info(
+                f"Indexed {num_indexed} of {len(package_ids)} datasets "
+                f"({docs_per_second:.1f} docs/s)"
+            )
+    if checkpoint_path is not None:
+        checkpoint_path.unlink()
+    return num_indexed
+
+
+def get_indexable_package_ids(
+    modified_since: typing.Optional[dt.datetime] = None,
+) -> typing.List[str]:
+    """Return the ids of all packages that ought to be in the search index"""
+    query = model.Session.query(model.Package.id).filter(
+        model.Package.state != model.State.DELETED
+    )
+    if modified_since is not None:
+        query = query.filter(model.Package.metadata_modified >= modified_since)
+    return [row[0] for row in query.order_by(model.Package.id)]
+
+
+def remove_deleted_packages_from_search_index(modified_since: dt.datetime) -> int:
+    """Remove packages that have been deleted since the input date from the index"""
+    query = model.Session.query(model.Package.id).filter(
+        model.Package.state == model.State.DELETED,
+        model.Package.metadata_modified >= modified_since,
+    )
+    package_index = search.index_for(model.Package)
+    num_removed = 0
+    for (package_id,) in query:
+        package_index.remove_dict({"id": package_id})
+        num_removed += 1
+    return num_removed
+
+
+class _SolrDocumentCollector:
+    """Stand-in for the Solr connection used by CKAN's package index.
+
+    It collects the documents that CKAN would otherwise send to Solr one at a time,
+    so that they can be sent in a single request instead.
+
+    """
+
+    def __init__(self):
+        self.documents = []
+
+    def add(self, docs: typing.List[typing.Dict], **kwargs) -> None:
+        self.documents.extend(docs)
+
+
+@contextlib.contextmanager
+def _collect_solr_documents() -> typing.Iterator[_SolrDocumentCollector]:
+    collector = _SolrDocumentCollector()
+    original_make_connection = search_index.make_connection
+    search_index.make_connection = lambda *args, **kwargs: collector
+    try:
+        yield collector
+    finally:
+        search_index.make_connection = original_make_connection
+
+
+def _initialize_index_worker():
+    model.Session.remove()
+    model.meta.engine.dispose()
+
+
+def _index_chunk(package_ids: typing.List[str]) -> int:
+    with _collect_solr_documents() as collector:
+        search.rebuild(package_ids=package_ids, defer_commit=True, quiet=True)
+    if collector.documents:
+        search.make_connection().add(docs=collector.documents, commit=True)
+    model.Session.remove()
+    return len(collector.documents)
+
+
+def _add_dataset_to_batch(
+    batch: _BulkBatch,
+    dataset: _CkanEmcDataset,
+    *,
+    owner_org_id: str,
+    creator_user_id: str,
+    timestamp: str,
+    vocabulary_tags: typing.Dict[typing.Tuple[str, str], str],
+    free_tags: typing.Dict[str, str],
+) -> None:
+    package_id = str(uuid.uuid4())
+    data_dict = dataset.to_data_dict()
+    batch.package_ids.append(package_id)
+    batch.write(
+        "packages",
+        [package_id]
+        + [data_dict.get(field) for field in _CORE_PACKAGE_FIELDS]
+        + [owner_org_id, creator_user_id, "active", timestamp, timestamp],
+    )
+    for key, value in data_dict.items():
+        if key not in _NON_EXTRA_FIELDS and value is not None:
+            batch.write(
+                "extras",
+                [
+                    str(uuid.uuid4()),
+                    package_id,
+                    key,
+                    _serialize_extra_value(value),
+                    "active",
+                ],
+            )
+    for field_name, vocabulary_name in _VOCABULARY_FIELDS.items():
+        value = data_dict.get(field_name)
+        tag_id = vocabulary_tags.get((vocabulary_name, value))
+        if tag_id is not None:
+            batch.write(
+                "package_tags", [str(uuid.uuid4()), package_id, tag_id, "active"]
+            )
+    for tag in data_dict.get("tags", []):
+        tag_id = free_tags.get(tag["name"])
+        if tag_id is None:
+            tag_id = _get_or_create_free_tag(tag["name"])
+            free_tags[tag["name"]] = tag_id
+        batch.write("package_tags", [str(uuid.uuid4()), package_id, tag_id, "active"])
+    for position, resource in enumerate(data_dict.get("resources", [])):
+        batch.write(
+            "resources",
+            [
+                str(uuid.uuid4()),
+                package_id,
+                resource.get("url"),
+                resource.get("format"),
+                resource.get("name"),
+                resource.get("description"),
+                position,
+                json.dumps({"format_version": resource.get("format_version")}),
+                "active",
+                timestamp,
+            ],
+        )
+
+
+def _serialize_extra_value(value: typing.Any) -> str:
+    """Serialize an extra's value in the same way as CKAN's action layer.
+
+    Strings are stored as they are, whereas other values, like booleans and the lists
+    of multiple choice fields, are stored as JSON.
+
+    """
+
+    if isinstance(value, str):
+        result = value
+    else:
+        result = json.dumps(value)
+    return result
+
+
+def _copy_batch(batch: _BulkBatch) -> None:
+    copy_targets = (
+        (
+            batch.packages,
+            "package (id, name, title, notes, private, type, maintainer, "
+            "maintainer_email, license_id, version, owner_org, creator_user_id, "
+            "state, metadata_created, metadata_modified)",
+        ),
+        (batch.extras, "package_extra (id, package_id, key, value, state)"),
+        (batch.package_tags, "package_tag (id, package_id, tag_id, state)"),
+        (
+            batch.resources,
+            "resource (id, package_id, url, format, name, description, position, "
+            "extras, state, created)",
+        ),
+    )
+    connection = model.meta.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for buffer, target in copy_targets:
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {target} FROM STDIN WITH (FORMAT csv)", buffer)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def _get_existing_package_names(names: typing.List[str]) -> typing.Set[str]:
+    query = model.Session.query(model.Package.name).filter(
+        model.Package.name.in_(names)
+    )
+    result = {row.name for row in query}
+    model.Session.remove()
+    return result
+
+
+def _get_organization_id(name_or_id: str) -> str:
+    organization = model.Group.get(name_or_id)
+    if organization is None:
+        raise RuntimeError(f"Could not find organization {name_or_id!r}")
+    result = organization.id
+    model.Session.remove()
+    return result
+
+
+def _get_vocabulary_tags() -> typing.Dict[typing.Tuple[str, str], str]:
+    query = (
+        model.Session.query(model.Vocabulary.name, model.Tag.name, model.Tag.id)
+        .join(model.Tag, model.Tag.vocabulary_id == model.Vocabulary.id)
+        .filter(
+            model.Vocabulary.name.in_(
+                (SASDI_THEMES_VOCABULARY_NAME, ISO_TOPIC_CATEGOY_VOCABULARY_NAME)
+            )
+        )
+    )
+    result = {(vocab_name, tag_name): tag_id for vocab_name, tag_name, tag_id in query}
+    model.Session.remove()
+    if len(result) == 0:
+        logger.warning(
+            "Could not find any SASDI themes or ISO topic categories - datasets will "
+            "be created without them. Run the relevant `bootstrap` commands first in "
+            "order to have them included"
+        )
+    return result
+
+
+def _get_or_create_free_tag(name: str) -> str:
+    with model.meta.engine.begin() as conn:
+        tag_id = conn.execute(
+            sla_text("SELECT id FROM tag WHERE name = :name AND vocabulary_id IS NULL"),
+            name=name,
+        ).scalar()
+        if tag_id is None:
+            tag_id = str(uuid.uuid4())
+            conn.execute(
+                sla_text("INSERT INTO tag (id, name) VALUES (:id, :name)"),
+                id=tag_id,
+                name=name,
+            )
+    return tag_id
@@ -20,6 +20,8 @@ import ckan
 import ckan.plugins as p
 from ckan.plugins import toolkit
 from ckan import model
+from ckan.lib import jobs as ckan_jobs
+from ckan.lib import search as ckan_search
 from ckan.lib.navl import dictization_functions
 from lxml import etree
 from sqlalchemy import text as sla_text
@@ -33,15 +35,24 @@ from ckanext.dalrrd_emc_dcpr.model.dcpr_request import (
 )
 from ckanext.dalrrd_emc_dcpr.model.dcpr_error_report import DCPRErrorReport
 
-from .. import jobs
+from .. import (
+    helpers,
+    jobs,
+    pycsw_catalogue,
+)
 from ..constants import (
     ISO_TOPIC_CATEGOY_VOCABULARY_NAME,
     ISO_TOPIC_CATEGORIES,
+    PYCSW_JOBS_QUEUE_NAME,
     SASDI_THEMES_VOCABULARY_NAME,
 )
 from ..email_notifications import get_and_send_notifications_for_all_users
 
-from . import utils
+from . import (
+    bulk_loading,
+    profiling,
+    utils,
+)
 from ._bootstrap_data import PORTAL_PAGES, SASDI_ORGANIZATIONS
 from ._sample_datasets import (
     SAMPLE_DATASET_TAG,
@@ -62,7 +73,9 @@ _DEFAULT_LEGACY_SASDI_THUMBNAIL_DIR = (
     Path.home() / "data/storage/legacy_sasdi_downloader/thumbnails"
 )
 _DEFAULT_MAX_WORKERS = 5
-_PYCSW_MATERIALIZED_VIEW_NAME = "public.emc_pycsw_view"
+_DEFAULT_SEARCH_REINDEX_CHECKPOINT_PATH = (
+    Path.home() / "data/storage/search_reindex_checkpoint.txt"
+)
 
 
 @click.group()
@@ -212,6 +225,7 @@ def create_sasdi_themes():
                     f"Tag {theme_name!r} is already part of the "
                     f"{SASDI_THEMES_VOCABULARY_NAME!r} vocabulary, skipping..."
                 )
+    helpers.invalidate_vocabulary_cache()
     logger.info("Done!")
 
 
@@ -251,6 +265,7 @@ def delete_sasdi_themes():
         logger.info(
             f"Vocabulary {SASDI_THEMES_VOCABULARY_NAME!r} does not exist, nothing to do"
         )
+    helpers.invalidate_vocabulary_cache()
     logger.info("Done!")
 
 
@@ -304,6 +319,7 @@ def create_iso_topic_categories():
                     f"Tag {theme_name!r} is already part of the "
                     f"{ISO_TOPIC_CATEGOY_VOCABULARY_NAME!r} vocabulary, skipping..."
                 )
+    helpers.invalidate_vocabulary_cache()
     logger.info("Done!")
 
 
@@ -384,6 +400,7 @@ def delete_iso_topic_categories():
             f"Vocabulary {ISO_TOPIC_CATEGOY_VOCABULARY_NAME!r} does not exist, "
             f"nothing to do"
         )
+    helpers.invalidate_vocabulary_cache()
     logger.info(f"Done!")
 
 
@@ -726,6 +743,27 @@ def delete_sample_organizations():
 )
 @click.option("-x", "--longitude-range", nargs=2, type=float, default=(16.3, 33.0))
 @click.option("-y", "--latitude-range", nargs=2, type=float, default=(-35.0, -21.0))
+@click.option(
+    "--bulk",
+    is_flag=True,
+    help=(
+        "Insert datasets directly into the DB in batches, bypassing the CKAN action "
+        "layer, and rebuild the search index at the end. Use this for loading large "
+        "numbers of datasets"
+    ),
+)
+@click.option(
+    "--batch-size",
+    default=5000,
+    show_default=True,
+    help="Number of datasets to insert per batch. Only relevant with --bulk",
+)
+@click.option(
+    "--index-workers",
+    default=_DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of processes used for rebuilding the search index. Only relevant with --bulk",
+)
 def create_sample_datasets(
     owner_org,
     num_datasets,
@@ -734,8 +772,18 @@ def create_sample_datasets(
     temporal_range,
     longitude_range,
     latitude_range,
+    bulk,
+    batch_size,
+    index_workers,
 ):
-    """Create multiple sample datasets"""
+    """Create multiple sample datasets
+
+    By default datasets are created by means of the `package_create` action. When
+    loading many datasets (_e.g._ for reproducing a production-scale catalogue) use
+    the `--bulk` flag, which inserts datasets straight into the DB.
+
+    """
+
     user = toolkit.get_action("get_site_user")({"ignore_auth": True}, {})
     datasets = generate_sample_datasets(
         num_datasets,
@@ -749,34 +797,44 @@ def create_sample_datasets(
         latitude_range_start=latitude_range[0],
         latitude_range_end=latitude_range[1],
     )
-    ready_to_create_datasets = [ds.to_data_dict() for ds in datasets]
-    workers = min(3, len(ready_to_create_datasets))
-    with futures.ThreadPoolExecutor(workers) as executor:
-        to_do = []
-        for dataset in ready_to_create_datasets:
-            future = executor.submit(utils.create_single_dataset, user, dataset)
-            to_do.append(future)
-        num_created = 0
-        num_already_exist = 0
-        num_failed = 0
-        for done_future in futures.as_completed(to_do):
-            try:
-                result = done_future.result()
-                if result == utils.DatasetCreationResult.CREATED:
-                    num_created += 1
-                elif result == utils.DatasetCreationResult.NOT_CREATED_ALREADY_EXISTS:
-                    num_already_exist += 1
-            except dictization_functions.DataError:
-                logger.exception(f"Could not create dataset")
-                num_failed += 1
-            except ValueError:
-                logger.exception(f"Could not create dataset")
-                num_failed += 1
-
-    logger.info(f"Created {num_created} datasets")
-    logger.info(f"Skipped {num_already_exist} datasets")
-    logger.info(f"Failed to create {num_failed} datasets")
-    logger.info("Done!")
+    if bulk:
+        created_ids = bulk_loading.bulk_insert_datasets(
+            datasets, creator_user_id=user["id"], batch_size=batch_size
+        )
+        logger.info(f"Created {len(created_ids)} datasets, rebuilding search index...")
+        bulk_loading.rebuild_search_index(created_ids, workers=index_workers)
+        logger.info("Done!")
+    else:
+        ready_to_create_datasets = [ds.to_data_dict() for ds in datasets]
+        workers = min(3, len(ready_to_create_datasets))
+        with futures.ThreadPoolExecutor(workers) as executor:
+            to_do = []
+            for dataset in ready_to_create_datasets:
+                future = executor.submit(utils.create_single_dataset, user, dataset)
+                to_do.append(future)
+            num_created = 0
+            num_already_exist = 0
+            num_failed = 0
+            for done_future in futures.as_completed(to_do):
+                try:
+                    result = done_future.result()
+                    if result == utils.DatasetCreationResult.CREATED:
+                        num_created += 1
+                    elif (
+                        result == utils.DatasetCreationResult.NOT_CREATED_ALREADY_EXISTS
+                    ):
+                        num_already_exist += 1
+                except dictization_functions.DataError:
+                    logger.exception(f"Could not create dataset")
+                    num_failed += 1
+                except ValueError:
+                    logger.exception(f"Could not create dataset")
+                    num_failed += 1
+
+        logger.info(f"Created {num_created} datasets")
+        logger.info(f"Skipped {num_already_exist} datasets")
+        logger.info(f"Failed to create {num_failed} datasets")
+        logger.info("Done!")
 
 
 # TODO: speed this up by doing concurrent processing, similar to create_sample_datasets
@@ -999,6 +1057,185 @@ def test_background_job(job_name, job_arg, job_kwarg):
         logger.error(f"Job function {job_name!r} does not exist")
 
 
+@dalrrd_emc_dcpr.group()
+def profile():
+    """Profile actions, template helpers and background jobs
+
+    The profiled code runs against the configured database. Each profiling command
+    reports wall time, the number of SQL queries and the time spent running them,
+    together with the hottest functions.
+
+    """
+
+
+def _profiling_options(func):
+    options = [
+        click.option(
+            "-n",
+            "--num-runs",
+            default=1,
+            show_default=True,
+            help="How many times to run the profiled code",
+        ),
+        click.option(
+            "--profiler",
+            type=click.Choice([p.value for p in profiling.Profiler]),
+            default=profiling.Profiler.CPROFILE.value,
+            show_default=True,
+        ),
+        click.option(
+            "--num-hot-functions",
+            default=20,
+            show_default=True,
+            help="How many of the hottest functions to report",
+        ),
+        click.option(
+            "--collapsed-stacks-output",
+            type=click.Path(dir_okay=False, writable=True, path_type=Path),
+            help=(
+                "Write sampled stacks to this file, in the collapsed format used by "
+                "flamegraph tools. Requires the sampling profiler"
+            ),
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def _parse_kwargs(raw_kwargs: typing.Iterable[str]) -> typing.Dict[str, str]:
+    kwargs = {}
+    for raw_kwarg in raw_kwargs:
+        key, value = raw_kwarg.partition(":")[::2]
+        kwargs[key] = value
+    return kwargs
+
+
+def _run_profiler(
+    func: typing.Callable,
+    num_runs: int,
+    profiler: str,
+    num_hot_functions: int,
+    collapsed_stacks_output: typing.Optional[Path],
+):
+    selected_profiler = profiling.Profiler(profiler)
+    if (
+        collapsed_stacks_output is not None
+        and selected_profiler != profiling.Profiler.SAMPLING
+    ):
+        raise click.BadOptionUsage(
+            "collapsed_stacks_output",
+            "Writing collapsed stacks requires the sampling profiler",
+        )
+    result = profiling.profile_callable(
+        func,
+        num_runs=num_runs,
+        profiler=selected_profiler,
+        num_hot_functions=num_hot_functions,
+    )
+    logger.info(
+        f"Ran {num_runs} time(s) in {result.total_wall_time:.3f}s "
+        f"(min: {min(result.wall_times):.3f}s, max: {max(result.wall_times):.3f}s)"
+    )
+    logger.info(
+        f"Issued {result.num_queries} SQL queries, taking {result.sql_seconds:.3f}s"
+    )
+    logger.info(f"Hot functions:\n{result.hot_functions}")
+    if collapsed_stacks_output is not None:
+        result.write_collapsed_stacks(collapsed_stacks_output)
+        logger.info(f"Wrote collapsed stacks to {str(collapsed_stacks_output)!r}")
+
+
+@profile.command()
+@click.argument("action_name")
+@click.option(
+    "-d",
+    "--data-dict",
+    default="{}",
+    help="JSON-encoded data dict to pass to the action",
+)
+@click.option(
+    "-u",
+    "--user",
+    help="Name of the user running the action. Defaults to the site user",
+)
+@_profiling_options
+@click.pass_context
+def action(ctx, action_name, data_dict, user, **profiling_kwargs):
+    """Profile a CKAN action
+
+    Example:
+
+    \b
+        ckan dalrrd-emc-dcpr profile action package_search \\
+            --data-dict '{"q": "*:*", "rows": 100}' --num-runs 10
+
+    """
+
+    parsed_data_dict = json.loads(data_dict)
+    if user is None:
+        user = toolkit.get_action("get_site_user")({"ignore_auth": True}, {})["name"]
+    action_function = toolkit.get_action(action_name)
+    flask_app = ctx.meta["flask_app"]
+    with flask_app.test_request_context():
+        _run_profiler(
+            lambda: action_function({"user": user}, dict(parsed_data_dict)),
+            **profiling_kwargs,
+        )
+
+
+@profile.command()
+@click.argument("helper_name")
+@click.option("--helper-arg", multiple=True, help="Can be provided multiple times")
+@click.option(
+    "--helper-kwarg",
+    multiple=True,
+    help=(
+        "Provide each keyword argument as a colon-separated string of "
+        "key_name:value. This option can be provided multiple times"
+    ),
+)
+@_profiling_options
+@click.pass_context
+def helper(ctx, helper_name, helper_arg, helper_kwarg, **profiling_kwargs):
+    """Profile a template helper"""
+    kwargs = _parse_kwargs(helper_kwarg)
+    flask_app = ctx.meta["flask_app"]
+    with flask_app.test_request_context():
+        helper_function = toolkit.h[helper_name]
+        _run_profiler(
+            lambda: helper_function(*helper_arg, **kwargs), **profiling_kwargs
+        )
+
+
+@profile.command()
+@click.argument("job_name")
+@click.option("--job-arg", multiple=True, help="Can be provided multiple times")
+@click.option(
+    "--job-kwarg",
+    multiple=True,
+    help=(
+        "Provide each keyword argument as a colon-separated string of "
+        "key_name:value. This option can be provided multiple times"
+    ),
+)
+@_profiling_options
+def job(job_name, job_arg, job_kwarg, **profiling_kwargs):
+    """Profile a background job function, running it synchronously
+
+    JOB_NAME is the name of the job function to be run. Look in the `jobs` module for
+    existing functions.
+
+    """
+
+    job_function = getattr(jobs, job_name, None)
+    if job_function is not None:
+        kwargs = _parse_kwargs(job_kwarg)
+        _run_profiler(lambda: job_function(*job_arg, **kwargs), **profiling_kwargs)
+    else:
+        logger.error(f"Job function {job_name!r} does not exist")
+
+
 @dalrrd_emc_dcpr.group()
 def pycsw():
     """Commands related to integration between CKAN and pycsw"""
@@ -1006,38 +1243,235 @@ def pycsw():
 
 @pycsw.command()
 def create_materialized_view():
-    """Create the materialized view used to map between CKAN and pycsw"""
-    jinja_env = utils.get_jinja_env()
-    template = jinja_env.get_template("pycsw/pycsw_view.sql")
-    ddl_command = template.render(view_name=_PYCSW_MATERIALIZED_VIEW_NAME)
-    with model.meta.engine.connect() as conn:
-        conn.execute(sla_text(ddl_command))
-        # conn.commit()
+    """Create the materialized view used to map between CKAN and pycsw
+
+    The view's indexes are created too. Running this command on an existing view
+    adds any missing indexes.
+
+    """
+
+    pycsw_catalogue.create_materialized_view()
     logger.info("Done!")
 
 
 @pycsw.command()
-def refresh_materialized_view():
+@click.option(
+    "--concurrently/--blocking",
+    default=True,
+    help=(
+        "Whether to refresh the view without blocking readers. A blocking refresh "
+        "is needed when the view has been created without any data"
+    ),
+)
+def refresh_materialized_view(concurrently: bool):
     """Refresh the materialized view used to map between CKAN and pycsw"""
-    with model.meta.engine.connect() as conn:
-        conn.execute(
-            sla_text(
-                f"REFRESH MATERIALIZED VIEW {_PYCSW_MATERIALIZED_VIEW_NAME} WITH DATA;"
-            )
-        )
+    pycsw_catalogue.refresh_materialized_view(concurrently=concurrently)
     logger.info("Done!")
 
 
+@pycsw.command()
+@click.option(
+    "--burst",
+    is_flag=True,
+    help="Exit once there are no more jobs to run, instead of waiting for new ones",
+)
+def refresh_worker(burst: bool):
+    """Run a background worker for the materialized view refresh jobs
+
+    Refreshes are scheduled to run some time after a dataset changes. Unlike the
+    `ckan jobs worker` command, this worker also runs RQ's scheduler, which moves
+    these jobs into the `emc_pycsw` queue once they are due.
+
+    """
+
+    ckan_jobs.Worker([PYCSW_JOBS_QUEUE_NAME]).work(burst=burst, with_scheduler=True)
+
+
+@pycsw.command()
+@click.option(
+    "--concurrently/--blocking",
+    default=True,
+    help="Whether to benchmark a concurrent or a blocking refresh",
+)
+def benchmark_materialized_view(concurrently: bool):
+    """Measure how long it takes to refresh the materialized view
+
+    Also reports how much data the view's query writes to temporary files. Use this
+    on a large catalogue, as generated by
+
+    `ckan dalrrd-emc-dcpr load-sample-data create-sample-datasets --bulk`
+
+    """
+
+    result = pycsw_catalogue.benchmark_materialized_view_refresh(
+        concurrently=concurrently
+    )
+    logger.info(
+        f"Refreshed {result['num_records']} records in "
+        f"{result['refresh_seconds']:.2f}s"
+    )
+    logger.info(
+        f"View query took {result['query_execution_seconds']:.2f}s and wrote "
+        f"{result['query_temp_written_bytes'] / 1024 ** 2:.1f} MiB to temporary files"
+    )
+
+
 @pycsw.command()
 def drop_materialized_view():
     """Delete the materialized view used to map between CKAN and pycsw"""
-    with model.meta.engine.connect() as conn:
-        conn.execute(
-            sla_text(f"DROP MATERIALIZED VIEW {_PYCSW_MATERIALIZED_VIEW_NAME}")
-        )
+    pycsw_catalogue.drop_materialized_view()
+    logger.info("Done!")
+
+
+@pycsw.command()
+def create_records_table():
+    """Create the incrementally-maintained table used to map between CKAN and pycsw
+
+    After creating the table, run the `rebuild-records` command in order to populate
+    it with the existing datasets. From then on the table is kept up to date by
+    background jobs, which are enqueued whenever a dataset is created, updated or
+    deleted.
+
+    """
+
+    pycsw_catalogue.create_records_table()
+    logger.info("Done!")
+
+
+@pycsw.command()
+def rebuild_records():
+    """Recompute the pycsw records of all datasets
+
+    This is meant for populating the table for the first time, or for recovering
+    from failed background jobs.
+
+    """
+
+    num_records = pycsw_catalogue.rebuild_records()
+    logger.info(f"Done! Table now has {num_records} records")
+
+
+@pycsw.command()
+def rebuild_documents():
+    """Render the ISO 19139 documents of all public datasets
+
+    Documents are otherwise rendered by background jobs whenever a dataset is
+    created, updated or deleted. Run `rebuild-records` or `refresh-materialized-view`
+    afterwards in order to make the new documents available to pycsw.
+
+    """
+
+    num_documents = pycsw_catalogue.rebuild_documents()
+    logger.info(f"Done! Rendered {num_documents} documents")
+
+
+@pycsw.command()
+def drop_records_table():
+    """Delete the incrementally-maintained table used to map between CKAN and pycsw"""
+    pycsw_catalogue.drop_records_table()
     logger.info("Done!")
 
 
+@dalrrd_emc_dcpr.group()
+def search():
+    """Commands related to the Solr search index"""
+
+
+@search.command()
+@click.option(
+    "--clear",
+    is_flag=True,
+    help=(
+        "Remove all existing documents from the index before reindexing. This is "
+        "needed after deploying a Solr schema that changes the type of existing fields"
+    ),
+)
+@click.option(
+    "--only-changed-since",
+    type=click.DateTime(),
+    help=(
+        "Only reindex datasets that have been modified since the input date. Datasets "
+        "deleted since then are removed from the index"
+    ),
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help=(
+        "Resume an interrupted reindex, skipping datasets that were indexed before "
+        "the interruption"
+    ),
+)
+@click.option(
+    "--checkpoint-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=_DEFAULT_SEARCH_REINDEX_CHECKPOINT_PATH,
+    show_default=True,
+    help="File used to keep track of the datasets that have already been indexed",
+)
+@click.option(
+    "--workers",
+    default=_DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of processes used for indexing",
+)
+@click.option(
+    "--chunk-size",
+    default=1000,
+    show_default=True,
+    help="Number of datasets indexed by each worker at a time",
+)
+def reindex(
+    clear: bool,
+    only_changed_since: typing.Optional[dt.datetime],
+    resume: bool,
+    checkpoint_file: Path,
+    workers: int,
+    chunk_size: int,
+):
+    """Reindex all datasets
+
+    Unlike the core `ckan search-index rebuild` command, datasets are indexed in
+    chunks by a pool of worker processes and each chunk is committed separately.
+    Indexed chunks are recorded in a checkpoint file, which allows resuming an
+    interrupted reindex with the `--resume` flag.
+
+    Use the `--clear` flag in order to migrate existing documents to a new Solr
+    schema and the `--only-changed-since` option for catching up with recent changes.
+
+    """
+
+    if clear and (resume or only_changed_since is not None):
+        raise click.UsageError(
+            "--clear cannot be combined with --resume or --only-changed-since"
+        )
+    package_ids = bulk_loading.get_indexable_package_ids(
+        modified_since=only_changed_since
+    )
+    if clear:
+        logger.info("Removing existing documents from the search index...")
+        ckan_search.clear_all()
+    if only_changed_since is not None:
+        num_removed = bulk_loading.remove_deleted_packages_from_search_index(
+            only_changed_since
+        )
+        logger.info(f"Removed {num_removed} deleted datasets from the search index")
+    logger.info(f"Reindexing {len(package_ids)} datasets...")
+    start_time = time.perf_counter()
+    num_indexed = bulk_loading.rebuild_search_index(
+        package_ids,
+        workers=workers,
+        chunk_size=chunk_size,
+        checkpoint_path=checkpoint_file,
+        resume=resume,
+    )
+    elapsed = time.perf_counter() - start_time
+    logger.info(
+        f"Done! Indexed {num_indexed} datasets in {elapsed:.1f} seconds "
+        f"({num_indexed / elapsed if elapsed else 0:.1f} docs/s)"
+    )
+
+
 @extra_commands.command()
 @click.option(
     "--post-run-delay-seconds",
@@ -1099,6 +1533,10 @@ def refresh_pycsw_materialized_view(ctx, post_run_delay_seconds: int):
 
     as the container's CMD instruction.
 
+    NOTE: The view is now refreshed by debounced background jobs whenever datasets
+    change, which only requires running a worker for the `emc_pycsw` queue. This
+    command remains available for deployments that prefer periodic refreshes.
+
     """
 
     flask_app = ctx.meta["flask_app"]
@@ -0,0 +1,129 @@
+"""Utilities for profiling the extension's code from the CLI
+
+Callables can be profiled either with `cProfile` or with a simple sampling profiler.
+The sampling profiler periodically records the stack of the thread running the
+profiled callable, which makes it possible to write the results in the collapsed
+stack format used by flamegraph tools (e.g. `flamegraph.pl` or speedscope).
+
+"""
+
+import cProfile
+import collections
+import dataclasses
+import enum
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import typing
+from pathlib import Path
+
+from ..query_counter import QueryCounter
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler(enum.Enum):
+    CPROFILE = "cprofile"
+    SAMPLING = "sampling"
+
+
+@dataclasses.dataclass
+class ProfilingResult:
+    wall_times: typing.List[float]
+    num_queries: int
+    sql_seconds: float
+    hot_functions: str
+    collapsed_stacks: typing.Optional[typing.Dict[str, int]] = None
+
+    @property
+    def total_wall_time(self) -> float:
+        return sum(self.wall_times)
+
+    def write_collapsed_stacks(self, target: Path) -> None:
+        with target.open("w") as fh:
+            for stack, count in sorted((self.collapsed_stacks or {}).items()):
+                fh.write(f"{stack} {count}\n")
+
+
+class _SamplingProfiler:
+    """Periodically samples the stack of a thread"""
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = collections.Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if len(frames) > 0:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def get_hot_functions(self, num_functions: int) -> str:
+        leaf_counts = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaf_counts[stack.rpartition(";")[-1]] += count
+        total = sum(leaf_counts.values()) or 1
+        lines = [
+            f"{count:>8} samples {count / total:>7.1%}  {function}"
+            for function, count in leaf_counts.most_common(num_functions)
+        ]
+        return "\n".join(lines)
+
+
+def profile_callable(
+    func: typing.Callable[[], typing.Any],
+    num_runs: int = 1,
+    profiler: Profiler = Profiler.CPROFILE,
+    num_hot_functions: int = 20,
+    sampling_interval_seconds: float = 0.005,
+) -> ProfilingResult:
+    """Run the input callable `num_runs` times under the chosen profiler"""
+    wall_times = []
+    with QueryCounter() as sql_recorder:
+        if profiler == Profiler.CPROFILE:
+            profile = cProfile.Profile()
+            for _ in range(num_runs):
+                start = time.perf_counter()
+                profile.runcall(func)
+                wall_times.append(time.perf_counter() - start)
+            stats_output = io.StringIO()
+            stats = pstats.Stats(profile, stream=stats_output)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(num_hot_functions)
+            hot_functions = stats_output.getvalue()
+            collapsed_stacks = None
+        else:
+            with _SamplingProfiler(
+                threading.get_ident(), sampling_interval_seconds
+            ) as sampler:
+                for _ in range(num_runs):
+                    start = time.perf_counter()
+                    func()
+                    wall_times.append(time.perf_counter() - start)
+            hot_functions = sampler.get_hot_functions(num_hot_functions)
+            collapsed_stacks = dict(sampler.stacks)
+    return ProfilingResult(
+        wall_times=wall_times,
+        num_queries=sql_recorder.num_queries,
+        sql_seconds=sql_recorder.seconds,
+        hot_functions=hot_functions,
+        collapsed_stacks=collapsed_stacks,
+    )
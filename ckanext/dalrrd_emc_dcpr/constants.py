@@ -27,6 +27,38 @@ ISO_TOPIC_CATEGORIES: typing.Final[typing.List[typing.Tuple[str, str]]] = [
     ("utilitiesCommuinication", "Utilities, Communication"),
 ]
 
+DEFAULT_SPATIAL_SEARCH_EXTENT_PADDING_DEGREES: typing.Final[float] = 0.001
+
+HARVESTED_CONTENT_HASH_FIELD_NAME: typing.Final[str] = "harvested_content_hash"
+
+# Set by our harvesting plugin on the context that the harvester passes to
+# `package_update`, holding the fields that are not covered by the content hash
+HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY: typing.Final[
+    str
+] = "emc_harvester_unhashed_fields"
+
+# Numeric fields derived from a dataset's spatial extent. They are stored as package
+# extras and also indexed in Solr as float fields
+DERIVED_SPATIAL_FIELD_NAMES: typing.Final[typing.Tuple[str, ...]] = (
+    "spatial_min_lon",
+    "spatial_min_lat",
+    "spatial_max_lon",
+    "spatial_max_lat",
+    "spatial_centroid_lon",
+    "spatial_centroid_lat",
+    "spatial_area",
+)
+
+PYCSW_JOBS_QUEUE_NAME: typing.Final[str] = "emc_pycsw"
+
+
+class PycswRelation(enum.Enum):
+    """The DB relation that pycsw reads its records from"""
+
+    RECORDS_TABLE = "records_table"
+    MATERIALIZED_VIEW = "materialized_view"
+
+
 NSIF_ORG_NAME = "nsif"
 CSI_ORG_NAME = "csi"
 
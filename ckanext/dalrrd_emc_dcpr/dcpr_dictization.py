@@ -13,10 +13,13 @@ which builds the dictionary by iterating over the table columns.
 
 """
 
+import datetime as dt
 import logging
 import typing
 
 import ckan.lib.dictization as ckan_dictization
+import sqlalchemy
+from ckan.model import types as model_types
 
 from .model import dcpr_request as dcpr_request_model
 
@@ -55,6 +58,7 @@ def dcpr_request_dataset_dictize(
 def dcpr_request_dict_save(validated_data_dict: typing.Dict, context: typing.Dict):
     if "request_date" in validated_data_dict:
         del validated_data_dict["request_date"]
+    validated_data_dict["metadata_modified"] = dt.datetime.utcnow()
 
     # vanilla ckan's table_dict_save expects the input data_dict to have an `id` key,
     # otherwise it will not be able to find pre-existing table rows
@@ -65,8 +69,6 @@ def dcpr_request_dict_save(validated_data_dict: typing.Dict, context: typing.Dic
     context["session"].flush()
     if context.get("updated_by") == "owner":
         # allow modification of a request's datasets only if current save was requested by the owner
-        for ds in dcpr_request.datasets:
-            context["session"].delete(ds)
         dcpr_request_dataset_list_save(
             validated_data_dict.get("datasets", []), dcpr_request, context
         )
@@ -76,15 +78,57 @@ def dcpr_request_dict_save(validated_data_dict: typing.Dict, context: typing.Dic
 def dcpr_request_dataset_list_save(
     datasets: typing.List[typing.Dict], dcpr_request, context: typing.Dict
 ) -> None:
-    for dataset_dict in datasets:
-        dataset_dict["dcpr_request_id"] = dcpr_request.csi_reference_id
-        dcpr_dataset_save(dataset_dict, context)
+    """Save the datasets of a DCPR request.
+
+    Input datasets are matched to the request's existing datasets by their
+    `dataset_id`. Existing datasets are only updated if their values have changed,
+    which means their ids remain stable across edits. Input datasets without a
+    known id are inserted and existing datasets missing from the input are deleted,
+    each with a single statement.
 
+    """
 
-def dcpr_dataset_save(dcpr_dataset_dict: typing.Dict, context: typing.Dict):
     session = context["session"]
-    obj = dcpr_request_model.DCPRRequestDataset()
-    logger.debug(f"{dcpr_dataset_dict=}")
-    obj.from_dict(dcpr_dataset_dict)
-    session.add(obj)
-    return obj
+    table = dcpr_request_model.dcpr_request_dataset_table
+    value_columns = [
+        column
+        for column in table.columns
+        if column.name not in ("dataset_id", "dcpr_request_id")
+    ]
+    existing_datasets = {ds.dataset_id: ds for ds in dcpr_request.datasets}
+    kept_ids = set()
+    new_rows = []
+    for dataset_dict in datasets:
+        values = {
+            column.name: dataset_dict.get(column.name, _get_column_default(column))
+            for column in value_columns
+        }
+        existing_dataset = existing_datasets.get(dataset_dict.get("dataset_id"))
+        if existing_dataset is not None and existing_dataset.dataset_id not in kept_ids:
+            kept_ids.add(existing_dataset.dataset_id)
+            for name, value in values.items():
+                if getattr(existing_dataset, name) != value:
+                    setattr(existing_dataset, name, value)
+        else:
+            values.update(
+                {
+                    "dataset_id": model_types.make_uuid(),
+                    "dcpr_request_id": dcpr_request.csi_reference_id,
+                }
+            )
+            new_rows.append(values)
+    removed_ids = set(existing_datasets.keys()) - kept_ids
+    session.flush()
+    if removed_ids:
+        for dataset_id in removed_ids:
+            session.expunge(existing_datasets[dataset_id])
+        session.execute(table.delete().where(table.c.dataset_id.in_(removed_ids)))
+    if new_rows:
+        session.execute(table.insert(), new_rows)
+    if removed_ids or new_rows:
+        session.expire(dcpr_request, ["datasets"])
+
+
+def _get_column_default(column: sqlalchemy.Column) -> typing.Any:
+    default = column.default
+    return default.arg if default is not None and default.is_scalar else None
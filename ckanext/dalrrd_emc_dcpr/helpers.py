@@ -1,15 +1,21 @@
+import copy
+import dataclasses
+import hashlib
 import json
 import logging
 import typing
-from urllib.parse import quote
+from urllib.parse import quote, urlencode
 from html import escape as html_escape
 
-from shapely import geometry
 from ckan import model
 from ckan.plugins import toolkit
 from ckan.lib.helpers import build_nav_main as core_build_nav_main
+from ckan.lib.redis import connect_to_redis
 
-from . import constants
+from . import (
+    constants,
+    homepage,
+)
 from .logic.action.emc import show_version
 from .constants import DCPRRequestStatus
 from .model.dcpr_request import DCPRRequest
@@ -17,15 +23,36 @@ from .model.dcpr_request import DCPRRequest
 
 logger = logging.getLogger(__name__)
 
+_PAGES_NAV_VERSION_REDIS_KEY = "ckanext.dalrrd_emc_dcpr.pages_nav_version"
+
+# per-process cache of the links to the pages shown in the main navigation menu
+_pages_nav_cache: typing.Dict[str, typing.Tuple] = {}
+
+_VOCABULARY_VERSION_REDIS_KEY = "ckanext.dalrrd_emc_dcpr.vocabulary_version"
+_VOCABULARY_TAGS_REDIS_KEY_PREFIX = "ckanext.dalrrd_emc_dcpr.vocabulary_tags"
+# tags of outdated versions are not deleted, they just expire
+_VOCABULARY_TAGS_TTL_SECONDS = 60 * 60 * 24
+
+# per-process cache of the tags of each vocabulary
+_vocabulary_cache: typing.Dict[str, typing.Tuple] = {}
+
+
+@dataclasses.dataclass(frozen=True)
+class SpatialDefaults:
+    """Values derived from the configured default spatial extent"""
+
+    configured_extent: typing.Optional[str]
+    padded_extent: typing.Optional[typing.Dict]
+    padded_extent_json: typing.Optional[str]
+    bounding_box: typing.Optional[typing.List[float]]
+
+
+_spatial_defaults: typing.Dict[str, SpatialDefaults] = {}
+
 
 def get_sasdi_themes(*args, **kwargs) -> typing.List[typing.Dict[str, str]]:
     logger.debug(f"inside get_sasdi_themes {args=} {kwargs=}")
-    try:
-        sasdi_themes = toolkit.get_action("tag_list")(
-            data_dict={"vocabulary_id": constants.SASDI_THEMES_VOCABULARY_NAME}
-        )
-    except toolkit.ObjectNotFound:
-        sasdi_themes = []
+    sasdi_themes = get_vocabulary_tags(constants.SASDI_THEMES_VOCABULARY_NAME)
     return [{"value": t, "label": t} for t in sasdi_themes]
 
 
@@ -36,27 +63,121 @@ def get_iso_topic_categories(*args, **kwargs) -> typing.List[typing.Dict[str, st
     ]
 
 
+def get_vocabulary_tags(vocabulary_name: str) -> typing.List[str]:
+    """Return the names of the tags that belong to the input vocabulary.
+
+    Tags are cached in each process and also in redis, which means that a process
+    only needs to query the DB if no other process has done it before. Both caches
+    are tied to a version number, which is stored in redis and is bumped by
+    `invalidate_vocabulary_cache()`.
+
+    """
+
+    redis_conn = connect_to_redis()
+    version = redis_conn.get(_VOCABULARY_VERSION_REDIS_KEY)
+    cached_version, cached_tags = _vocabulary_cache.get(vocabulary_name, (None, None))
+    if cached_tags is not None and cached_version == version:
+        result = cached_tags
+    else:
+        redis_key = (
+            f"{_VOCABULARY_TAGS_REDIS_KEY_PREFIX}:{vocabulary_name}:"
+            f"{int(version or 0)}"
+        )
+        if (raw_tags := redis_conn.get(redis_key)) is not None:
+            result = json.loads(raw_tags)
+        else:
+            try:
+                result = toolkit.get_action("tag_list")(
+                    data_dict={"vocabulary_id": vocabulary_name}
+                )
+            except toolkit.ObjectNotFound:
+                result = []
+            redis_conn.set(
+                redis_key, json.dumps(result), ex=_VOCABULARY_TAGS_TTL_SECONDS
+            )
+        _vocabulary_cache[vocabulary_name] = (version, result)
+    return result
+
+
+def invalidate_vocabulary_cache() -> None:
+    """Make all processes reload the tags of vocabularies on their next use"""
+    connect_to_redis().incr(_VOCABULARY_VERSION_REDIS_KEY)
+
+
+def configure_spatial_defaults(configured_extent: typing.Optional[str]) -> None:
+    """Compute the values derived from the configured default spatial extent.
+
+    This is meant to be called once, when the plugin is configured.
+
+    """
+
+    if configured_extent:
+        parsed_extent = json.loads(configured_extent)
+        padded_extent_json = json.dumps(
+            _pad_geospatial_extent(
+                parsed_extent, constants.DEFAULT_SPATIAL_SEARCH_EXTENT_PADDING_DEGREES
+            )
+        )
+        spatial_defaults = SpatialDefaults(
+            configured_extent=configured_extent,
+            padded_extent=json.loads(padded_extent_json),
+            padded_extent_json=padded_extent_json,
+            bounding_box=convert_geojson_to_bbox(parsed_extent),
+        )
+    else:
+        spatial_defaults = SpatialDefaults(
+            configured_extent=configured_extent,
+            padded_extent=None,
+            padded_extent_json=None,
+            bounding_box=None,
+        )
+    _spatial_defaults["current"] = spatial_defaults
+
+
+def get_spatial_defaults() -> SpatialDefaults:
+    """Return the values derived from the configured default spatial extent.
+
+    Values are recomputed if the configuration has changed since they were computed,
+    which does not happen while CKAN is running, but is useful in tests.
+
+    """
+
+    configured_extent = toolkit.config.get(
+        "ckan.dalrrd_emc_dcpr.default_spatial_search_extent"
+    )
+    current = _spatial_defaults.get("current")
+    if current is None or current.configured_extent != configured_extent:
+        configure_spatial_defaults(configured_extent)
+    return _spatial_defaults["current"]
+
+
 def get_default_spatial_search_extent(
     padding_degrees: typing.Optional[float] = None,
 ) -> typing.Dict:
     """
     Return GeoJSON polygon with bbox to use for default view of spatial search map widget.
     """
-    configured_extent = toolkit.config.get(
-        "ckan.dalrrd_emc_dcpr.default_spatial_search_extent"
-    )
-    if padding_degrees and configured_extent:
-        parsed_extent = json.loads(configured_extent)
-        result = _pad_geospatial_extent(parsed_extent, padding_degrees)
+    spatial_defaults = get_spatial_defaults()
+    if padding_degrees and spatial_defaults.configured_extent:
+        if padding_degrees == constants.DEFAULT_SPATIAL_SEARCH_EXTENT_PADDING_DEGREES:
+            result = copy.deepcopy(spatial_defaults.padded_extent)
+        else:
+            parsed_extent = json.loads(spatial_defaults.configured_extent)
+            result = _pad_geospatial_extent(parsed_extent, padding_degrees)
     else:
-        result = configured_extent
+        result = spatial_defaults.configured_extent
     return result
 
 
+def get_default_spatial_search_extent_json() -> typing.Optional[str]:
+    """Return the padded default spatial extent, serialized as GeoJSON"""
+    return get_spatial_defaults().padded_extent_json
+
+
 def get_default_bounding_box() -> typing.Optional[typing.List[float]]:
     """Return the default bounding box in the form upper left, lower right
 
-    This function calculates the default bounding box from the
+    This function returns the default bounding box of the
     `ckan.dalrrd_emc_dcpr.default_spatial_search_extent` configuration value. Note that
     this configuration value is expected to be in GeoJSON format and in GeoJSON,
     coordinate pairs take the form `lon, lat`.
@@ -66,11 +187,8 @@ def get_default_bounding_box() -> typing.Optional[typing.List[float]]:
 
     """
 
-    configured_extent = toolkit.config.get(
-        "ckan.dalrrd_emc_dcpr.default_spatial_search_extent"
-    )
-    parsed_extent = json.loads(configured_extent)
-    return convert_geojson_to_bbox(parsed_extent)
+    bounding_box = get_spatial_defaults().bounding_box
+    return list(bounding_box) if bounding_box is not None else None
 
 
 def convert_geojson_to_bbox(
@@ -89,6 +207,83 @@ def convert_geojson_to_bbox(
     return result
 
 
+def get_derived_spatial_fields(geojson: typing.Dict) -> typing.Dict[str, float]:
+    """Compute numeric fields that describe the bounding box of the input geometry.
+
+    These are stored alongside the dataset and indexed in Solr, so that they do not
+    need to be recomputed from the GeoJSON geometry whenever they are needed. The area
+    is expressed in square degrees, the same as the `bbox_area` field that is indexed
+    by ckanext-spatial.
+
+    """
+
+    bbox = convert_geojson_to_bbox(geojson)
+    if bbox is None:
+        result = {}
+    else:
+        max_lat, min_lon, min_lat, max_lon = bbox
+        result = dict(
+            zip(
+                constants.DERIVED_SPATIAL_FIELD_NAMES,
+                (
+                    min_lon,
+                    min_lat,
+                    max_lon,
+                    max_lat,
+                    (min_lon + max_lon) / 2,
+                    (min_lat + max_lat) / 2,
+                    (max_lon - min_lon) * (max_lat - min_lat),
+                ),
+            )
+        )
+    return result
+
+
+def compute_harvested_content_hash(
+    package_dict: typing.Dict[str, typing.Any],
+    unhashed_fields: typing.Iterable[str] = (),
+) -> str:
+    """Return a hash of the content of a harvested package dict.
+
+    The hash does not depend on key order. It does not cover the package's id, its
+    modification date, the hash itself nor any of the input `unhashed_fields`, as
+    these are not part of the harvested content.
+
+    """
+
+    excluded = set(unhashed_fields).union(
+        (constants.HARVESTED_CONTENT_HASH_FIELD_NAME, "id", "metadata_modified")
+    )
+    hashed = {k: v for k, v in package_dict.items() if k not in excluded}
+    canonical = json.dumps(hashed, sort_keys=True, default=str)
+    result = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return result
+
+
+def get_dataset_bounding_box(
+    pkg_dict: typing.Dict,
+) -> typing.Optional[typing.List[float]]:
+    """Return the bounding box of a dataset as `[max_lat, min_lon, min_lat, max_lon]`
+
+    The bounding box is read from the fields that are derived from the spatial
+    extent whenever the dataset is saved. It is only computed from the spatial extent
+    if these are not available, e.g. when the dataset has not been saved yet.
+
+    """
+
+    field_names = (
+        "spatial_max_lat",
+        "spatial_min_lon",
+        "spatial_min_lat",
+        "spatial_max_lon",
+    )
+    try:
+        result = [float(pkg_dict[name]) for name in field_names]
+    except (KeyError, TypeError, ValueError):
+        result = convert_geojson_to_bbox(pkg_dict.get("spatial"))
+    return result
+
+
 def convert_string_extent_to_bbox(extent: str) -> typing.List[float]:
     if extent is None:
         return []
@@ -101,6 +296,18 @@ def convert_string_extent_to_bbox(extent: str) -> typing.List[float]:
     return coords_extent
 
 
+def build_temporal_search_url(start_date: str, end_date: str) -> str:
+    """Build the URL of the current search, restricted to the input temporal range"""
+    temporal_params = ("ext_start_reference_date", "ext_end_reference_date")
+    params = [
+        (key, value)
+        for key, value in toolkit.request.args.items(multi=True)
+        if key not in temporal_params + ("page",)
+    ]
+    params.extend(zip(temporal_params, (start_date, end_date)))
+    return f"{toolkit.request.path}?{urlencode(params)}"
+
+
 def helper_show_version(*args, **kwargs) -> typing.Dict:
     return show_version()
 
@@ -182,11 +389,6 @@ def build_pages_nav_main(*args):
 
     output = core_build_nav_main(*new_args)
 
-    # do not display any private pages in menu even for sysadmins
-    pages_list = toolkit.get_action("ckanext_pages_list")(
-        None, {"order": True, "private": False}
-    )
-
     page_name = ""
     is_current_page = toolkit.get_endpoint() in (
         ("pages", "show"),
@@ -196,12 +398,8 @@ def build_pages_nav_main(*args):
     if is_current_page:
         page_name = toolkit.request.path.split("/")[-1]
 
-    for page in pages_list:
-        type_ = "blog" if page["page_type"] == "blog" else "pages"
-        name = quote(page["name"])
-        title = html_escape(page["title"])
-        link = toolkit.h.literal('<a href="/{}/{}">{}</a>'.format(type_, name, title))
-        if page["name"] == page_name:
+    for name, link in _get_pages_nav_links():
+        if name == page_name:
             li = (
                 toolkit.literal('<li class="active">') + link + toolkit.literal("</li>")
             )
@@ -212,19 +410,52 @@ def build_pages_nav_main(*args):
     return output
 
 
-def get_featured_datasets():
-    search_action = toolkit.get_action("package_search")
-    result = search_action(data_dict={"q": "featured:true", "rows": 5})
-    return result["results"]
+def invalidate_pages_nav_cache() -> None:
+    """Make all processes rebuild their cached links to pages on the next render"""
+    connect_to_redis().incr(_PAGES_NAV_VERSION_REDIS_KEY)
 
 
-def get_recently_modified_datasets():
-    search_action = toolkit.get_action("package_search")
-    result = search_action(data_dict={"sort": "metadata_modified desc", "rows": 5})
-    return result["results"]
+def _get_pages_nav_links() -> typing.List[typing.Tuple[str, str]]:
+    """Return the links to the public pages, as `(page_name, link)` tuples.
+
+    Links are cached per process, together with the version number that is stored in
+    redis at the time they are built. The version is bumped whenever a page is
+    updated or deleted, which makes each process rebuild its links.
+
+    """
+
+    version = connect_to_redis().get(_PAGES_NAV_VERSION_REDIS_KEY)
+    cached_version, cached_links = _pages_nav_cache.get("links", (None, None))
+    if cached_links is not None and cached_version == version:
+        result = cached_links
+    else:
+        # do not display any private pages in menu even for sysadmins
+        pages_list = toolkit.get_action("ckanext_pages_list")(
+            None, {"order": True, "private": False}
+        )
+        result = []
+        for page in pages_list:
+            type_ = "blog" if page["page_type"] == "blog" else "pages"
+            name = quote(page["name"])
+            title = html_escape(page["title"])
+            link = toolkit.h.literal(f'<a href="/{type_}/{name}">{title}</a>')
+            result.append((page["name"], link))
+        _pages_nav_cache["links"] = (version, result)
+    return result
+
+
+def get_featured_datasets() -> typing.List[typing.Dict]:
+    return homepage.get_homepage_datasets()["featured"]
+
+
+def get_recently_modified_datasets() -> typing.List[typing.Dict]:
+    return homepage.get_homepage_datasets()["recent"]
 
 
 def _pad_geospatial_extent(extent: typing.Dict, padding: float) -> typing.Dict:
+    # shapely is only needed here, so it is not imported at module level
+    from shapely import geometry
+
     geom = geometry.shape(extent)
     padded = geom.buffer(padding, join_style=geometry.JOIN_STYLE.mitre)
     oriented_padded = geometry.polygon.orient(padded)
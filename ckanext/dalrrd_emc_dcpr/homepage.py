@@ -0,0 +1,130 @@
+"""Cache of the datasets shown on the homepage
+
+The homepage shows lists of featured and of recently modified datasets. Rather than
+searching Solr on each render, these lists are kept in redis as slim dataset cards,
+which contain only what the homepage needs to display. The lists are rebuilt by a
+background job whenever a change to a dataset might affect them. They also expire
+after a while, as a safety net against rebuild jobs that fail or get lost.
+
+"""
+
+import json
+import logging
+import typing
+
+from ckan.lib.redis import connect_to_redis
+from ckan.plugins import toolkit
+
+logger = logging.getLogger(__name__)
+
+NUM_HOMEPAGE_DATASETS = 5
+
+_HOMEPAGE_DATASETS_REDIS_KEY = "ckanext.dalrrd_emc_dcpr.homepage_datasets"
+_HOMEPAGE_DATASETS_TTL_SECONDS = 60 * 60
+_REBUILD_SCHEDULED_REDIS_KEY = "ckanext.dalrrd_emc_dcpr.homepage_rebuild_scheduled"
+# safeguard for not blocking future rebuilds if a scheduled rebuild job is lost
+_REBUILD_SCHEDULED_TTL_SECONDS = 60 * 60
+_THUMBNAIL_FORMATS = ("png", "jpg", "jpeg", "gif", "webp")
+
+
+def get_homepage_datasets() -> typing.Dict[str, typing.List[typing.Dict]]:
+    """Return the cards of the featured and of the recently modified datasets.
+
+    Cards are rebuilt on the spot if they are not cached yet.
+
+    """
+
+    raw_cards = connect_to_redis().get(_HOMEPAGE_DATASETS_REDIS_KEY)
+    if raw_cards is not None:
+        result = json.loads(raw_cards)
+    else:
+        result = rebuild_homepage_datasets()
+    return result
+
+
+def rebuild_homepage_datasets() -> typing.Dict[str, typing.List[typing.Dict]]:
+    search_action = toolkit.get_action("package_search")
+    featured = search_action(
+        context={"ignore_auth": True},
+        data_dict={"q": "featured:true", "rows": NUM_HOMEPAGE_DATASETS},
+    )
+    recent = search_action(
+        context={"ignore_auth": True},
+        data_dict={
+            "sort": "metadata_modified desc",
+            "rows": NUM_HOMEPAGE_DATASETS,
+        },
+    )
+    result = {
+        "featured": [get_dataset_card(p) for p in featured["results"]],
+        "recent": [get_dataset_card(p) for p in recent["results"]],
+    }
+    connect_to_redis().set(
+        _HOMEPAGE_DATASETS_REDIS_KEY,
+        json.dumps(result),
+        ex=_HOMEPAGE_DATASETS_TTL_SECONDS,
+    )
+    return result
+
+
+def get_dataset_card(package: typing.Dict) -> typing.Dict:
+    organization = package.get("organization") or {}
+    thumbnail_url = None
+    for resource in package.get("resources", []):
+        if (resource.get("format") or "").lower() in _THUMBNAIL_FORMATS:
+            thumbnail_url = resource.get("url")
+            break
+    return {
+        "id": package["id"],
+        "name": package["name"],
+        "type": package.get("type", "dataset"),
+        "title": package.get("title"),
+        "notes": package.get("notes"),
+        "organization": {
+            "name": organization.get("name"),
+            "title": organization.get("title"),
+        },
+        "thumbnail_url": thumbnail_url,
+        "metadata_modified": package.get("metadata_modified"),
+    }
+
+
+def is_relevant_change(pkg_dict: typing.Dict) -> bool:
+    """Check whether a change to the input package might affect the homepage.
+
+    Changes to public packages always do, as the package becomes the most recently
+    modified one. Changes to other packages only do if they are currently shown,
+    e.g. when a featured package becomes private or is deleted.
+
+    """
+
+    is_public = (
+        not toolkit.asbool(pkg_dict.get("private", False))
+        and pkg_dict.get("state", "active") == "active"
+    )
+    if is_public:
+        result = True
+    else:
+        raw_cards = connect_to_redis().get(_HOMEPAGE_DATASETS_REDIS_KEY)
+        cards = json.loads(raw_cards) if raw_cards is not None else {}
+        shown_ids = {card["id"] for cards_ in cards.values() for card in cards_}
+        result = raw_cards is None or pkg_dict.get("id") in shown_ids
+    return result
+
+
+def mark_rebuild_as_scheduled() -> bool:
+    """Flag a rebuild as being scheduled.
+
+    Returns whether a rebuild job needs to be enqueued, which is only the case if
+    there is not one already waiting to be run.
+
+    """
+
+    scheduled = connect_to_redis().set(
+        _REBUILD_SCHEDULED_REDIS_KEY, "1", nx=True, ex=_REBUILD_SCHEDULED_TTL_SECONDS
+    )
+    return bool(scheduled)
+
+
+def clear_rebuild_scheduled_mark() -> None:
+    connect_to_redis().delete(_REBUILD_SCHEDULED_REDIS_KEY)
@@ -8,7 +8,9 @@ from ckan.plugins import toolkit
 
 from . import (
     email_notifications,
+    homepage,
     provide_request_context,
+    pycsw_catalogue,
 )
 from .constants import (
     DatasetManagementActivityType,
@@ -24,6 +26,32 @@ def test_job(*args, **kwargs):
     logger.debug(f"inside test_job - {args=} {kwargs=}")
 
 
+def refresh_pycsw_materialized_view():
+    refreshed = pycsw_catalogue.refresh_materialized_view_if_changed()
+    logger.debug(f"pycsw materialized view {'' if refreshed else 'not '}refreshed")
+
+
+def update_pycsw_document(package_id: str):
+    pycsw_catalogue.update_document(package_id)
+
+
+def update_pycsw_record(package_id: str):
+    pycsw_catalogue.update_document(package_id)
+    if pycsw_catalogue.records_table_exists():
+        pycsw_catalogue.update_record(package_id)
+    else:
+        logger.warning(
+            f"Table {pycsw_catalogue.PYCSW_RECORDS_TABLE_NAME!r} does not exist, "
+            f"skipping update of the pycsw record for package {package_id!r}..."
+        )
+
+
+def rebuild_homepage_datasets():
+    # changes made from this point on schedule a new rebuild job
+    homepage.clear_rebuild_scheduled_mark()
+    homepage.rebuild_homepage_datasets()
+
+
 @provide_request_context
 def notify_dcpr_actors_of_relevant_status_change(context, activity_id: str):
     activity_obj = model.Activity.get(activity_id)
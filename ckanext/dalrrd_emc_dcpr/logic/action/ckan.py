@@ -1,11 +1,19 @@
 """Override of CKAN actions"""
 
+import json
 import logging
 import typing
 
 import ckan.plugins.toolkit as toolkit
 from ckan.model.domain_object import DomainObject
 
+from ... import helpers
+from ...constants import (
+    DERIVED_SPATIAL_FIELD_NAMES,
+    HARVESTED_CONTENT_HASH_FIELD_NAME,
+    HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY,
+)
+from .. import converters
 from ...model.user_extra_fields import UserExtraFields
 
 logger = logging.getLogger(__name__)
@@ -89,24 +97,92 @@ def package_create(original_action, context, data_dict):
     Intercepts the core `package_create` action to check if package
      is being published after being created.
     """
-    return _act_depending_on_package_visibility(original_action, context, data_dict)
+    return _act_depending_on_package_visibility(
+        original_action, context, _add_derived_spatial_fields(data_dict)
+    )
 
 
 @toolkit.chained_action
 def package_update(original_action, context, data_dict):
     """
     Intercepts the core `package_update` action to check if package is being published.
+
+    Updates made by the harvester to packages whose content has not changed since
+    they were last harvested are skipped altogether, which means there is no DB write
+    and no reindexing of the package.
     """
     logger.debug(f"inside package_update action: {data_dict=}")
-    return _act_depending_on_package_visibility(original_action, context, data_dict)
+    toolkit.check_access("package_update", context, data_dict)
+    if _is_unchanged_harvested_package(context, data_dict):
+        logger.debug(
+            f"Harvested content of package {data_dict['id']!r} is unchanged, "
+            f"skipping update..."
+        )
+        if context.get("return_id_only", False):
+            result = data_dict["id"]
+        else:
+            show_context = {
+                "model": context["model"],
+                "session": context["session"],
+                "user": context["user"],
+            }
+            result = toolkit.get_action("package_show")(
+                show_context, data_dict={"id": data_dict["id"]}
+            )
+    else:
+        result = _act_depending_on_package_visibility(
+            original_action, context, _add_derived_spatial_fields(data_dict)
+        )
+    return result
 
 
 @toolkit.chained_action
 def package_patch(original_action, context, data_dict):
     """
     Intercepts the core `package_patch` action to check if package is being published.
+
+    The core action calls the core `package_update` action directly, which would
+    bypass our `package_update`. The patch is therefore applied over the current
+    package here and the result is passed to our `package_update`, which checks
+    whether the package is being published and adds the derived spatial fields.
     """
-    return _act_depending_on_package_visibility(original_action, context, data_dict)
+    toolkit.check_access("package_patch", context, data_dict)
+    show_context = {
+        "model": context["model"],
+        "session": context["session"],
+        "user": context["user"],
+        "auth_user_obj": context.get("auth_user_obj"),
+    }
+    package_dict = toolkit.get_action("package_show")(
+        show_context, data_dict={"id": toolkit.get_or_bust(data_dict, "id")}
+    )
+    patched = dict(package_dict)
+    patched.update(data_dict)
+    patched["id"] = package_dict["id"]
+    return toolkit.get_action("package_update")(context, patched)
+
+
+@toolkit.chained_action
+def tag_create(original_action, context, data_dict):
+    """
+    Intercepts the core `tag_create` action in order to refresh the cached tags of
+    vocabularies.
+    """
+    result = original_action(context, data_dict)
+    helpers.invalidate_vocabulary_cache()
+    return result
+
+
+@toolkit.chained_action
+def tag_delete(original_action, context, data_dict):
+    """
+    Intercepts the core `tag_delete` action in order to refresh the cached tags of
+    vocabularies, if the deleted tag belongs to one.
+    """
+    result = original_action(context, data_dict)
+    if data_dict.get("vocabulary_id") is not None:
+        helpers.invalidate_vocabulary_cache()
+    return result
 
 
 def user_patch(context: typing.Dict, data_dict: typing.Dict) -> typing.Dict:
@@ -138,6 +214,53 @@ def user_patch(context: typing.Dict, data_dict: typing.Dict) -> typing.Dict:
     return update_action(context, patched)
 
 
+def _is_unchanged_harvested_package(context: typing.Dict, data: typing.Dict) -> bool:
+    """Check whether the harvester is updating a package with unchanged content.
+
+    The hash is recomputed from the submitted data, rather than trusting the one it
+    includes, and compared with the hash of the last harvested content.
+
+    """
+
+    unhashed_fields = context.get(HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY)
+    if unhashed_fields is not None and data.get("id") is not None:
+        package = context["model"].Package.get(data["id"])
+    else:
+        package = None
+    if package is not None and package.state == context["model"].State.ACTIVE:
+        stored_hash = package.extras.get(HARVESTED_CONTENT_HASH_FIELD_NAME)
+        result = stored_hash == helpers.compute_harvested_content_hash(
+            data, unhashed_fields
+        )
+    else:
+        result = False
+    return result
+
+
+def _add_derived_spatial_fields(data: typing.Dict) -> typing.Dict:
+    """Add the numeric fields derived from the package's spatial extent.
+
+    Any values for these fields that are present in the input are discarded, as they
+    must always match the spatial extent. Invalid spatial extents are left alone, as
+    they are reported by the package validators later on.
+
+    """
+
+    try:
+        geojson = json.loads(converters.emc_bbox_converter(data["spatial"]))
+    except (KeyError, TypeError, AttributeError, toolkit.Invalid):
+        derived_fields = {}
+    else:
+        derived_fields = helpers.get_derived_spatial_fields(geojson)
+    result = {
+        key: value
+        for key, value in data.items()
+        if key not in DERIVED_SPATIAL_FIELD_NAMES
+    }
+    result.update(derived_fields)
+    return result
+
+
 def _act_depending_on_package_visibility(
     action: typing.Callable, context: typing.Dict, data: typing.Dict
 ):
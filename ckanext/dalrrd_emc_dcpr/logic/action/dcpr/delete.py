@@ -2,6 +2,7 @@ import logging
 
 from ckan.plugins import toolkit
 
+from .... import page_cache
 from ....constants import DcprManagementActivityType
 from ....model import dcpr_request
 from ...schema import delete_dcpr_request_schema
@@ -27,6 +28,7 @@ def dcpr_request_delete(context, data_dict):
     )
     model.Session.delete(request_obj)
     model.Session.commit()
+    page_cache.invalidate_page_cache()
     create_dcpr_management_activity(
         request_obj,
         activity_type=DcprManagementActivityType.DELETE_DCPR_REQUEST,
@@ -1,7 +1,9 @@
+import datetime as dt
 import logging
 import typing
 
 from ckan.plugins import toolkit
+from sqlalchemy import orm
 
 from ....model import dcpr_request
 from .... import dcpr_dictization
@@ -13,6 +15,15 @@ logger = logging.getLogger(__name__)
 
 @toolkit.side_effect_free
 def dcpr_request_show(context: typing.Dict, data_dict: typing.Dict) -> typing.Dict:
+    """Return a DCPR request.
+
+    Clients that already have a copy of the request can pass the `etag` of their
+    copy as `if_none_match`, or its `metadata_modified` as `if_modified_since`. If
+    the request has not been modified since, the response only includes the
+    request's id, `etag` and `metadata_modified`, together with `not_modified=True`.
+
+    """
+
     schema = show_dcpr_request_schema()
     validated_data, errors = toolkit.navl_validate(data_dict, schema, context)
     if errors:
@@ -21,7 +32,24 @@ def dcpr_request_show(context: typing.Dict, data_dict: typing.Dict) -> typing.Di
     request_object = dcpr_request.DCPRRequest.get(validated_data["csi_reference_id"])
     if not request_object:
         raise toolkit.ObjectNotFound
-    return dcpr_dictization.dcpr_request_dictize(request_object, context)
+    last_modified = request_object.metadata_modified or request_object.request_date
+    not_modified = _is_not_modified(
+        request_object.etag,
+        last_modified,
+        validated_data.get("if_none_match"),
+        validated_data.get("if_modified_since"),
+    )
+    if not_modified:
+        result = {
+            "csi_reference_id": request_object.csi_reference_id,
+            "not_modified": True,
+        }
+    else:
+        result = dcpr_dictization.dcpr_request_dictize(request_object, context)
+    result.update(
+        {"etag": request_object.etag, "metadata_modified": last_modified.isoformat()}
+    )
+    return result
 
 
 @toolkit.side_effect_free
@@ -116,7 +144,18 @@ def _get_dcpr_request_list(
     filter_=None,
 ) -> typing.List[typing.Dict]:
     data_ = data_dict if data_dict is not None else {}
-    query = context["model"].Session.query(dcpr_request.DCPRRequest)
+    # relationships used in dictization are loaded upfront, with one query each,
+    # rather than with one query per listed request
+    eager_loaded = [dcpr_request.DCPRRequest.datasets]
+    if context.get("dictize_for_ui", False):
+        eager_loaded.extend(
+            (dcpr_request.DCPRRequest.owner, dcpr_request.DCPRRequest.organization)
+        )
+    query = (
+        context["model"]
+        .Session.query(dcpr_request.DCPRRequest)
+        .options(*(orm.selectinload(relationship) for relationship in eager_loaded))
+    )
     if filter_ is not None:
         query = query.filter(filter_)
     query = (
@@ -131,3 +170,31 @@ def _get_dcpr_request_list(
         .offset(data_.get("offset", 0))
     )
     return [dcpr_dictization.dcpr_request_dictize(i, context) for i in query.all()]
+
+
+def _is_not_modified(
+    etag: str,
+    last_modified: dt.datetime,
+    if_none_match: typing.Optional[str],
+    if_modified_since: typing.Optional[dt.datetime],
+) -> bool:
+    """Evaluate the conditions of a conditional request.
+
+    As in HTTP, `if_none_match` is a comma-separated list of (possibly quoted)
+    ETags and it takes precedence over `if_modified_since`, which has a precision of
+    one second.
+
+    """
+
+    if if_none_match is not None:
+        candidates = set()
+        for raw_candidate in if_none_match.split(","):
+            candidate = raw_candidate.strip()
+            candidate = candidate[2:] if candidate.startswith("W/") else candidate
+            candidates.add(candidate.strip('"'))
+        result = etag in candidates or "*" in candidates
+    elif if_modified_since is not None:
+        result = last_modified.replace(microsecond=0) <= if_modified_since
+    else:
+        result = False
+    return result
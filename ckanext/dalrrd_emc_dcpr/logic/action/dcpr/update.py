@@ -4,7 +4,7 @@ import typing
 
 from ckan.plugins import toolkit
 
-from .... import jobs
+from .... import jobs, page_cache
 from ....constants import (
     DcprRequestModerationAction,
     DcprManagementActivityType,
@@ -202,6 +202,7 @@ def dcpr_request_nsif_moderate(
                 jobs.notify_dcpr_actors_of_relevant_status_change,
                 args=[activity["id"]],
             )
+            _invalidate_page_cache_if_public(request_obj)
             result = toolkit.get_action("dcpr_request_show")(context, validated_data)
     else:
         raise toolkit.ObjectNotFound
@@ -257,6 +258,7 @@ def dcpr_request_csi_moderate(
                 jobs.notify_dcpr_actors_of_relevant_status_change,
                 args=[activity["id"]],
             )
+            _invalidate_page_cache_if_public(request_obj)
             result = toolkit.get_action("dcpr_request_show")(context, validated_data)
     else:
         raise toolkit.ObjectNotFound
@@ -373,10 +375,23 @@ def _resign_reviewer(
     return toolkit.get_action("dcpr_request_show")(context, validated_data)
 
 
+def _invalidate_page_cache_if_public(
+    dcpr_request_obj: dcpr_request.DCPRRequest,
+) -> None:
+    """Invalidate the anonymous page cache if the DCPR request has become public"""
+    public_statuses = (
+        DCPRRequestStatus.ACCEPTED.value,
+        DCPRRequestStatus.REJECTED.value,
+    )
+    if dcpr_request_obj.status in public_statuses:
+        page_cache.invalidate_page_cache()
+
+
 def _update_dcpr_request_status(
     dcpr_request_obj: dcpr_request.DCPRRequest,
     transition_action: typing.Optional[DcprRequestModerationAction] = None,
 ) -> dcpr_request.DCPRRequest:
+    dcpr_request_obj.metadata_modified = dt.datetime.utcnow()
     current_status = DCPRRequestStatus(dcpr_request_obj.status)
     try:
         next_status = _determine_next_dcpr_request_status(
@@ -30,27 +30,71 @@ def show_version(
 def list_featured_datasets(
     context: typing.Dict,
     data_dict: typing.Optional[typing.Dict] = None,
-) -> typing.List:
+) -> typing.List[typing.Dict]:
+    """Return slim representations of the featured datasets.
+
+    Datasets are featured by means of their `featured` extra. The query is backed by a
+    partial index on the `package_extra` table, which only covers the extras of
+    featured datasets, and by an index on the `package` table that matches the
+    ordering of the results.
+
+    """
+
     toolkit.check_access("emc_authorize_list_featured_datasets", context, data_dict)
     data_ = data_dict.copy() if data_dict is not None else {}
-    include_private = data_.get("include_private", False)
-    limit = data_.get("limit", 10)
-    offset = data_.get("offset", 0)
+    include_private = toolkit.asbool(data_.get("include_private", False))
+    limit = toolkit.asint(data_.get("limit", 10))
+    offset = toolkit.asint(data_.get("offset", 0))
     model = context["model"]
+    package_table = model.package_table
+    extra_table = model.package_extra_table
+    group_table = model.group_table
+    conditions = [
+        extra_table.c.key == "featured",
+        sqlalchemy.func.lower(extra_table.c.value) == "true",
+        extra_table.c.state == "active",
+        package_table.c.state == "active",
+    ]
+    if not include_private:
+        conditions.append(package_table.c.private.is_(False))
     query = (
-        sqlalchemy.select([model.package_table.c.name])
-        .select_from(model.package_table.join(model.package_extra_table))
-        .where(
-            sqlalchemy.and_(
-                model.package_extra_table.c.featured == "true",
-                model.package_table.c.state == "active",
-                model.package_table.c.private == include_private,
-            )
+        sqlalchemy.select(
+            [
+                package_table.c.id,
+                package_table.c.name,
+                package_table.c.title,
+                package_table.c.private,
+                package_table.c.metadata_modified,
+                group_table.c.name.label("organization_name"),
+                group_table.c.title.label("organization_title"),
+            ]
+        )
+        .select_from(
+            package_table.join(
+                extra_table, extra_table.c.package_id == package_table.c.id
+            ).outerjoin(group_table, group_table.c.id == package_table.c.owner_org)
         )
+        .where(sqlalchemy.and_(*conditions))
+        .order_by(package_table.c.metadata_modified.desc(), package_table.c.id)
         .limit(limit)
         .offset(offset)
     )
-    return [r for r in query.execute()]
+    result = []
+    for row in context["session"].execute(query):
+        result.append(
+            {
+                "id": row.id,
+                "name": row.name,
+                "title": row.title,
+                "private": row.private,
+                "metadata_modified": row.metadata_modified.isoformat(),
+                "organization": {
+                    "name": row.organization_name,
+                    "title": row.organization_title,
+                },
+            }
+        )
+    return result
 
 
 def request_dataset_maintenance(context: typing.Dict, data_dict: typing.Dict):
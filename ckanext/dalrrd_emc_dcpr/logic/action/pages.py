@@ -0,0 +1,43 @@
+"""Override of ckanext-pages actions"""
+
+import logging
+
+import ckan.plugins.toolkit as toolkit
+
+from ... import helpers, page_cache
+
+logger = logging.getLogger(__name__)
+
+
+@toolkit.chained_action
+def ckanext_pages_update(original_action, context, data_dict):
+    """
+    Intercepts the ckanext-pages `ckanext_pages_update` action in order to refresh the
+    pages shown in the main navigation menu.
+
+    This action is also used by ckanext-pages for creating new pages.
+
+    """
+
+    result = original_action(context, data_dict)
+    helpers.invalidate_pages_nav_cache()
+    # links to pages are shown in the navigation menu of every cached page. The
+    # original action has already committed the change
+    page_cache.invalidate_page_cache()
+    return result
+
+
+@toolkit.chained_action
+def ckanext_pages_delete(original_action, context, data_dict):
+    """
+    Intercepts the ckanext-pages `ckanext_pages_delete` action in order to refresh the
+    pages shown in the main navigation menu.
+
+    """
+
+    result = original_action(context, data_dict)
+    helpers.invalidate_pages_nav_cache()
+    # links to pages are shown in the navigation menu of every cached page. The
+    # original action has already committed the change
+    page_cache.invalidate_page_cache()
+    return result
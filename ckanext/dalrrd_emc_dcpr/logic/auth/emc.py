@@ -6,10 +6,18 @@ from ckan.plugins import toolkit
 logger = logging.getLogger(__name__)
 
 
+@toolkit.auth_allow_anonymous_access
 def authorize_list_featured_datasets(
     context: typing.Dict, data_dict: typing.Optional[typing.Dict]
 ) -> typing.Dict:
-    return {"success": True}
+    """Anyone can list featured datasets, but only sysadmins can include private ones
+
+    Sysadmins bypass this function.
+
+    """
+
+    include_private = toolkit.asbool((data_dict or {}).get("include_private", False))
+    return {"success": not include_private}
 
 
 def authorize_request_dataset_maintenance(
@@ -28,6 +36,13 @@ def authorize_request_dataset_publication(
     }
 
 
+def authorize_show_metrics(
+    context: typing.Dict, data_dict: typing.Optional[typing.Dict]
+) -> typing.Dict:
+    """Only sysadmins are allowed to see metrics - they bypass this function"""
+    return {"success": False}
+
+
 def _is_dataset_editor(user_obj, dataset_id: str):
     """Checks if current user is an editor of the same org where dataset belongs."""
     dataset = toolkit.get_action("package_show")(data_dict={"id": dataset_id})
@@ -2,8 +2,14 @@ from ckan.logic.schema import validator_args
 
 
 @validator_args
-def show_dcpr_request_schema(not_missing, not_empty, unicode_safe):
-    return {"csi_reference_id": [not_missing, not_empty, unicode_safe]}
+def show_dcpr_request_schema(
+    not_missing, not_empty, unicode_safe, ignore_missing, isodate
+):
+    return {
+        "csi_reference_id": [not_missing, not_empty, unicode_safe],
+        "if_none_match": [ignore_missing, unicode_safe],
+        "if_modified_since": [ignore_missing, isodate],
+    }
 
 
 @validator_args
@@ -68,7 +74,7 @@ def update_dcpr_request_by_owner_schema(
         "spatial_resolution": [ignore_missing, unicode_safe],
         "data_capture_urgency": [ignore_missing, unicode_safe],
         "additional_documents": [unicode_safe, ignore_missing],
-        "datasets": create_dcpr_request_dataset_schema(),
+        "datasets": update_dcpr_request_dataset_schema(),
     }
 
 
@@ -150,6 +156,20 @@ def create_dcpr_request_dataset_schema(
     }
 
 
+@validator_args
+def update_dcpr_request_dataset_schema(ignore_missing, unicode_safe):
+    """Schema for the datasets of an updated DCPR request.
+
+    Datasets that already exist keep their `dataset_id`, which is used for matching
+    them to the stored datasets.
+
+    """
+
+    schema = create_dcpr_request_dataset_schema()
+    schema["dataset_id"] = [ignore_missing, unicode_safe]
+    return schema
+
+
 @validator_args
 def claim_reviewer_schema():
     return show_dcpr_request_schema()
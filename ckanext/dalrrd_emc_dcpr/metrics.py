@@ -0,0 +1,166 @@
+"""Opt-in instrumentation of the actions and auth functions registered by the plugin
+
+Enable it by setting `ckan.dalrrd_emc_dcpr.metrics.enabled = true` in the CKAN ini
+file. When enabled, each of the plugin's actions and auth functions is wrapped in
+order to record:
+
+- how many times it has been called
+- a histogram of how long each call took
+- how many SQL queries have been issued during its calls, as counted by the
+  `query_counter` module
+
+Metrics are exposed in the Prometheus text format by the `/emc/metrics` endpoint.
+They are kept in memory and are thus per-process - each web worker reports its own
+values.
+
+When disabled, functions are not wrapped at all, so there is no overhead.
+
+"""
+
+import functools
+import logging
+import math
+import threading
+import time
+import typing
+
+from ckan.plugins import toolkit
+
+from . import query_counter
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BUCKETS: typing.Final[typing.Tuple[float, ...]] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    math.inf,
+)
+
+
+class _FunctionMetrics:
+    def __init__(self):
+        self.num_calls = 0
+        self.total_seconds = 0.0
+        self.num_queries = 0
+        self.bucket_counts = [0] * len(HISTOGRAM_BUCKETS)
+
+    def observe(self, seconds: float, num_queries: int) -> None:
+        self.num_calls += 1
+        self.total_seconds += seconds
+        self.num_queries += num_queries
+        for index, upper_bound in enumerate(HISTOGRAM_BUCKETS):
+            if seconds <= upper_bound:
+                self.bucket_counts[index] += 1
+                break
+
+
+_metrics: typing.Dict[typing.Tuple[str, str], _FunctionMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def metrics_enabled() -> bool:
+    return toolkit.asbool(
+        toolkit.config.get("ckan.dalrrd_emc_dcpr.metrics.enabled", False)
+    )
+
+
+def instrument_functions(
+    kind: str, functions: typing.Dict[str, typing.Callable]
+) -> typing.Dict[str, typing.Callable]:
+    """Wrap the input functions, if metrics are enabled.
+
+    `kind` is used to tell apart actions from auth functions in the generated
+    metrics.
+
+    """
+
+    if metrics_enabled():
+        query_counter.register_listener()
+        result = {
+            name: _instrument(kind, name, function)
+            for name, function in functions.items()
+        }
+    else:
+        result = functions
+    return result
+
+
+def render_prometheus_metrics() -> str:
+    with _metrics_lock:
+        snapshot = {
+            key: (
+                metrics.num_calls,
+                metrics.total_seconds,
+                metrics.num_queries,
+                list(metrics.bucket_counts),
+            )
+            for key, metrics in _metrics.items()
+        }
+    calls_lines = [
+        "# HELP emc_calls_total Number of calls",
+        "# TYPE emc_calls_total counter",
+    ]
+    duration_lines = [
+        "# HELP emc_call_duration_seconds Duration of calls",
+        "# TYPE emc_call_duration_seconds histogram",
+    ]
+    queries_lines = [
+        "# HELP emc_sql_queries_total Number of SQL queries issued during calls",
+        "# TYPE emc_sql_queries_total counter",
+    ]
+    for (kind, name), (num_calls, total_seconds, num_queries, buckets) in sorted(
+        snapshot.items()
+    ):
+        labels = f'kind="{kind}",name="{name}"'
+        calls_lines.append(f"emc_calls_total{{{labels}}} {num_calls}")
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(HISTOGRAM_BUCKETS, buckets):
+            cumulative_count += bucket_count
+            le = "+Inf" if math.isinf(upper_bound) else str(upper_bound)
+            duration_lines.append(
+                f'emc_call_duration_seconds_bucket{{{labels},le="{le}"}} '
+                f"{cumulative_count}"
+            )
+        duration_lines.append(
+            f"emc_call_duration_seconds_sum{{{labels}}} {total_seconds}"
+        )
+        duration_lines.append(
+            f"emc_call_duration_seconds_count{{{labels}}} {num_calls}"
+        )
+        queries_lines.append(f"emc_sql_queries_total{{{labels}}} {num_queries}")
+    return "\n".join(calls_lines + duration_lines + queries_lines) + "\n"
+
+
+def _instrument(kind: str, name: str, function: typing.Callable) -> typing.Callable:
+    # functools.wraps also copies the function's attributes, which means CKAN still
+    # recognizes chained actions and auth functions, side-effect free actions, etc.
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start_queries = query_counter.get_num_queries()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _observe(
+                kind,
+                name,
+                time.perf_counter() - start,
+                query_counter.get_num_queries() - start_queries,
+            )
+
+    return wrapper
+
+
+def _observe(kind: str, name: str, seconds: float, num_queries: int) -> None:
+    with _metrics_lock:
+        metrics = _metrics.setdefault((kind, name), _FunctionMetrics())
+        metrics.observe(seconds, num_queries)
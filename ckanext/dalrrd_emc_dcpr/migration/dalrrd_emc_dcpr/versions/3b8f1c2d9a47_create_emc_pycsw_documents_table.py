@@ -0,0 +1,43 @@
+"""create emc pycsw documents table
+
+Revision ID: 3b8f1c2d9a47
+Revises: e996e739c44c
+Create Date: 2022-05-09 10:12:41.503318
+
+"""
+import datetime as dt
+
+from alembic import op
+import sqlalchemy as sa
+
+from sqlalchemy import types, ForeignKey
+from ckan.model import meta
+
+
+# revision identifiers, used by Alembic.
+revision = "3b8f1c2d9a47"
+down_revision = "e996e739c44c"
+branch_labels = None
+depends_on = None
+
+_TABLE_NAME = "emc_pycsw_documents"
+
+
+def upgrade():
+    op.create_table(
+        _TABLE_NAME,
+        meta.metadata,
+        sa.Column(
+            "package_id",
+            types.UnicodeText,
+            ForeignKey("package.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("xml", types.UnicodeText),
+        sa.Column("links", types.UnicodeText),
+        sa.Column("rendered_at", types.DateTime, default=dt.datetime.utcnow),
+    )
+
+
+def downgrade():
+    op.drop_table(_TABLE_NAME)
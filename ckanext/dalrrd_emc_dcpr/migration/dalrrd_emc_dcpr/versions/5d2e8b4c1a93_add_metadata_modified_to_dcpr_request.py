@@ -0,0 +1,32 @@
+"""add metadata_modified to dcpr request
+
+Revision ID: 5d2e8b4c1a93
+Revises: 7c1e5a9b3f20
+Create Date: 2022-05-18 14:12:53.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5d2e8b4c1a93"
+down_revision = "7c1e5a9b3f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "dcpr_request", sa.Column("metadata_modified", sa.DateTime, nullable=True)
+    )
+    # existing requests get the most recent of their known dates
+    op.execute(
+        "UPDATE dcpr_request SET metadata_modified = coalesce("
+        "greatest(request_date, submission_date, nsif_review_date, "
+        "csi_moderation_date), now() AT TIME ZONE 'utc')"
+    )
+
+
+def downgrade():
+    op.drop_column("dcpr_request", "metadata_modified")
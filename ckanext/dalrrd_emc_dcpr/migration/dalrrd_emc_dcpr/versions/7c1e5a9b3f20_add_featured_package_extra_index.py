@@ -0,0 +1,33 @@
+"""add featured package extra index
+
+Revision ID: 7c1e5a9b3f20
+Revises: 3b8f1c2d9a47
+Create Date: 2022-05-16 09:41:27.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7c1e5a9b3f20"
+down_revision = "3b8f1c2d9a47"
+branch_labels = None
+depends_on = None
+
+_INDEX_NAME = "idx_package_extra_featured"
+
+
+def upgrade():
+    op.create_index(
+        _INDEX_NAME,
+        "package_extra",
+        ["package_id"],
+        postgresql_where=sa.text(
+            "key = 'featured' AND lower(value) = 'true' AND state = 'active'"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_index(_INDEX_NAME, table_name="package_extra")
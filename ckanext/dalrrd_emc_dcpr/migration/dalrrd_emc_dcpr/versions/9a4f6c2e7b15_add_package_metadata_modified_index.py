@@ -0,0 +1,33 @@
+"""add package metadata_modified index
+
+Revision ID: 9a4f6c2e7b15
+Revises: 5d2e8b4c1a93
+Create Date: 2022-05-20 10:17:42.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9a4f6c2e7b15"
+down_revision = "5d2e8b4c1a93"
+branch_labels = None
+depends_on = None
+
+_INDEX_NAME = "idx_package_active_metadata_modified"
+
+
+def upgrade():
+    # matches the ordering of the featured datasets list, such that the most
+    # recently modified featured datasets can be read without sorting them all
+    op.create_index(
+        _INDEX_NAME,
+        "package",
+        [sa.text("metadata_modified DESC"), "id"],
+        postgresql_where=sa.text("state = 'active'"),
+    )
+
+
+def downgrade():
+    op.drop_index(_INDEX_NAME, table_name="package")
@@ -1,5 +1,6 @@
 import datetime
 import enum
+import hashlib
 from typing import Optional
 
 from logging import getLogger
@@ -63,6 +64,12 @@ dcpr_request_table = Table(
     Column("csi_moderation_notes", types.UnicodeText),
     Column("csi_moderation_additional_documents", types.UnicodeText),
     Column("csi_moderation_date", types.DateTime),
+    Column(
+        "metadata_modified",
+        types.DateTime,
+        default=datetime.datetime.utcnow,
+        nullable=True,
+    ),
 )
 
 dcpr_request_dataset_table = Table(
@@ -226,6 +233,13 @@ class DCPRRequest(model.core.StatefulObjectMixin, model.domain_object.DomainObje
         query = model.meta.Session.query(cls)
         return query.get(csi_reference_id)
 
+    @property
+    def etag(self) -> str:
+        """An identifier of the current version of the request, usable as an ETag"""
+        last_modified = self.metadata_modified or self.request_date
+        version = f"{self.csi_reference_id}:{last_modified.isoformat()}"
+        return hashlib.sha1(version.encode("utf-8")).hexdigest()
+
     #
     # def get_dataset_elements(self) -> Optional[DCPRRequestDataset]:
     #     datasets = (
@@ -0,0 +1,169 @@
+"""Caching of whole pages served to anonymous users
+
+Anonymous users all get the same version of public pages like the homepage, the
+dataset search and the list of public DCPR requests. When this cache is enabled, the
+responses of anonymous GET requests for these pages are stored in redis, keyed by
+language, path and normalized query string, and are served from there on subsequent
+requests, thus skipping the Solr and DB queries needed for rendering them.
+
+Enable it by setting `ckan.dalrrd_emc_dcpr.anonymous_page_cache.enabled = true` in the
+CKAN ini file. Other relevant settings are:
+
+- `ckan.dalrrd_emc_dcpr.anonymous_page_cache.ttl` - how many seconds a page is
+  cached for (default: 300)
+- `ckan.dalrrd_emc_dcpr.anonymous_page_cache.paths` - space-separated list of the
+  paths of the pages that are cached (default: `/ /dataset /dcpr`)
+
+All cached pages are invalidated whenever a dataset changes, a DCPR request becomes
+public or the pages shown in the navigation menu change. Invalidation happens only
+once the change is committed and indexed. Cached pages are tied to a version number,
+which is stored in redis and gets bumped on invalidation, which means outdated pages
+are never served again and just expire.
+
+Responses carry an `ETag` header and are marked as publicly cacheable but needing
+revalidation, which lets clients and crawlers do conditional requests that are
+answered with a `304 Not Modified` response.
+
+"""
+
+import hashlib
+import json
+import logging
+import typing
+from urllib.parse import urlencode
+
+import flask
+from ckan.lib.redis import connect_to_redis
+from ckan.plugins import toolkit
+
+logger = logging.getLogger(__name__)
+
+_VERSION_REDIS_KEY = "ckanext.dalrrd_emc_dcpr.page_cache_version"
+_PAGE_REDIS_KEY_PREFIX = "ckanext.dalrrd_emc_dcpr.page_cache"
+_CACHE_STATUS_HEADER = "X-EMC-Page-Cache"
+
+
+def page_cache_enabled() -> bool:
+    return toolkit.asbool(
+        toolkit.config.get("ckan.dalrrd_emc_dcpr.anonymous_page_cache.enabled", False)
+    )
+
+
+def register_request_hooks(app: flask.Flask) -> None:
+    """Serve and store the pages of anonymous requests handled by the input app"""
+    ttl_seconds = toolkit.asint(
+        toolkit.config.get("ckan.dalrrd_emc_dcpr.anonymous_page_cache.ttl", 300)
+    )
+    cached_paths = {
+        _normalize_path(path)
+        for path in toolkit.aslist(
+            toolkit.config.get(
+                "ckan.dalrrd_emc_dcpr.anonymous_page_cache.paths", "/ /dataset /dcpr"
+            )
+        )
+    }
+
+    @app.before_request
+    def serve_cached_page():
+        result = None
+        if _is_cacheable_request(cached_paths):
+            # the key is kept for storing the page after it is rendered. This means
+            # pages rendered while the cache is being invalidated are stored with the
+            # old version and are never served
+            cache_key = _get_current_cache_key()
+            raw_page = connect_to_redis().get(cache_key)
+            if raw_page is not None:
+                page = json.loads(raw_page)
+                response = flask.Response(
+                    page["body"], content_type=page["content_type"]
+                )
+                response.headers[_CACHE_STATUS_HEADER] = "HIT"
+                result = _make_conditional(response, page["etag"])
+            else:
+                flask.g.emc_page_cache_key = cache_key
+        return result
+
+    @app.after_request
+    def store_page(response: flask.Response):
+        result = response
+        cache_key = flask.g.pop("emc_page_cache_key", None)
+        if cache_key is not None and _is_cacheable_response(response):
+            body = response.get_data(as_text=True)
+            etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+            page = {"body": body, "content_type": response.content_type, "etag": etag}
+            connect_to_redis().set(cache_key, json.dumps(page), ex=ttl_seconds)
+            response.headers[_CACHE_STATUS_HEADER] = "MISS"
+            result = _make_conditional(response, etag)
+        return result
+
+
+def invalidate_page_cache() -> None:
+    """Make sure no page that is currently cached is served again"""
+    if page_cache_enabled():
+        connect_to_redis().incr(_VERSION_REDIS_KEY)
+
+
+def get_cache_key(
+    version: typing.Optional[bytes],
+    language: str,
+    path: str,
+    args: typing.Iterable[typing.Tuple],
+) -> str:
+    """Return the redis key of a page.
+
+    Query string parameters are sorted and empty ones are dropped, such that
+    equivalent query strings map to the same page.
+
+    The language is part of the key because CKAN strips the locale prefix from the
+    URL before the request reaches flask, which means the same path is used for all
+    the translations of a page.
+
+    """
+
+    query_string = urlencode(sorted((k, v) for k, v in args if v != ""))
+    digest = hashlib.sha1(
+        f"{_normalize_path(path)}?{query_string}".encode("utf-8")
+    ).hexdigest()
+    return f"{_PAGE_REDIS_KEY_PREFIX}:{int(version or 0)}:{language}:{digest}"
+
+
+def _get_current_cache_key() -> str:
+    return get_cache_key(
+        connect_to_redis().get(_VERSION_REDIS_KEY),
+        flask.request.environ.get(
+            "CKAN_LANG", toolkit.config.get("ckan.locale_default", "en")
+        ),
+        flask.request.path,
+        flask.request.args.items(multi=True),
+    )
+
+
+def _is_cacheable_request(cached_paths: typing.Set[str]) -> bool:
+    return (
+        flask.request.method == "GET"
+        and _normalize_path(flask.request.path) in cached_paths
+        and not flask.g.get("user")
+        and "Authorization" not in flask.request.headers
+        and not flask.session.get("_flashes")
+    )
+
+
+def _is_cacheable_response(response: flask.Response) -> bool:
+    return (
+        response.status_code == 200
+        and response.mimetype == "text/html"
+        and not response.direct_passthrough
+        and "Set-Cookie" not in response.headers
+    )
+
+
+def _make_conditional(response: flask.Response, etag: str) -> flask.Response:
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 0
+    response.cache_control.must_revalidate = True
+    return response.make_conditional(flask.request)
+
+
+def _normalize_path(path: str) -> str:
+    return path.rstrip("/") or "/"
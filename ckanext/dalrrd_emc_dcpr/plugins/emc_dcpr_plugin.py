@@ -1,3 +1,4 @@
+import json
 import logging
 import typing
 from collections import OrderedDict
@@ -5,32 +6,42 @@ from functools import partial
 
 import ckan.plugins as plugins
 import ckan.lib.helpers as h
+import ckan.lib.jobs as ckan_jobs
 import ckan.lib.search as search
 
 import ckan.plugins.toolkit as toolkit
+import dataclasses
 import datetime as dt
 import dateutil.parser
+import pysolr
+from dateutil.relativedelta import relativedelta
 from ckan import model
 from ckan.common import _, g
-from flask import Blueprint
+from flask import Blueprint, Flask
 from sqlalchemy import orm
 
 from ckanext.harvest.utils import DATASET_TYPE_NAME as HARVEST_DATASET_TYPE_NAME
 
 from .. import (
+    after_commit,
     constants,
     helpers,
+    homepage,
+    jobs,
+    metrics,
+    page_cache,
+    pycsw_catalogue,
+    query_counter,
 )
 from ..blueprints.dcpr import dcpr_blueprint
 from ..blueprints.emc import emc_blueprint
-from ..cli import commands
-from ..cli.legacy_sasdi import commands as legacy_sasdi_commands
 from ..logic.action import ckan as ckan_actions
 from ..logic.action.dcpr import create as dcpr_create_actions
 from ..logic.action.dcpr import delete as dcpr_delete_actions
 from ..logic.action.dcpr import get as dcpr_get_actions
 from ..logic.action.dcpr import update as dcpr_update_actions
 from ..logic.action import emc as emc_actions
+from ..logic.action import pages as ckanext_pages_actions
 from ..logic import (
     converters,
     validators,
@@ -43,6 +54,10 @@ from ..model.user_extra_fields import UserExtraFields
 
 logger = logging.getLogger(__name__)
 
+_REFERENCE_DATE_HISTOGRAM_DEFAULT_START = "1900-01-01T00:00:00Z"
+# parameters of CKAN's package search that are relevant for which datasets match
+_FORWARDED_SEARCH_PARAMS = ("q", "defType", "qf", "mm", "tie", "df", "q.op")
+
 
 class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
     plugins.implements(plugins.IActions)
@@ -56,6 +71,7 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
     plugins.implements(plugins.IBlueprint)
     plugins.implements(plugins.IFacets)
     plugins.implements(plugins.IPluginObserver)
+    plugins.implements(plugins.IMiddleware, inherit=True)
 
     def before_load(self, plugin_class):
         """IPluginObserver interface requires reimplementation of this method."""
@@ -85,12 +101,27 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
         """IPluginObserver interface requires reimplementation of this method."""
         pass
 
+    def make_middleware(self, app, config):
+        """Count the SQL queries of each request and cache anonymous pages, if enabled"""
+        if isinstance(app, Flask):
+            if query_counter.query_counter_enabled():
+                query_counter.register_request_hooks(app)
+            if page_cache.page_cache_enabled():
+                page_cache.register_request_hooks(app)
+        return app
+
     def after_create(self, context, pkg_dict):
         """IPackageController interface requires reimplementation of this method."""
+        _enqueue_pycsw_record_update(pkg_dict)
+        _enqueue_homepage_datasets_rebuild(pkg_dict)
+        _invalidate_page_cache()
         return context, pkg_dict
 
     def after_delete(self, context, pkg_dict):
         """IPackageController interface requires reimplementation of this method."""
+        _enqueue_pycsw_record_update(pkg_dict)
+        _enqueue_homepage_datasets_rebuild(pkg_dict)
+        _invalidate_page_cache()
         return context, pkg_dict
 
     def after_search(self, search_results, search_params):
@@ -113,50 +144,24 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
         for plugin in plugins.PluginImplementations(plugins.IFacets):
             facets = plugin.dataset_facets(facets, "dataset")
 
-        data_dict = {
-            "fq": "",
-            "facet.field": list(facets.keys()),
-        }
-
-        if not getattr(g, "user", None):
-            data_dict["fq"] = "+capacity:public " + data_dict["fq"]
-
-        query = search.query_for(model.Package)
-        query.run(data_dict, permission_labels=None)
-
-        facets = query.facets
-
-        # organizations in the current search's facets.
-        group_names = []
-        for field_name in ("groups", "organization"):
-            group_names.extend(facets.get(field_name, {}).keys())
-
-        groups = (
-            model.Session.query(model.Group.name, model.Group.title)
-            .filter(model.Group.name.in_(group_names))
-            .all()
-            if group_names
-            else []
+        fq = "" if getattr(g, "user", None) else "+capacity:public"
+        extras = search_params.get("extras", {})
+        start_date = extras.get("ext_start_reference_date")
+        end_date = extras.get("ext_end_reference_date")
+        histogram_range = _get_reference_date_histogram_range(
+            _parse_date(start_date) if start_date else None,
+            _parse_date(end_date) if end_date else None,
         )
-        group_titles_by_name = dict(groups)
-
-        restructured_facets = {}
-        for key, value in facets.items():
-            restructured_facets[key] = {"title": key, "items": []}
-            for key_, value_ in value.items():
-                new_facet_dict = {"name": key_}
-                if key in ("groups", "organization"):
-                    display_name = group_titles_by_name.get(key_, key_)
-                    display_name = (
-                        display_name if display_name and display_name.strip() else key_
-                    )
-                    new_facet_dict["display_name"] = display_name
-                else:
-                    new_facet_dict["display_name"] = key_
-                new_facet_dict["count"] = value_
-                restructured_facets[key]["items"].append(new_facet_dict)
-        search_results["search_facets"] = restructured_facets
-
+        try:
+            facets, reference_date_counts = _run_facet_query(
+                search_params, fq, list(facets.keys()), histogram_range
+            )
+        except pysolr.SolrError:
+            logger.exception("Could not retrieve search facets, using CKAN's own")
+        else:
+            search_results["search_facets"] = _build_search_facets(
+                facets, reference_date_counts, histogram_range
+            )
         return search_results
 
     def after_show(self, context, pkg_dict):
@@ -165,10 +170,29 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
 
     def after_update(self, context, pkg_dict):
         """IPackageController interface requires reimplementation of this method."""
+        _enqueue_pycsw_record_update(pkg_dict)
+        _enqueue_homepage_datasets_rebuild(pkg_dict)
+        _invalidate_page_cache()
         return context, pkg_dict
 
     def before_index(self, pkg_dict):
-        """IPackageController interface requires reimplementation of this method."""
+        """Index the numeric fields derived from the dataset's spatial extent.
+
+        These are always recomputed from the spatial extent, which means they get
+        indexed with the correct type even for datasets that were saved before the
+        fields were being stored as extras.
+
+        """
+
+        try:
+            geojson = json.loads(pkg_dict["spatial"])
+        except (KeyError, TypeError, json.JSONDecodeError):
+            derived_fields = {}
+        else:
+            derived_fields = helpers.get_derived_spatial_fields(geojson)
+        for field_name in constants.DERIVED_SPATIAL_FIELD_NAMES:
+            pkg_dict.pop(field_name, None)
+        pkg_dict.update(derived_fields)
         return pkg_dict
 
     def before_search(self, search_params: typing.Dict):
@@ -177,8 +201,11 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
         if start_date is not None or end_date is not None:
             parsed_start = _parse_date(start_date) if start_date else start_date
             parsed_end = _parse_date(end_date) if end_date else end_date
+            # the end date is inclusive, which means the range stops right before
+            # the start of the following day
             temporal_query = (
-                f"reference_date:[{parsed_start or '*'} TO {parsed_end or '*'}]"
+                f"reference_date:[{parsed_start or '*'} TO "
+                f"{parsed_end + '/DAY+1DAY' if parsed_end else '*'}}}"
             )
             filter_query = " ".join((search_params["fq"], temporal_query))
             search_params["fq"] = filter_query
@@ -207,8 +234,16 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
         toolkit.add_template_directory(config_, "../templates")
         toolkit.add_public_directory(config_, "../public")
         toolkit.add_resource("../assets", "ckanext-dalrrdemcdcpr")
+        helpers.configure_spatial_defaults(
+            config_.get("ckan.dalrrd_emc_dcpr.default_spatial_search_extent")
+        )
 
     def get_commands(self):
+        # CLI modules pull in many heavy libraries that web workers do not need, so
+        # they are only imported when CKAN asks for the commands
+        from ..cli import commands
+        from ..cli.legacy_sasdi import commands as legacy_sasdi_commands
+
         return [
             commands.dalrrd_emc_dcpr,
             legacy_sasdi_commands.legacy_sasdi,
@@ -216,7 +251,7 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
         ]
 
     def get_auth_functions(self) -> typing.Dict[str, typing.Callable]:
-        return {
+        auth_functions = {
             "package_publish": ckan_auth.authorize_package_publish,
             "package_update": ckan_auth.package_update,
             "package_patch": ckan_auth.package_patch,
@@ -247,16 +282,21 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
             "ckanext_pages_update": ckanext_pages_auth.authorize_edit_page,
             "ckanext_pages_delete": ckanext_pages_auth.authorize_delete_page,
             "ckanext_pages_show": ckanext_pages_auth.authorize_show_page,
+            "emc_authorize_list_featured_datasets": (
+                emc_auth.authorize_list_featured_datasets
+            ),
             "emc_request_dataset_maintenance": (
                 emc_auth.authorize_request_dataset_maintenance
             ),
             "emc_request_dataset_publication": (
                 emc_auth.authorize_request_dataset_publication
             ),
+            "emc_show_metrics": emc_auth.authorize_show_metrics,
         }
+        return metrics.instrument_functions("auth", auth_functions)
 
     def get_actions(self) -> typing.Dict[str, typing.Callable]:
-        return {
+        actions = {
             "package_create": ckan_actions.package_create,
             "package_update": ckan_actions.package_update,
             "package_patch": ckan_actions.package_patch,
@@ -287,13 +327,19 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
             "dcpr_request_csi_moderate": dcpr_update_actions.dcpr_request_csi_moderate,
             "dcpr_request_delete": dcpr_delete_actions.dcpr_request_delete,
             "emc_version": emc_actions.show_version,
+            "emc_list_featured_datasets": emc_actions.list_featured_datasets,
             "emc_request_dataset_maintenance": emc_actions.request_dataset_maintenance,
             "emc_request_dataset_publication": emc_actions.request_dataset_publication,
             "emc_user_patch": ckan_actions.user_patch,
             "user_update": ckan_actions.user_update,
             "user_create": ckan_actions.user_create,
             "user_show": ckan_actions.user_show,
+            "tag_create": ckan_actions.tag_create,
+            "tag_delete": ckan_actions.tag_delete,
+            "ckanext_pages_update": ckanext_pages_actions.ckanext_pages_update,
+            "ckanext_pages_delete": ckanext_pages_actions.ckanext_pages_delete,
         }
+        return metrics.instrument_functions("action", actions)
 
     def get_validators(self) -> typing.Dict[str, typing.Callable]:
         return {
@@ -313,12 +359,18 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
     def get_helpers(self):
         return {
             "dalrrd_emc_dcpr_default_spatial_search_extent": partial(
-                helpers.get_default_spatial_search_extent, 0.001
+                helpers.get_default_spatial_search_extent,
+                constants.DEFAULT_SPATIAL_SEARCH_EXTENT_PADDING_DEGREES,
+            ),
+            "emc_default_spatial_search_extent_json": (
+                helpers.get_default_spatial_search_extent_json
             ),
             "emc_build_nav_main": helpers.build_pages_nav_main,
             "emc_default_bounding_box": helpers.get_default_bounding_box,
             "emc_convert_geojson_to_bounding_box": helpers.convert_geojson_to_bbox,
+            "emc_dataset_bounding_box": helpers.get_dataset_bounding_box,
             "emc_extent_to_bbox": helpers.convert_string_extent_to_bbox,
+            "emc_temporal_search_url": helpers.build_temporal_search_url,
             "emc_sasdi_themes": helpers.get_sasdi_themes,
             "emc_iso_topic_categories": helpers.get_iso_topic_categories,
             "emc_show_version": helpers.helper_show_version,
@@ -348,7 +400,6 @@ class DalrrdEmcDcprPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
             facets_dict[
                 f"vocab_{constants.ISO_TOPIC_CATEGOY_VOCABULARY_NAME}"
             ] = toolkit._("ISO Topic Category")
-            facets_dict["reference_date"] = toolkit._("Reference Date")
             facets_dict["harvest_source_title"] = toolkit._("Harvest source")
         return facets_dict
 
@@ -376,3 +427,285 @@ def _parse_date(raw_date: str) -> typing.Optional[str]:
         logger.exception("Could not parse date from input string")
         result = None
     return result
+
+
+@dataclasses.dataclass(frozen=True)
+class _HistogramRange:
+    start: str
+    end: str
+    gap: str
+
+
+def _get_reference_date_histogram_range(
+    start_date: typing.Optional[str], end_date: typing.Optional[str]
+) -> typing.Optional[_HistogramRange]:
+    """Get the Solr date range used for the reference date histogram.
+
+    Buckets span one year each, except when searching for a temporal range of at
+    most one year, in which case the histogram drills down into months.
+
+    There is no histogram for a range that ends before it starts, which includes
+    ranges without an end that start in the future, as Solr rejects these.
+
+    """
+
+    parsed_start = dateutil.parser.parse(start_date) if start_date else None
+    parsed_end = (
+        dateutil.parser.parse(end_date)
+        if end_date
+        else dt.datetime.now(dt.timezone.utc)
+    )
+    if parsed_start is not None and parsed_start > parsed_end:
+        result = None
+    else:
+        if start_date is not None and end_date is not None:
+            span = parsed_end - parsed_start
+            gap = "MONTH" if span <= dt.timedelta(days=366) else "YEAR"
+        else:
+            gap = "YEAR"
+        result = _HistogramRange(
+            start=f"{start_date or _REFERENCE_DATE_HISTOGRAM_DEFAULT_START}/{gap}",
+            end=f"{end_date or 'NOW'}/{gap}+1{gap}",
+            gap=gap,
+        )
+    return result
+
+
+def _run_facet_query(
+    search_params: typing.Dict,
+    fq: str,
+    facet_fields: typing.List[str],
+    histogram_range: typing.Optional[_HistogramRange],
+) -> typing.Tuple[typing.Dict[str, typing.Dict[str, int]], typing.List]:
+    """Get the facet counts and the reference date histogram in a single Solr query.
+
+    Solr is queried directly because range facets are not among the parameters
+    accepted by CKAN's package search query. The query and filters of the current
+    search are reused, which means the counts match the search results.
+
+    """
+
+    raw_filter_queries = search_params.get("fq") or []
+    filter_queries = (
+        [raw_filter_queries]
+        if isinstance(raw_filter_queries, str)
+        else list(raw_filter_queries)
+    )
+    filter_queries.extend(
+        (
+            fq,
+            f'+site_id:"{toolkit.config.get("ckan.site_id")}"',
+            "+state:active",
+        )
+    )
+    query_params = {
+        name: search_params[name]
+        for name in _FORWARDED_SEARCH_PARAMS
+        if search_params.get(name)
+    }
+    facet_params = {
+        "facet": "true",
+        "facet.field": facet_fields,
+        "facet.limit": toolkit.config.get("search.facets.limit", "50"),
+        "facet.mincount": 1,
+    }
+    if histogram_range is not None:
+        facet_params.update(
+            {
+                "facet.range": "reference_date",
+                "f.reference_date.facet.range.start": histogram_range.start,
+                "f.reference_date.facet.range.end": histogram_range.end,
+                "f.reference_date.facet.range.gap": f"+1{histogram_range.gap}",
+            }
+        )
+    response = search.make_connection(decode_dates=False).search(
+        q=query_params.pop("q", "*:*"),
+        fq=[f for f in filter_queries if f],
+        rows=0,
+        wt="json",
+        **query_params,
+        **facet_params,
+    )
+    facets = {
+        field: dict(zip(values[0::2], values[1::2]))
+        for field, values in response.facets.get("facet_fields", {}).items()
+    }
+    range_facets = response.facets.get("facet_ranges", {})
+    reference_date_counts = range_facets.get("reference_date", {}).get("counts", [])
+    return facets, reference_date_counts
+
+
+def _build_reference_date_histogram(counts: typing.List, gap: str) -> typing.Dict:
+    """Convert the Solr range facet counts into histogram buckets.
+
+    Besides the count, each bucket carries the first and last day that it covers,
+    which can be used as the bounds of a temporal search.
+
+    """
+
+    step, label_format = {
+        "YEAR": (relativedelta(years=1), "%Y"),
+        "MONTH": (relativedelta(months=1), "%Y-%m"),
+    }[gap]
+    items = []
+    for raw_start, count in zip(counts[0::2], counts[1::2]):
+        bucket_start = dateutil.parser.parse(raw_start)
+        bucket_end = bucket_start + step - dt.timedelta(days=1)
+        label = bucket_start.strftime(label_format)
+        items.append(
+            {
+                "name": label,
+                "display_name": label,
+                "count": count,
+                "start_date": bucket_start.date().isoformat(),
+                "end_date": bucket_end.date().isoformat(),
+            }
+        )
+    return {"title": "reference_date", "gap": gap.lower(), "items": items}
+
+
+def _build_search_facets(
+    facets: typing.Dict[str, typing.Dict[str, int]],
+    reference_date_counts: typing.List,
+    histogram_range: typing.Optional[_HistogramRange],
+) -> typing.Dict[str, typing.Dict]:
+    # organizations in the current search's facets.
+    group_names = []
+    for field_name in ("groups", "organization"):
+        group_names.extend(facets.get(field_name, {}).keys())
+
+    groups = (
+        model.Session.query(model.Group.name, model.Group.title)
+        .filter(model.Group.name.in_(group_names))
+        .all()
+        if group_names
+        else []
+    )
+    group_titles_by_name = dict(groups)
+    result = _restructure_facets(facets, group_titles_by_name)
+    if histogram_range is not None:
+        result["reference_date"] = _build_reference_date_histogram(
+            reference_date_counts, histogram_range.gap
+        )
+    return result
+
+
+def _restructure_facets(
+    facets: typing.Dict[str, typing.Dict[str, int]],
+    group_titles_by_name: typing.Dict[str, str],
+) -> typing.Dict[str, typing.Dict]:
+    """Convert Solr facet counts into the structure used by the search templates"""
+    result = {}
+    for key, value in facets.items():
+        result[key] = {"title": key, "items": []}
+        for key_, value_ in value.items():
+            new_facet_dict = {"name": key_}
+            if key in ("groups", "organization"):
+                display_name = group_titles_by_name.get(key_, key_)
+                display_name = (
+                    display_name if display_name and display_name.strip() else key_
+                )
+                new_facet_dict["display_name"] = display_name
+            else:
+                new_facet_dict["display_name"] = key_
+            new_facet_dict["count"] = value_
+            result[key]["items"].append(new_facet_dict)
+    return result
+
+
+def _enqueue_pycsw_record_update(pkg_dict: typing.Dict):
+    """Schedule the recomputation of the package's pycsw record.
+
+    Jobs are only enqueued once the package change has been committed, otherwise
+    they could be run against the package's previous state.
+
+    Only the jobs that are relevant for the relation that pycsw reads from, as set
+    in `ckan.dalrrd_emc_dcpr.pycsw_relation`, are enqueued. The records table is
+    updated for each changed package. The materialized view can only be refreshed as
+    a whole, so its refreshes are debounced - the first change schedules a refresh to
+    be run `ckan.dalrrd_emc_dcpr.pycsw_refresh_debounce_seconds` later and further
+    changes made until then are handled by that same refresh.
+
+    """
+
+    if (package_id := pkg_dict.get("id")) is not None:
+        after_commit.call_after_commit(
+            ("pycsw_record", package_id), partial(_enqueue_pycsw_jobs, package_id)
+        )
+
+
+def _enqueue_pycsw_jobs(package_id: str):
+    relation = constants.PycswRelation(
+        toolkit.config.get(
+            "ckan.dalrrd_emc_dcpr.pycsw_relation",
+            constants.PycswRelation.MATERIALIZED_VIEW.value,
+        )
+    )
+    if relation == constants.PycswRelation.RECORDS_TABLE:
+        toolkit.enqueue_job(
+            jobs.update_pycsw_record,
+            args=[package_id],
+            title=f"Update pycsw record of package {package_id!r}",
+        )
+    else:
+        toolkit.enqueue_job(
+            jobs.update_pycsw_document,
+            args=[package_id],
+            title=f"Update pycsw document of package {package_id!r}",
+        )
+        if pycsw_catalogue.mark_materialized_view_as_changed():
+            _schedule_pycsw_materialized_view_refresh()
+
+
+def _schedule_pycsw_materialized_view_refresh():
+    """Enqueue a refresh of the materialized view to be run after the debounce delay.
+
+    Delayed jobs are only moved into their queue by a worker that runs RQ's
+    scheduler, which is what the `pycsw refresh-worker` command does.
+
+    """
+
+    debounce_seconds = toolkit.asint(
+        toolkit.config.get("ckan.dalrrd_emc_dcpr.pycsw_refresh_debounce_seconds", 30)
+    )
+    ckan_jobs.get_queue(constants.PYCSW_JOBS_QUEUE_NAME).enqueue_in(
+        dt.timedelta(seconds=debounce_seconds),
+        jobs.refresh_pycsw_materialized_view,
+        job_timeout=toolkit.asint(toolkit.config.get("ckan.jobs.timeout", 180)),
+        meta={"title": "Refresh pycsw materialized view"},
+    )
+
+
+def _enqueue_homepage_datasets_rebuild(pkg_dict: typing.Dict):
+    """Schedule a rebuild of the datasets shown on the homepage, if needed.
+
+    A rebuild is only scheduled if the changed package may be shown on the homepage
+    and there is not already a rebuild job waiting to be run. The job searches for
+    the datasets to show, so it is only enqueued once the change has been committed
+    and the package has been reindexed.
+
+    """
+
+    after_commit.call_after_commit(
+        ("homepage_datasets", pkg_dict.get("id")),
+        partial(_enqueue_homepage_datasets_rebuild_job, pkg_dict),
+    )
+
+
+def _enqueue_homepage_datasets_rebuild_job(pkg_dict: typing.Dict):
+    if homepage.is_relevant_change(pkg_dict) and homepage.mark_rebuild_as_scheduled():
+        toolkit.enqueue_job(
+            jobs.rebuild_homepage_datasets,
+            title="Rebuild the datasets shown on the homepage",
+        )
+
+
+def _invalidate_page_cache():
+    """Invalidate the anonymous page cache once the package change is indexed.
+
+    Invalidating earlier would let requests that arrive in the meantime render the
+    previous state of the package and cache it under the new version.
+
+    """
+
+    after_commit.call_after_commit("page_cache", page_cache.invalidate_page_cache)
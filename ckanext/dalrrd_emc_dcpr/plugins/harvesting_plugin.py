@@ -1,4 +1,5 @@
 import datetime as dt
+import functools
 import logging
 import pathlib
 import typing
@@ -12,7 +13,12 @@ from ckan.model.license import LicenseNotSpecified
 
 from ckanext.spatial.interfaces import ISpatialHarvester
 
+from .. import helpers
 from ..cli import _CkanEmcDataset, _CkanResource
+from ..constants import (
+    HARVESTED_CONTENT_HASH_FIELD_NAME,
+    HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,11 +42,25 @@ class HarvestingPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
     """
 
     plugins.implements(ISpatialHarvester, inherit=True)
+    plugins.implements(plugins.IConfigurable)
+
+    def configure(self, config):
+        """Load the allowed dataset languages once, when the plugin is loaded"""
+        _get_allowed_dataset_languages()
 
     def get_package_dict(
         self, context: typing.Dict, data_dict: typing.Dict[str, typing.Any]
     ) -> typing.Dict[str, typing.Any]:
-        """Extension point required by ISpatialHarvester"""
+        """Extension point required by ISpatialHarvester
+
+        The returned package dict includes a hash of its content. This is used by our
+        `package_update` action in order to skip updating packages whose harvested
+        content has not changed since the previous harvest. ckanext-spatial passes
+        the same context to `package_update`, which is how our action knows that it
+        is being called by the harvester.
+
+        """
+
         package_dict = data_dict.get("package_dict", {})
         iso_values = data_dict.get("iso_values", {})
         parsed_resources = []
@@ -65,6 +85,7 @@ class HarvestingPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
         dataset_language = _get_language_code(declared_dataset_language or "en")
         iso_topic_category = _get_possibly_list_item(iso_values, "topic-category")
         equivalent_scale = _get_possibly_list_item(iso_values, "equivalent-scale")
+        declared_reference_date = _get_reference_date(iso_values)
         dataset = _CkanEmcDataset(
             type="dataset",
             private=True,
@@ -86,7 +107,9 @@ class HarvestingPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
             spatial_reference_system="EPSG:4326",
             resources=parsed_resources,
             tags=parsed_tags,
-            reference_date=_get_reference_date(iso_values),
+            reference_date=(
+                declared_reference_date or dt.datetime.now(dt.timezone.utc).isoformat()
+            ),
             sasdi_theme=None,  # seems like we can't know the SASDI theme in advance
             spatial_representation_type="001",
             source=None,
@@ -97,12 +120,19 @@ class HarvestingPlugin(plugins.SingletonPlugin, toolkit.DefaultDatasetForm):
         # - metadata_modified
         new_data_dict = dataset.to_data_dict()
         new_data_dict["id"] = iso_values.get("guid")
+        # the hash must not depend on the current time, which is used as the
+        # reference date when the record does not declare one
+        unhashed_fields = ("reference_date",) if declared_reference_date is None else ()
+        context[HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY] = unhashed_fields
+        new_data_dict[
+            HARVESTED_CONTENT_HASH_FIELD_NAME
+        ] = helpers.compute_harvested_content_hash(new_data_dict, unhashed_fields)
         new_data_dict["metadata_modified"] = iso_values.get("date_updated")
         return new_data_dict
 
 
-def _get_reference_date(iso_values: typing.Dict) -> str:
-    fallback_reference_date = dt.datetime.now(dt.timezone.utc).isoformat()
+def _get_reference_date(iso_values: typing.Dict) -> typing.Optional[str]:
+    result = None
     if (raw_temp_extent_begin := iso_values.get("temporal-extent-begin")) is not None:
         if isinstance(raw_temp_extent_begin, list):
             try:
@@ -115,7 +145,7 @@ def _get_reference_date(iso_values: typing.Dict) -> str:
             reference_date = dateutil.parser.parse(temp_extent_begin)
         except (TypeError, dateutil.parser.ParserError):
             logger.exception(msg=f"Could not parse {temp_extent_begin!r} as a datetime")
-            result = fallback_reference_date
+            result = None
         else:
             result = reference_date.isoformat()
     else:
@@ -128,7 +158,7 @@ def _get_reference_date(iso_values: typing.Dict) -> str:
                         logger.exception(
                             msg=f"Could not parse {raw_date!r} as a datetime"
                         )
-                        result = fallback_reference_date
+                        result = None
                     else:
                         result = reference_date.isoformat()
                 break
@@ -142,11 +172,11 @@ def _get_reference_date(iso_values: typing.Dict) -> str:
                         logger.exception(
                             msg=f"Could not parse {raw_date!r} as a datetime"
                         )
-                        result = fallback_reference_date
+                        result = None
                     else:
                         result = reference_date.isoformat()
             except (KeyError, IndexError):
-                result = fallback_reference_date
+                result = None
     return result
 
 
@@ -171,7 +201,14 @@ def _get_spatial_field(package: typing.Dict):
     return spatial
 
 
-def _get_allowed_dataset_languages() -> typing.List[str]:
+@functools.lru_cache(maxsize=None)
+def _get_allowed_dataset_languages() -> typing.FrozenSet[str]:
+    """Return the dataset languages allowed by our scheming dataset schema.
+
+    The schema file does not change while CKAN is running, so it is read only once.
+
+    """
+
     dataset_schema_path = (
         pathlib.Path(__file__).parents[1] / "scheming/dataset_schema.yaml"
     )
@@ -182,10 +219,37 @@ def _get_allowed_dataset_languages() -> typing.List[str]:
             if field_params["field_name"] == "dataset_language":
                 for choice in field_params.get("choices", []):
                     result.append(choice["value"])
+    return frozenset(result)
+
+
+def _get_language_code(
+    source_code: typing.Optional[typing.Union[str, typing.List[str]]]
+) -> str:
+    """Normalize the input language code into one of the allowed dataset languages.
+
+    ISO records may declare their language as a list, in which case its first item
+    is used.
+
+    """
+
+    if isinstance(source_code, list):
+        source_code = source_code[0] if len(source_code) > 0 else None
+    result = _normalize_language_code(
+        str(source_code) if source_code is not None else None
+    )
     return result
 
 
-def _get_language_code(source_code: str) -> str:
+@functools.lru_cache(maxsize=512)
+def _normalize_language_code(source_code: typing.Optional[str]) -> str:
+    """Memoized implementation of `_get_language_code()`.
+
+    Harvested records tend to repeat a small number of language codes, so results
+    are memoized. The input must be hashable, which is why lists are dealt with
+    by `_get_language_code()`.
+
+    """
+
     allowed_choices = _get_allowed_dataset_languages()
     default_language_code = "en"
     result = default_language_code
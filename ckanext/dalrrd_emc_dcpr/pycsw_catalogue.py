@@ -0,0 +1,393 @@
+"""Maintenance of the DB relations that pycsw uses as its catalogue
+
+pycsw reads CKAN datasets from a DB table (or view) whose columns follow pycsw's
+repository mappings. There are two flavours of this relation:
+
+- `emc_pycsw_records` - a regular table that is kept up to date incrementally. Each
+  time a package is created, updated or deleted, a background job recomputes the
+  pycsw record of that package only
+
+- `emc_pycsw_view` - a materialized view, which can only be refreshed as a whole
+
+Both are built from the same SQL query, which lives in the
+`templates/pycsw/pycsw_records_query.sql` template.
+
+Additionally, the `emc_pycsw_documents` table stores a pre-rendered ISO 19139 XML
+document and the distribution links of each public package. These are joined into
+the pycsw records, which means pycsw is able to return them directly instead of
+having to build a full ISO response on each request.
+
+"""
+
+import datetime as dt
+import json
+import logging
+import time
+import typing
+
+from ckan import model
+from ckan.lib.redis import connect_to_redis
+from ckan.plugins import toolkit
+from sqlalchemy import text as sla_text
+
+from .cli.utils import get_jinja_env
+
+logger = logging.getLogger(__name__)
+
+PYCSW_RECORDS_TABLE_NAME = "public.emc_pycsw_records"
+PYCSW_MATERIALIZED_VIEW_NAME = "public.emc_pycsw_view"
+PYCSW_DOCUMENTS_TABLE_NAME = "public.emc_pycsw_documents"
+
+_VIEW_CHANGED_REDIS_KEY = "ckanext.dalrrd_emc_dcpr.pycsw_view_changed"
+_VIEW_REFRESH_SCHEDULED_REDIS_KEY = (
+    "ckanext.dalrrd_emc_dcpr.pycsw_view_refresh_scheduled"
+)
+# safeguard for not blocking future refreshes if a scheduled refresh job is lost
+_VIEW_REFRESH_SCHEDULED_TTL_SECONDS = 60 * 60
+
+
+def create_materialized_view() -> None:
+    template = get_jinja_env().get_template("pycsw/pycsw_view.sql")
+    ddl_command = template.render(
+        view_name=PYCSW_MATERIALIZED_VIEW_NAME,
+        index_prefix=PYCSW_MATERIALIZED_VIEW_NAME.rpartition(".")[-1],
+    )
+    with model.meta.engine.begin() as conn:
+        conn.execute(sla_text(ddl_command))
+
+
+def refresh_materialized_view(concurrently: bool = True) -> None:
+    """Refresh the materialized view.
+
+    A concurrent refresh does not block pycsw from reading the view while it is
+    being refreshed. It requires the view to have a unique index, which is created
+    together with the view.
+
+    """
+
+    concurrently_clause = "CONCURRENTLY " if concurrently else ""
+    with model.meta.engine.begin() as conn:
+        conn.execute(
+            sla_text(
+                f"REFRESH MATERIALIZED VIEW {concurrently_clause}"
+                f"{PYCSW_MATERIALIZED_VIEW_NAME} WITH DATA;"
+            )
+        )
+
+
+def benchmark_materialized_view_refresh(
+    concurrently: bool = True,
+) -> typing.Dict[str, typing.Any]:
+    """Measure the cost of refreshing the materialized view.
+
+    This refreshes the view and also runs its query under `EXPLAIN ANALYZE` in order
+    to gather how much data the query spills into temporary files. It is meant to be
+    run against a large catalogue, like the one generated by the
+    `load-sample-data create-sample-datasets --bulk` command.
+
+    """
+
+    query = get_jinja_env().get_template("pycsw/pycsw_records_query.sql").render()
+    with model.meta.engine.connect() as conn:
+        plan = conn.execute(
+            sla_text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}")
+        ).scalar()[0]
+        block_size = int(conn.execute(sla_text("SHOW block_size")).scalar())
+    start = time.perf_counter()
+    refresh_materialized_view(concurrently=concurrently)
+    refresh_seconds = time.perf_counter() - start
+    with model.meta.engine.connect() as conn:
+        num_records = conn.execute(
+            sla_text(f"SELECT count(*) FROM {PYCSW_MATERIALIZED_VIEW_NAME}")
+        ).scalar()
+    return {
+        "num_records": num_records,
+        "refresh_seconds": refresh_seconds,
+        "query_execution_seconds": plan["Execution Time"] / 1000,
+        "query_temp_written_bytes": (
+            plan["Plan"].get("Temp Written Blocks", 0) * block_size
+        ),
+    }
+
+
+def mark_materialized_view_as_changed() -> bool:
+    """Flag the view as needing a refresh.
+
+    Returns whether a refresh job needs to be scheduled, which is only the case if
+    there is not one already scheduled.
+
+    """
+
+    redis_conn = connect_to_redis()
+    redis_conn.set(_VIEW_CHANGED_REDIS_KEY, "1")
+    scheduled = redis_conn.set(
+        _VIEW_REFRESH_SCHEDULED_REDIS_KEY,
+        "1",
+        nx=True,
+        ex=_VIEW_REFRESH_SCHEDULED_TTL_SECONDS,
+    )
+    return bool(scheduled)
+
+
+def refresh_materialized_view_if_changed() -> bool:
+    """Refresh the view, but only if it has been flagged as changed.
+
+    This is meant to be run some time after the refresh has been scheduled, so that
+    all changes made in the meantime end up being handled by a single refresh.
+
+    Returns whether the view has been refreshed.
+
+    """
+
+    redis_conn = connect_to_redis()
+    # changes flagged after this point will schedule a new refresh job
+    redis_conn.delete(_VIEW_REFRESH_SCHEDULED_REDIS_KEY)
+    changed = redis_conn.delete(_VIEW_CHANGED_REDIS_KEY) > 0
+    if changed and materialized_view_exists():
+        refresh_materialized_view()
+        result = True
+    else:
+        result = False
+    return result
+
+
+def materialized_view_exists() -> bool:
+    return _relation_exists(PYCSW_MATERIALIZED_VIEW_NAME)
+
+
+def drop_materialized_view() -> None:
+    with model.meta.engine.begin() as conn:
+        conn.execute(sla_text(f"DROP MATERIALIZED VIEW {PYCSW_MATERIALIZED_VIEW_NAME}"))
+
+
+def create_records_table() -> None:
+    template = get_jinja_env().get_template("pycsw/pycsw_records_table.sql")
+    ddl_command = template.render(
+        table_name=PYCSW_RECORDS_TABLE_NAME,
+        index_prefix=PYCSW_RECORDS_TABLE_NAME.rpartition(".")[-1],
+    )
+    with model.meta.engine.begin() as conn:
+        conn.execute(sla_text(ddl_command))
+
+
+def drop_records_table() -> None:
+    with model.meta.engine.begin() as conn:
+        conn.execute(sla_text(f"DROP TABLE {PYCSW_RECORDS_TABLE_NAME}"))
+
+
+def records_table_exists() -> bool:
+    return _relation_exists(PYCSW_RECORDS_TABLE_NAME)
+
+
+def rebuild_records() -> int:
+    """Recompute the pycsw records of all packages.
+
+    This is meant for recovery purposes, as the table is otherwise maintained
+    incrementally by `update_record()`. Records are replaced inside a single
+    transaction, which means that pycsw keeps seeing the previous records until the
+    rebuild is finished. We use `DELETE` rather than `TRUNCATE` because the latter
+    would block pycsw's reads for the whole duration of the rebuild.
+
+    """
+
+    query = get_jinja_env().get_template("pycsw/pycsw_records_query.sql").render()
+    with model.meta.engine.begin() as conn:
+        conn.execute(sla_text(f"DELETE FROM {PYCSW_RECORDS_TABLE_NAME}"))
+        result = conn.execute(
+            sla_text(f"INSERT INTO {PYCSW_RECORDS_TABLE_NAME} {query}")
+        ).rowcount
+    return result
+
+
+def update_record(package_id: str) -> None:
+    """Recompute the pycsw record of a single package.
+
+    The record is upserted if the package is still eligible for being in the
+    catalogue (i.e. it is public and active) and is removed otherwise. This means
+    the same function deals with created, updated and deleted packages. Upserting,
+    rather than deleting and inserting again, keeps concurrent updates of the same
+    package from clashing on the unique index of the `identifier` column.
+
+    """
+
+    query = (
+        get_jinja_env()
+        .get_template("pycsw/pycsw_records_query.sql")
+        .render(filter_by_package=True)
+    )
+    with model.meta.engine.begin() as conn:
+        column_names = _get_column_names(conn, PYCSW_RECORDS_TABLE_NAME)
+        columns = ", ".join(f'"{name}"' for name in column_names)
+        update_columns = ", ".join(
+            f'"{name}" = excluded."{name}"'
+            for name in column_names
+            if name != "identifier"
+        )
+        num_upserted = conn.execute(
+            sla_text(
+                f"INSERT INTO {PYCSW_RECORDS_TABLE_NAME} ({columns}) "
+                f"SELECT {columns} FROM ({query}) AS record "
+                f"ON CONFLICT (identifier) DO UPDATE SET {update_columns}"
+            ),
+            package_id=package_id,
+        ).rowcount
+        if num_upserted == 0:
+            conn.execute(
+                sla_text(
+                    f"DELETE FROM {PYCSW_RECORDS_TABLE_NAME} "
+                    f"WHERE identifier = :package_id"
+                ),
+                package_id=package_id,
+            )
+
+
+def update_document(package_id: str) -> None:
+    """Render and store the ISO 19139 document and links of a single package.
+
+    Documents are only kept for public and active packages. Any existing document
+    is removed when a package becomes private or is deleted.
+
+    """
+
+    try:
+        package = toolkit.get_action("package_show")(
+            context={"ignore_auth": True}, data_dict={"id": package_id}
+        )
+    except toolkit.ObjectNotFound:
+        package = None
+    is_public = (
+        package is not None
+        and package.get("state") == "active"
+        and not package.get("private")
+    )
+    with model.meta.engine.begin() as conn:
+        if is_public:
+            conn.execute(
+                sla_text(
+                    f"INSERT INTO {PYCSW_DOCUMENTS_TABLE_NAME} "
+                    f"(package_id, xml, links, rendered_at) "
+                    f"VALUES (:package_id, :xml, :links, :rendered_at) "
+                    f"ON CONFLICT (package_id) DO UPDATE SET "
+                    f"xml = excluded.xml, "
+                    f"links = excluded.links, "
+                    f"rendered_at = excluded.rendered_at"
+                ),
+                package_id=package_id,
+                xml=render_iso_19139_document(package),
+                links=get_pycsw_links(package),
+                rendered_at=dt.datetime.utcnow(),
+            )
+        else:
+            conn.execute(
+                sla_text(
+                    f"DELETE FROM {PYCSW_DOCUMENTS_TABLE_NAME} "
+                    f"WHERE package_id = :package_id"
+                ),
+                package_id=package_id,
+            )
+
+
+def rebuild_documents() -> int:
+    """Render and store the documents of all public packages."""
+    package_ids = [
+        row.id
+        for row in model.Session.query(model.Package.id).filter(
+            model.Package.state == model.State.ACTIVE,
+            model.Package.private.is_(False),
+        )
+    ]
+    model.Session.remove()
+    for index, package_id in enumerate(package_ids):
+        update_document(package_id)
+        if (index + 1) % 1000 == 0:
+            logger.info(f"Rendered {index + 1} of {len(package_ids)} documents")
+    return len(package_ids)
+
+
+def render_iso_19139_document(package: typing.Dict) -> str:
+    """Render the ISO 19139 XML document of a package.
+
+    The document has no XML declaration. pycsw parses the stored document with
+    `lxml.etree.fromstring()`, which refuses strings that declare their encoding.
+
+    """
+
+    topic_categories = package.get("iso_topic_category") or []
+    if isinstance(topic_categories, str):
+        topic_categories = [topic_categories]
+    keywords = [tag["name"] for tag in package.get("tags", [])]
+    if (sasdi_theme := package.get("sasdi_theme")) is not None:
+        keywords.extend(sasdi_theme if isinstance(sasdi_theme, list) else [sasdi_theme])
+    site_url = toolkit.config.get("ckan.site_url", "").rstrip("/")
+    template = get_jinja_env().get_template("pycsw/iso19139.xml")
+    return template.render(
+        package=package,
+        keywords=keywords,
+        topic_categories=topic_categories,
+        bbox=_get_bbox(package.get("spatial")),
+        dataset_url=f"{site_url}/dataset/{package['name']}",
+    )
+
+
+def get_pycsw_links(package: typing.Dict) -> str:
+    """Return the package's resources as links, in the format expected by pycsw.
+
+    pycsw stores links as a string where each link is made of the
+    `name,description,protocol,url` fields and links are separated by a `^`
+    character. As there is no escaping mechanism, these characters are removed from
+    the individual fields.
+
+    """
+
+    links = []
+    for resource in package.get("resources", []):
+        fields = (
+            resource.get("name"),
+            resource.get("description"),
+            resource.get("format"),
+            resource.get("url"),
+        )
+        links.append(
+            ",".join(
+                (field or "").replace(",", " ").replace("^", " ") for field in fields
+            )
+        )
+    return "^".join(links)
+
+
+def _get_bbox(
+    raw_spatial: typing.Optional[str],
+) -> typing.Optional[typing.Dict[str, float]]:
+    try:
+        coords = json.loads(raw_spatial)["coordinates"][0]
+    except (TypeError, ValueError, KeyError, IndexError):
+        result = None
+    else:
+        result = {
+            "west": min(c[0] for c in coords),
+            "east": max(c[0] for c in coords),
+            "south": min(c[1] for c in coords),
+            "north": max(c[1] for c in coords),
+        }
+    return result
+
+
+def _get_column_names(conn, relation_name: str) -> typing.List[str]:
+    return [
+        row.attname
+        for row in conn.execute(
+            sla_text(
+                "SELECT attname FROM pg_attribute "
+                "WHERE attrelid = to_regclass(:name) "
+                "AND attnum > 0 AND NOT attisdropped "
+                "ORDER BY attnum"
+            ),
+            name=relation_name,
+        )
+    ]
+
+
+def _relation_exists(name: str) -> bool:
+    with model.meta.engine.connect() as conn:
+        result = conn.execute(sla_text("SELECT to_regclass(:name)"), name=name).scalar()
+    return result is not None
@@ -0,0 +1,166 @@
+"""Counting of the SQL queries issued while handling requests
+
+Enable it by setting `ckan.dalrrd_emc_dcpr.query_counter.enabled = true` in the CKAN
+ini file. Each request then has its SQL queries counted and a warning is logged
+whenever a request issues more than
+`ckan.dalrrd_emc_dcpr.query_counter.max_queries_per_request` queries. The warning
+includes the most repeated statements and a summary of the stack that issued the
+first query over the threshold, which usually points to code that is issuing
+queries in a loop.
+
+The `QueryCounter` class can also be used directly, which is what the
+`emc_assert_max_queries` pytest fixture and the `profile` CLI commands do.
+
+This module holds the only SQLAlchemy listener used for counting queries. Besides
+feeding the active `QueryCounter` instances, it keeps a running count of the
+queries issued by each thread, which is what the opt-in metrics use.
+
+"""
+
+import collections
+import logging
+import threading
+import time
+import traceback
+import typing
+
+import flask
+import sqlalchemy
+from ckan.plugins import toolkit
+
+logger = logging.getLogger(__name__)
+
+_thread_state = threading.local()
+_listener_lock = threading.Lock()
+_listener_registered = False
+
+
+class QueryCounter:
+    """Context manager that counts the SQL queries issued by the current thread
+
+    Besides the number of queries, it also records how long they took to run.
+
+    """
+
+    def __init__(self, threshold: typing.Optional[int] = None):
+        self.threshold = threshold
+        self.num_queries = 0
+        self.seconds = 0.0
+        self.statements = collections.Counter()
+        self.threshold_stack: typing.Optional[traceback.StackSummary] = None
+
+    def __enter__(self):
+        register_listener()
+        _get_active_counters().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _get_active_counters().remove(self)
+
+    @property
+    def threshold_exceeded(self) -> bool:
+        return self.threshold is not None and self.num_queries > self.threshold
+
+    def record(self, statement: str) -> None:
+        self.num_queries += 1
+        self.statements[statement] += 1
+        if self.threshold is not None and self.num_queries == self.threshold + 1:
+            # drop the frames of SQLAlchemy's event machinery and of this module
+            self.threshold_stack = traceback.StackSummary.from_list(
+                [
+                    frame
+                    for frame in traceback.extract_stack()
+                    if "sqlalchemy" not in frame.filename and frame.filename != __file__
+                ]
+            )
+
+    def summary(self, num_statements: int = 5) -> str:
+        lines = [f"{self.num_queries} queries issued. Most repeated statements:"]
+        for statement, count in self.statements.most_common(num_statements):
+            lines.append(f"{count:>6}x {' '.join(statement.split())[:300]}")
+        if self.threshold_stack is not None:
+            lines.append(
+                f"Stack of the query that exceeded the threshold of {self.threshold}:"
+            )
+            lines.extend(line.rstrip() for line in self.threshold_stack.format())
+        return "\n".join(lines)
+
+
+def query_counter_enabled() -> bool:
+    return toolkit.asbool(
+        toolkit.config.get("ckan.dalrrd_emc_dcpr.query_counter.enabled", False)
+    )
+
+
+def register_request_hooks(app: flask.Flask) -> None:
+    """Count the queries of each request handled by the input flask app"""
+    threshold = toolkit.asint(
+        toolkit.config.get(
+            "ckan.dalrrd_emc_dcpr.query_counter.max_queries_per_request", 50
+        )
+    )
+
+    @app.before_request
+    def start_counting_queries():
+        counter = QueryCounter(threshold=threshold)
+        counter.__enter__()
+        flask.g.emc_query_counter = counter
+
+    @app.teardown_request
+    def stop_counting_queries(exception=None):
+        counter = flask.g.pop("emc_query_counter", None)
+        if counter is not None:
+            counter.__exit__(None, None, None)
+            if counter.threshold_exceeded:
+                logger.warning(
+                    f"Request {flask.request.method} {flask.request.path!r} exceeded "
+                    f"the maximum of {threshold} SQL queries. {counter.summary()}"
+                )
+
+
+def get_num_queries() -> int:
+    """Return the number of SQL queries issued so far by the current thread.
+
+    Only queries issued after the listener has been registered are counted.
+
+    """
+
+    return getattr(_thread_state, "num_queries", 0)
+
+
+def register_listener() -> None:
+    """Start counting SQL queries, if this is not being done already"""
+    global _listener_registered
+    with _listener_lock:
+        if not _listener_registered:
+            sqlalchemy.event.listen(
+                sqlalchemy.engine.Engine, "before_cursor_execute", _before_execute
+            )
+            sqlalchemy.event.listen(
+                sqlalchemy.engine.Engine, "after_cursor_execute", _after_execute
+            )
+            _listener_registered = True
+
+
+def _get_active_counters() -> typing.List[QueryCounter]:
+    if not hasattr(_thread_state, "counters"):
+        _thread_state.counters = []
+    return _thread_state.counters
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    _thread_state.num_queries = get_num_queries() + 1
+    counters = _get_active_counters()
+    if len(counters) > 0:
+        for counter in counters:
+            counter.record(statement)
+        if context is not None:
+            context.emc_query_start = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "emc_query_start", None)
+    if start is not None:
+        seconds = time.perf_counter() - start
+        for counter in _get_active_counters():
+            counter.seconds += seconds
@@ -0,0 +1,7 @@
+CREATE UNIQUE INDEX IF NOT EXISTS {{ index_prefix }}_identifier_idx ON {{ relation_name }} (identifier);
+CREATE INDEX IF NOT EXISTS {{ index_prefix }}_wkb_geometry_idx ON {{ relation_name }} USING GIST (wkb_geometry);
+CREATE INDEX IF NOT EXISTS {{ index_prefix }}_date_modified_idx ON {{ relation_name }} (date_modified);
+CREATE INDEX IF NOT EXISTS {{ index_prefix }}_title_idx ON {{ relation_name }} (title);
+CREATE INDEX IF NOT EXISTS {{ index_prefix }}_organization_idx ON {{ relation_name }} (organization);
+CREATE INDEX IF NOT EXISTS {{ index_prefix }}_topiccategory_idx ON {{ relation_name }} (topiccategory);
+CREATE INDEX IF NOT EXISTS {{ index_prefix }}_anytext_tsvector_idx ON {{ relation_name }} USING GIN (anytext_tsvector);
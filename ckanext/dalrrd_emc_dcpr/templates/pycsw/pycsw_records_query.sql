@@ -0,0 +1,107 @@
+    WITH cte_extras AS (
+        -- extras and tags are aggregated in separate lateral subqueries, which
+        -- avoids joining each package's extras with its tags before aggregating
+        -- and also keeps packages without any extras or tags
+        SELECT
+               p.id,
+               p.title,
+               p.name,
+               p.metadata_created,
+               p.metadata_modified,
+               p.notes,
+               p.author,
+               g.title AS org_name,
+               p.maintainer,
+               coalesce(e.extras, '{}'::json) AS extras,
+               coalesce(t.tags, ARRAY[]::text[]) AS tags
+        FROM package AS p
+            LEFT JOIN "group" AS g ON p.owner_org = g.id
+            LEFT JOIN LATERAL (
+                SELECT json_object_agg(pe.key, pe.value) AS extras
+                FROM package_extra AS pe
+                WHERE pe.package_id = p.id
+                 AND pe.state = 'active'
+            ) AS e ON true
+            LEFT JOIN LATERAL (
+                SELECT array_agg(DISTINCT tg.name) AS tags
+                FROM package_tag AS pt
+                    JOIN tag AS tg ON pt.tag_id = tg.id
+                WHERE pt.package_id = p.id
+                 AND pt.state = 'active'
+            ) AS t ON true
+        WHERE p.state = 'active'
+         AND p.private = false
+        {%- if filter_by_package %}
+         AND p.id = :package_id
+        {%- endif %}
+    )
+    SELECT
+           c.id AS identifier,
+           CASE WHEN d.xml IS NULL THEN 'csw:Record' ELSE 'gmd:MD_Metadata' END AS typename,
+           'http://www.isotc211.org/2005/gmd' AS schema,
+           'local' AS mdsource,
+           c.metadata_created AS insert_date,
+           d.xml AS xml,
+           NULL AS metadata,
+           NULL AS metadata_type,
+           concat_ws(' ', c.name, c.notes) AS anytext,
+           -- pycsw runs its full-text searches against this column, when present
+           to_tsvector('english', concat_ws(' ', c.name, c.notes)) AS anytext_tsvector,
+           c.extras->>'metadata_language' AS language,
+           c.title AS title,
+           c.notes AS abstract,
+           concat_ws(', ', VARIADIC c.tags) AS keywords,
+           NULL AS keywordstype,
+           NULL AS format,
+           NULL AS source,
+           c.extras->>'reference_date' AS date,
+           c.metadata_modified AS date_modified,
+           'http://purl.org/dc/dcmitype/Dataset' AS type,
+           ST_AsText(ST_GeomFromGeoJSON(c.extras->>'spatial')) AS wkt_geometry,
+           ST_GeomFromGeoJSON(c.extras->>'spatial')::geometry(Polygon, 4326) AS wkb_geometry,
+           c.extras->>'spatial_reference_system' AS crs,
+           c.name AS title_alternate,
+           NULL as date_revision,
+           c.metadata_created AS date_creation,
+           NULL AS date_publication,
+           c.org_name AS organization,
+           NULL AS securityconstraints,
+           NULL AS parentidentifier,
+           c.extras->>'iso_topic_category' AS topiccategory,
+           c.extras->>'dataset_language' AS resourcelanguage,
+           NULL AS geodescode,
+           NULL AS denominator,
+           NULL AS distancevalue,
+           NULL AS distanceuom,
+           c.extras->>'reference_date' AS time_begin,
+           c.extras->>'reference_date' AS time_end,
+           NULL AS servicetype,
+           NULL AS servicetypeversion,
+           NULL AS operation,
+           NULL AS couplingtype,
+           NULL AS operateson,
+           NULL AS operatesonidentifier,
+           NULL AS operatesonname,
+           NULL AS degree,
+           NULL AS accessconstraints,
+           NULL AS otherconstraints,
+           NULL AS classification,
+           NULL AS conditionapplyingtoaccessanduse,
+           c.extras->>'lineage' AS lineage,
+           NULL AS responsiblepartyrole,
+           NULL AS specificationtitle,
+           NULL AS specificationdate,
+           NULL AS specificationdatetype,
+           c.author AS creator,
+           c.maintainer AS publisher,
+           NULL AS contributor,
+           NULL AS relation,
+           NULL AS platform,
+           NULL AS instrument,
+           NULL AS sensortype,
+           NULL AS cloudcover,
+           NULL AS bands,
+           -- links: name,description,protocol,url - with each link separated by ^
+           d.links AS links
+    FROM cte_extras AS c
+        LEFT JOIN emc_pycsw_documents AS d ON c.id = d.package_id
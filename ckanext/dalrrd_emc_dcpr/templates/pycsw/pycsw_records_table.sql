@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS {{ table_name }} AS
+{% include "pycsw/pycsw_records_query.sql" %}
+WITH NO DATA;
+
+{% with relation_name=table_name %}{% include "pycsw/pycsw_records_indexes.sql" %}{% endwith %}
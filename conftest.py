@@ -1,5 +1,13 @@
 """pytest configuration file"""
 
+import contextlib
+import json
+import logging
+import statistics
+import time
+import typing
+from pathlib import Path
+
 import pytest
 import shlex
 import sqlalchemy.exc
@@ -7,11 +15,38 @@ import subprocess
 
 import ckan.model
 
+from ckanext.dalrrd_emc_dcpr.query_counter import QueryCounter
+
+logger = logging.getLogger(__name__)
+
 pytest_plugins = (
     "ckan.tests.pytest_ckan.fixtures",
     "ckan.tests.pytest_ckan.ckan_setup",
 )
 
+_BENCHMARK_BASELINES_PATH = Path(__file__).parent / "tests/benchmark_baselines.json"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--emc-update-benchmark-baselines",
+        action="store_true",
+        default=False,
+        help=(
+            f"Store the timings of the benchmarks that are run as their new baselines "
+            f"in {_BENCHMARK_BASELINES_PATH.name!r}"
+        ),
+    )
+    parser.addoption(
+        "--emc-benchmark-tolerance",
+        type=float,
+        default=1.5,
+        help=(
+            "How many times slower than its baseline a benchmark is allowed to be "
+            "before it is considered a regression"
+        ),
+    )
+
 
 @pytest.fixture
 def emc_clean_db():
@@ -53,3 +88,91 @@ def emc_create_sasdi_themes(request):
             f"poetry run ckan --config {ckan_ini} dalrrd-emc-dcpr bootstrap create-iso-topic-categories"
         )
     )
+
+
+@pytest.fixture
+def emc_assert_max_queries():
+    """Assert that the code run inside the returned context manager stays within a
+    budget of SQL queries.
+
+    Example:
+
+        def test_something(emc_assert_max_queries):
+            with emc_assert_max_queries(10):
+                helpers.call_action("dcpr_request_list_public")
+
+    """
+
+    @contextlib.contextmanager
+    def _assert_max_queries(max_queries: int):
+        with QueryCounter(threshold=max_queries) as counter:
+            yield counter
+        assert not counter.threshold_exceeded, counter.summary()
+
+    return _assert_max_queries
+
+
+@pytest.fixture
+def emc_benchmark(request):
+    """Time a callable and compare the result with its stored baseline.
+
+    The callable is run a number of times and the median of these runs is compared
+    with the baseline that is stored for the current test in
+    `tests/benchmark_baselines.json`. The test fails if the median is slower than the
+    baseline by more than the `--emc-benchmark-tolerance` factor. When there is no
+    stored baseline, the median is stored as the new baseline and the test is skipped.
+    Run the benchmarks with `--emc-update-benchmark-baselines` in order to recreate
+    all of their baselines.
+
+    Example:
+
+        def test_something(emc_benchmark):
+            median_seconds = emc_benchmark(lambda: helpers.convert_geojson_to_bbox(...))
+
+    """
+
+    update_baselines = request.config.getoption("--emc-update-benchmark-baselines")
+    tolerance = request.config.getoption("--emc-benchmark-tolerance")
+    name = request.node.nodeid.rpartition("/")[-1]
+
+    def _benchmark(
+        func: typing.Callable[[], typing.Any],
+        rounds: int = 5,
+        warmup_rounds: int = 1,
+    ) -> float:
+        for _ in range(warmup_rounds):
+            func()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        logger.info(
+            f"{name}: median {median:.6f}s, min {min(timings):.6f}s, "
+            f"max {max(timings):.6f}s ({rounds} rounds)"
+        )
+        baselines = (
+            json.loads(_BENCHMARK_BASELINES_PATH.read_text())
+            if _BENCHMARK_BASELINES_PATH.exists()
+            else {}
+        )
+        baseline = baselines.get(name)
+        if update_baselines or baseline is None:
+            baselines[name] = median
+            _BENCHMARK_BASELINES_PATH.write_text(
+                json.dumps(baselines, indent=2, sort_keys=True) + "\n"
+            )
+        if baseline is None and not update_baselines:
+            pytest.skip(
+                f"There was no stored baseline for {name}, stored {median:.6f}s as "
+                f"its baseline"
+            )
+        elif not update_baselines:
+            assert median <= baseline * tolerance, (
+                f"{name} took {median:.6f}s, which is more than {tolerance} times "
+                f"its baseline of {baseline:.6f}s"
+            )
+        return median
+
+    return _benchmark
@@ -27,7 +27,9 @@ MD_CORE_MODEL = {
         "pycsw:Metadata": "metadata",
         # raw metadata payload type, xml as default for now
         "pycsw:MetadataType": "metadata_type",
-        # bag of metadata element and attributes ONLY, no XML tages
+        # bag of metadata element and attributes ONLY, no XML tages. Full-text
+        # searches are not run against this column but rather against the
+        # `anytext_tsvector` column, which pycsw uses whenever the table has it
         "pycsw:AnyText": "anytext",
         "pycsw:Language": "language",
         "pycsw:Title": "title",
@@ -0,0 +1,77 @@
+import datetime as dt
+import random
+import uuid
+
+import pytest
+from ckan import model
+from ckan.tests import factories, helpers
+
+from ckanext.dalrrd_emc_dcpr.constants import DCPRRequestStatus
+from ckanext.dalrrd_emc_dcpr.model.dcpr_request import dcpr_request_table
+
+pytestmark = pytest.mark.benchmark
+
+_INSERT_BATCH_SIZE = 5_000
+
+
+def _create_dcpr_requests(num_rows: int, owner_id: str, organization_id: str):
+    """Insert DCPR requests directly, as going through the actions would be too slow"""
+    statuses = [status.value for status in DCPRRequestStatus]
+    base_date = dt.datetime(2022, 1, 1)
+    ids = []
+    batch = []
+    for index in range(num_rows):
+        csi_reference_id = str(uuid.uuid4())
+        ids.append(csi_reference_id)
+        batch.append(
+            {
+                "csi_reference_id": csi_reference_id,
+                "owner_user": owner_id,
+                "organization_id": organization_id,
+                "status": random.choice(statuses),
+                "proposed_project_name": f"Benchmark project {index}",
+                "capture_start_date": base_date,
+                "capture_end_date": base_date + dt.timedelta(days=30),
+                "request_date": base_date,
+                "submission_date": base_date + dt.timedelta(minutes=index),
+            }
+        )
+        if len(batch) == _INSERT_BATCH_SIZE:
+            model.Session.execute(dcpr_request_table.insert(), batch)
+            batch = []
+    if len(batch) > 0:
+        model.Session.execute(dcpr_request_table.insert(), batch)
+    model.Session.commit()
+    return ids
+
+
+@pytest.fixture(params=[10_000, 100_000], ids=["10k", "100k"])
+def dcpr_request_ids(request, emc_clean_db, with_plugins):
+    user = factories.User()
+    organization = factories.Organization(users=[{"name": user["name"]}])
+    return _create_dcpr_requests(request.param, user["id"], organization["id"])
+
+
+@pytest.mark.usefixtures("with_request_context")
+@pytest.mark.parametrize(
+    "action_name",
+    [
+        "dcpr_request_list_public",
+        "dcpr_request_list_under_preparation",
+        "dcpr_request_list_awaiting_csi_moderation",
+        "dcpr_request_list_awaiting_nsif_moderation",
+    ],
+)
+def test_dcpr_request_list_benchmark(emc_benchmark, dcpr_request_ids, action_name):
+    emc_benchmark(lambda: helpers.call_action(action_name, limit=10, offset=100))
+
+
+@pytest.mark.usefixtures("with_request_context")
+def test_dcpr_request_show_benchmark(emc_benchmark, dcpr_request_ids):
+    sample = random.sample(dcpr_request_ids, 100)
+    emc_benchmark(
+        lambda: [
+            helpers.call_action("dcpr_request_show", csi_reference_id=csi_reference_id)
+            for csi_reference_id in sample
+        ]
+    )
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr.plugins import emc_dcpr_plugin
+
+pytestmark = pytest.mark.benchmark
+
+_NUM_ITEMS_PER_FACET = 1_000
+_FACET_FIELDS = (
+    "groups",
+    "organization",
+    "tags",
+    "res_format",
+    "license_id",
+    "vocab_sasdi_themes",
+    "vocab_iso_topic_categories",
+    "reference_date",
+    "harvest_source_title",
+)
+
+
+def _generate_facets(num_items: int):
+    return {
+        field: {f"{field}-value-{i}": random.randint(1, 500) for i in range(num_items)}
+        for field in _FACET_FIELDS
+    }
+
+
+def test_restructure_facets_benchmark(emc_benchmark):
+    facets = _generate_facets(_NUM_ITEMS_PER_FACET)
+    group_titles_by_name = {
+        name: f"Title of {name}"
+        for field_name in ("groups", "organization")
+        for name in facets[field_name]
+    }
+    emc_benchmark(
+        lambda: emc_dcpr_plugin._restructure_facets(facets, group_titles_by_name)
+    )
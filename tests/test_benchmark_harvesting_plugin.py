@@ -0,0 +1,56 @@
+import logging
+import random
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr.plugins import harvesting_plugin
+
+logger = logging.getLogger(__name__)
+
+pytestmark = pytest.mark.benchmark
+
+_NUM_RECORDS = 10_000
+_LANGUAGE_CODES = ("en", "eng", "en-ZA", "af", "zul", "pt")
+
+
+def _generate_harvested_records(num_records: int):
+    for i in range(num_records):
+        yield {
+            "package_dict": {
+                "name": f"harvested-{i}",
+                "title": f"Harvested dataset {i}",
+                "notes": f"Abstract for harvested dataset {i}",
+                "owner_org": "dummy-org",
+                "resources": [
+                    {"url": "http://fake.com", "format": "WMS", "name": "wms"},
+                ],
+                "tags": [{"name": "harvested"}],
+                "extras": [],
+            },
+            "iso_values": {
+                "guid": f"harvested-guid-{i}",
+                "date_updated": "2022-01-01T00:00:00",
+                "dataset-language": [random.choice(_LANGUAGE_CODES)],
+                "metadata-language": random.choice(_LANGUAGE_CODES),
+                "topic-category": ["farming"],
+                "temporal-extent-begin": ["2021-06-01"],
+                "contact": "someone",
+                "contact-email": "someone@fake.com",
+            },
+        }
+
+
+def test_get_package_dict_benchmark(emc_benchmark):
+    records = list(_generate_harvested_records(_NUM_RECORDS))
+    plugin = harvesting_plugin.HarvestingPlugin()
+    harvesting_plugin._normalize_language_code.cache_clear()
+    elapsed = emc_benchmark(
+        lambda: [plugin.get_package_dict({}, record) for record in records], rounds=3
+    )
+    logger.info(
+        f"get_package_dict: {_NUM_RECORDS} records in {elapsed:.3f}s "
+        f"({_NUM_RECORDS / elapsed:.0f} records/s)"
+    )
+    cache_info = harvesting_plugin._normalize_language_code.cache_info()
+    assert cache_info.misses <= len(_LANGUAGE_CODES)
+    assert harvesting_plugin._get_allowed_dataset_languages.cache_info().currsize == 1
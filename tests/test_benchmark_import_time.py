@@ -0,0 +1,70 @@
+import subprocess
+import sys
+import typing
+
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+_PLUGIN_MODULE = "ckanext.dalrrd_emc_dcpr.plugins.emc_dcpr_plugin"
+
+# modules which are already imported by CKAN itself, before loading our plugin
+_PRELOADED_MODULES = (
+    "ckan.plugins",
+    "ckan.plugins.toolkit",
+    "ckan.model",
+    "ckan.lib.helpers",
+)
+
+# cumulative import time of our plugin module, excluding the modules listed above
+_IMPORT_TIME_BUDGET_SECONDS = 1.5
+
+_LAZILY_IMPORTED_MODULES = (
+    "ckanext.dalrrd_emc_dcpr.cli.commands",
+    "ckanext.dalrrd_emc_dcpr.cli.legacy_sasdi.commands",
+    "httpx",
+    "shapely",
+)
+
+
+def _get_import_times() -> typing.Dict[str, float]:
+    """Import the plugin module and return the cumulative import time of each module
+
+    This relies on python's `-X importtime` option, which writes lines like
+
+    import time: self [us] | cumulative | imported package
+
+    to stderr. Only the modules imported after the preloaded ones are reported.
+
+    """
+
+    preload_statement = "; ".join(f"import {module}" for module in _PRELOADED_MODULES)
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            (
+                f"{preload_statement}; import sys; sys.stderr.write('---\\n'); "
+                f"import {_PLUGIN_MODULE}"
+            ),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    _, plugin_output = completed.stderr.split("---\n", maxsplit=1)
+    import_times = {}
+    for line in plugin_output.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, module = line.rsplit("|", maxsplit=2)
+            import_times[module.strip()] = int(cumulative) / 1_000_000
+    return import_times
+
+
+def test_plugin_import_time():
+    import_times = _get_import_times()
+    for module in _LAZILY_IMPORTED_MODULES:
+        assert module not in import_times
+    assert import_times[_PLUGIN_MODULE] < _IMPORT_TIME_BUDGET_SECONDS
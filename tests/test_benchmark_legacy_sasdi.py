@@ -0,0 +1,122 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+from ckanext.dalrrd_emc_dcpr.cli.legacy_sasdi.csw import csw_downloader
+from ckanext.dalrrd_emc_dcpr.cli.legacy_sasdi.saeon_odp import (
+    importer as saeon_importer,
+)
+
+pytestmark = pytest.mark.benchmark
+
+_NUM_RECORDS = 1_000
+_CUSTODIANS = ("saeon", "csir", "Department of Water and Sanitation", "unknown")
+
+_CSW_RECORD_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<csw:Record xmlns:csw="{csw}" xmlns:dc="{dc}">
+  <dc:identifier>record-{index}</dc:identifier>
+  <dc:title>Legacy record {index}</dc:title>
+  <dc:abstract>Abstract of legacy record {index}</dc:abstract>
+  <dc:keywords>{keywords}</dc:keywords>
+  <dc:type>dataset</dc:type>
+  <dc:format>Shapefile</dc:format>
+  <dc:author>Someone</dc:author>
+  <dc:custodian>{custodian}</dc:custodian>
+  <dc:repository>legacy</dc:repository>
+  <dc:source>http://fake.com/source/{index}</dc:source>
+  <dc:link>http://fake.com/link/{index}</dc:link>
+  <dc:thumbnail>http://fake.com/thumbnail/{index}.png</dc:thumbnail>
+  <dc:coverage>South Africa</dc:coverage>
+  <dc:bbox>16.3 -34.9 32.9 -22.1</dc:bbox>
+  <dc:createdate>2012-01-01</dc:createdate>
+  <dc:changedate>2015-06-01</dc:changedate>
+  <dc:subject>environment</dc:subject>
+  <dc:subject>water</dc:subject>
+</csw:Record>
+"""
+
+
+def _write_csw_records(target_dir: Path, num_records: int):
+    for index in range(num_records):
+        record_path = target_dir / f"record-{index}.xml"
+        record_path.write_text(
+            _CSW_RECORD_TEMPLATE.format(
+                csw=csw_downloader.CSW_NAMESPACES["csw"],
+                dc=csw_downloader.CSW_NAMESPACES["dc"],
+                index=index,
+                keywords="|".join(f"keyword{i}" for i in range(random.randint(1, 20))),
+                custodian=random.choice(_CUSTODIANS),
+            )
+        )
+        yield record_path
+
+
+def _write_saeon_records(target_dir: Path, num_records: int):
+    for index in range(num_records):
+        record_path = target_dir / f"record-{index}.json"
+        record_path.write_text(
+            json.dumps(
+                {
+                    "titles": [{"title": f"SAEON record {index}"}],
+                    "descriptions": [
+                        {
+                            "descriptionType": "Abstract",
+                            "description": f"Abstract of SAEON record {index}",
+                        }
+                    ],
+                    "publisher": random.choice(_CUSTODIANS),
+                    "contributors": [
+                        {"contributorType": "ContactPerson", "name": "Someone"}
+                    ],
+                    "dates": [{"dateType": "Valid", "date": "2012-01-01/2013-01-01"}],
+                    "language": "en-ZA",
+                    "geoLocations": [
+                        {
+                            "geoLocationBox": {
+                                "westBoundLongitude": 16.3,
+                                "southBoundLatitude": -34.9,
+                                "eastBoundLongitude": 32.9,
+                                "northBoundLatitude": -22.1,
+                            }
+                        }
+                    ],
+                    "subjects": [
+                        {"subject": f"subject {i}"}
+                        for i in range(random.randint(1, 20))
+                    ],
+                    "identifiers": [
+                        {"identifierType": "DOI", "identifier": f"10.1234/{index}"}
+                    ],
+                    "linkedResources": [
+                        {
+                            "resourceURL": f"http://fake.com/resource/{index}",
+                            "linkedResourceType": "Information",
+                            "resourceName": "information",
+                        }
+                    ],
+                }
+            )
+        )
+        yield record_path
+
+
+def test_csw_parse_record_benchmark(emc_benchmark, tmp_path):
+    record_paths = list(_write_csw_records(tmp_path, _NUM_RECORDS))
+    xml_parser = etree.XMLParser(resolve_entities=False)
+    emc_benchmark(
+        lambda: [
+            csw_downloader.parse_record(
+                path, csw_downloader.CSW_NAMESPACES, xml_parser=xml_parser
+            )
+            for path in record_paths
+        ]
+    )
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_saeon_parse_record_benchmark(emc_benchmark, tmp_path):
+    record_paths = list(_write_saeon_records(tmp_path, _NUM_RECORDS))
+    emc_benchmark(lambda: [saeon_importer.parse_record(path) for path in record_paths])
@@ -0,0 +1,81 @@
+import json
+import random
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr import helpers
+from ckanext.dalrrd_emc_dcpr.logic import converters
+
+pytestmark = pytest.mark.benchmark
+
+_NUM_VALUES = 10_000
+_DEFAULT_EXTENT = json.dumps(
+    {
+        "type": "Polygon",
+        "coordinates": [
+            [[16.3, -34.9], [32.9, -34.9], [32.9, -22.1], [16.3, -22.1], [16.3, -34.9]]
+        ],
+    }
+)
+
+
+def _generate_bboxes(num_values: int):
+    for _ in range(num_values):
+        upper_lat = random.uniform(-30, -22)
+        left_lon = random.uniform(16, 25)
+        yield (
+            upper_lat,
+            left_lon,
+            upper_lat - random.uniform(0.01, 5),
+            left_lon + random.uniform(0.01, 5),
+        )
+
+
+def _to_geojson(bbox) -> str:
+    upper_lat, left_lon, lower_lat, right_lon = bbox
+    return json.dumps(
+        {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [left_lon, lower_lat],
+                    [right_lon, lower_lat],
+                    [right_lon, upper_lat],
+                    [left_lon, upper_lat],
+                    [left_lon, lower_lat],
+                ]
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize("value_format", ["bbox", "geojson"])
+def test_emc_bbox_converter_benchmark(emc_benchmark, value_format):
+    bboxes = list(_generate_bboxes(_NUM_VALUES))
+    if value_format == "bbox":
+        values = [",".join(str(coord) for coord in bbox) for bbox in bboxes]
+    else:
+        values = [_to_geojson(bbox) for bbox in bboxes]
+    emc_benchmark(lambda: [converters.emc_bbox_converter(value) for value in values])
+
+
+def test_convert_geojson_to_bbox_benchmark(emc_benchmark):
+    values = [json.loads(_to_geojson(bbox)) for bbox in _generate_bboxes(_NUM_VALUES)]
+    emc_benchmark(lambda: [helpers.convert_geojson_to_bbox(value) for value in values])
+
+
+@pytest.mark.parametrize("padding_degrees", [None, 0.5])
+def test_get_default_spatial_search_extent_benchmark(
+    emc_benchmark, ckan_config, monkeypatch, padding_degrees
+):
+    monkeypatch.setitem(
+        ckan_config,
+        "ckan.dalrrd_emc_dcpr.default_spatial_search_extent",
+        _DEFAULT_EXTENT,
+    )
+    emc_benchmark(
+        lambda: [
+            helpers.get_default_spatial_search_extent(padding_degrees)
+            for _ in range(_NUM_VALUES)
+        ]
+    )
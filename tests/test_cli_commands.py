@@ -15,6 +15,7 @@ pytestmark = pytest.mark.unit
         pytest.param(commands.bootstrap),
         pytest.param(commands.load_sample_data),
         pytest.param(commands.delete_data),
+        pytest.param(commands.search),
     ],
 )
 def test_group_commands(command: typing.Callable):
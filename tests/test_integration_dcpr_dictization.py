@@ -0,0 +1,100 @@
+import datetime as dt
+
+import pytest
+
+from ckan import model
+from ckan.tests import factories
+
+from ckanext.dalrrd_emc_dcpr import dcpr_dictization
+from ckanext.dalrrd_emc_dcpr.constants import DCPRRequestStatus
+from ckanext.dalrrd_emc_dcpr.model import dcpr_request
+
+pytestmark = pytest.mark.integration
+
+
+def _create_dcpr_request(user_id: str, organization_id: str, dataset_titles):
+    request_obj = dcpr_request.DCPRRequest(
+        owner_user=user_id,
+        organization_id=organization_id,
+        status=DCPRRequestStatus.UNDER_PREPARATION.value,
+        proposed_project_name="some project",
+        capture_start_date=dt.datetime(2022, 1, 1),
+        capture_end_date=dt.datetime(2022, 12, 31),
+    )
+    request_obj.datasets = [
+        dcpr_request.DCPRRequestDataset(
+            proposed_dataset_title=title, dataset_purpose="testing"
+        )
+        for title in dataset_titles
+    ]
+    model.Session.add(request_obj)
+    model.Session.commit()
+    return request_obj
+
+
+@pytest.mark.usefixtures("emc_clean_db", "with_plugins")
+def test_dcpr_request_dataset_list_save_diffs_against_existing_datasets():
+    user = factories.User()
+    organization = factories.Organization()
+    request_obj = _create_dcpr_request(
+        user["id"], organization["id"], ["kept", "changed", "removed"]
+    )
+    other_request_obj = _create_dcpr_request(user["id"], organization["id"], ["other"])
+    request_id = request_obj.csi_reference_id
+    other_request_id = other_request_obj.csi_reference_id
+    datasets_by_title = {
+        ds.proposed_dataset_title: ds.dataset_id for ds in request_obj.datasets
+    }
+    other_dataset_id = other_request_obj.datasets[0].dataset_id
+
+    dcpr_dictization.dcpr_request_dict_save(
+        {
+            "csi_reference_id": request_id,
+            "datasets": [
+                {
+                    "dataset_id": datasets_by_title["kept"],
+                    "proposed_dataset_title": "kept",
+                    "dataset_purpose": "testing",
+                },
+                {
+                    "dataset_id": datasets_by_title["changed"],
+                    "proposed_dataset_title": "changed title",
+                    "dataset_purpose": "testing",
+                },
+                {"proposed_dataset_title": "new", "dataset_purpose": "testing"},
+                {
+                    "dataset_id": other_dataset_id,
+                    "proposed_dataset_title": "taken from other request",
+                    "dataset_purpose": "testing",
+                },
+            ],
+        },
+        {"model": model, "session": model.Session, "updated_by": "owner"},
+    )
+    model.Session.commit()
+    model.Session.expire_all()
+
+    saved = {
+        ds.proposed_dataset_title: ds
+        for ds in dcpr_request.DCPRRequest.get(request_id).datasets
+    }
+    assert set(saved.keys()) == {
+        "kept",
+        "changed title",
+        "new",
+        "taken from other request",
+    }
+    assert saved["kept"].dataset_id == datasets_by_title["kept"]
+    assert saved["changed title"].dataset_id == datasets_by_title["changed"]
+    assert (
+        model.Session.query(dcpr_request.DCPRRequestDataset).get(
+            datasets_by_title["removed"]
+        )
+        is None
+    )
+    assert saved["new"].dataset_id not in datasets_by_title.values()
+    assert saved["taken from other request"].dataset_id != other_dataset_id
+    other_datasets = dcpr_request.DCPRRequest.get(other_request_id).datasets
+    assert [(ds.dataset_id, ds.proposed_dataset_title) for ds in other_datasets] == [
+        (other_dataset_id, "other")
+    ]
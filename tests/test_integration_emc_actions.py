@@ -0,0 +1,47 @@
+import pytest
+
+from ckan import model
+from ckan.logic import NotAuthorized
+from ckan.tests import factories, helpers
+
+pytestmark = pytest.mark.integration
+
+
+def _create_package(name: str, owner_org: str, private: bool, featured: str):
+    package = model.Package(
+        name=name, title=name.title(), owner_org=owner_org, private=private
+    )
+    model.Session.add(package)
+    model.Session.flush()
+    model.Session.add(
+        model.PackageExtra(package_id=package.id, key="featured", value=featured)
+    )
+    model.Session.commit()
+    return package
+
+
+@pytest.mark.usefixtures("emc_clean_db", "with_plugins", "with_request_context")
+def test_list_featured_datasets():
+    organization = factories.Organization()
+    _create_package("featured-public", organization["id"], False, "true")
+    _create_package("featured-private", organization["id"], True, "true")
+    _create_package("not-featured", organization["id"], False, "false")
+    public_result = helpers.call_action("emc_list_featured_datasets")
+    assert [i["name"] for i in public_result] == ["featured-public"]
+    assert public_result[0]["organization"]["name"] == organization["name"]
+    all_result = helpers.call_action("emc_list_featured_datasets", include_private=True)
+    assert {i["name"] for i in all_result} == {"featured-public", "featured-private"}
+
+
+@pytest.mark.usefixtures("emc_clean_db", "with_plugins", "with_request_context")
+def test_list_featured_datasets_auth():
+    user = factories.User()
+    helpers.call_action(
+        "emc_list_featured_datasets", context={"ignore_auth": False, "user": ""}
+    )
+    with pytest.raises(NotAuthorized):
+        helpers.call_action(
+            "emc_list_featured_datasets",
+            context={"ignore_auth": False, "user": user["name"]},
+            include_private=True,
+        )
@@ -0,0 +1,79 @@
+import datetime as dt
+
+import pytest
+
+from ckan import model
+from ckan.tests import factories, helpers
+
+from ckanext.dalrrd_emc_dcpr.constants import DCPRRequestStatus
+from ckanext.dalrrd_emc_dcpr.model import dcpr_request
+
+pytestmark = pytest.mark.integration
+
+_NUM_REQUESTS_PER_STATUS = 4
+_NUM_DATASETS_PER_REQUEST = 3
+
+
+@pytest.fixture
+def emc_seed_dcpr_requests():
+    """Create several DCPR requests, each with several datasets.
+
+    Query budgets are checked against more than one request, such that code
+    issuing queries for each listed request or dataset exceeds its budget.
+
+    """
+
+    user = factories.User()
+    organization = factories.Organization()
+    for status in (DCPRRequestStatus.ACCEPTED, DCPRRequestStatus.UNDER_PREPARATION):
+        for index in range(_NUM_REQUESTS_PER_STATUS):
+            request_obj = dcpr_request.DCPRRequest(
+                owner_user=user["id"],
+                organization_id=organization["id"],
+                status=status.value,
+                proposed_project_name=f"{status.value} project {index}",
+                capture_start_date=dt.datetime(2022, 1, 1),
+                capture_end_date=dt.datetime(2022, 12, 31),
+            )
+            request_obj.datasets = [
+                dcpr_request.DCPRRequestDataset(
+                    proposed_dataset_title=f"dataset {dataset_index}",
+                    dataset_purpose="testing",
+                )
+                for dataset_index in range(_NUM_DATASETS_PER_REQUEST)
+            ]
+            model.Session.add(request_obj)
+    model.Session.commit()
+
+
+@pytest.mark.usefixtures(
+    "emc_clean_db", "with_plugins", "with_request_context", "emc_seed_dcpr_requests"
+)
+@pytest.mark.parametrize(
+    "action_name, max_queries",
+    [
+        pytest.param("dcpr_request_list_public", 5),
+        pytest.param("dcpr_request_list_under_preparation", 5),
+        pytest.param("emc_version", 0),
+    ],
+)
+def test_action_query_budget(emc_assert_max_queries, action_name, max_queries):
+    with emc_assert_max_queries(max_queries):
+        result = helpers.call_action(action_name)
+    if action_name != "emc_version":
+        assert len(result) == _NUM_REQUESTS_PER_STATUS
+        assert all(len(r["datasets"]) == _NUM_DATASETS_PER_REQUEST for r in result)
+
+
+@pytest.mark.usefixtures("emc_clean_db", "with_plugins", "with_request_context")
+def test_user_show_query_budget(emc_assert_max_queries):
+    user = factories.User()
+    with emc_assert_max_queries(10):
+        helpers.call_action("user_show", id=user["id"])
+
+
+@pytest.mark.usefixtures("emc_clean_db", "with_plugins", "emc_seed_dcpr_requests")
+def test_public_dcpr_requests_view_query_budget(app, emc_assert_max_queries):
+    with emc_assert_max_queries(20):
+        response = app.get("/dcpr/")
+    assert response.status_code == 200
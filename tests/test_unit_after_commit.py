@@ -0,0 +1,54 @@
+from unittest import mock
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr import after_commit
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    session = mock.MagicMock(info={})
+    monkeypatch.setattr(after_commit, "_register_listeners", lambda: None)
+    monkeypatch.setattr(after_commit.model, "Session", session)
+    return session
+
+
+def test_callbacks_run_once_per_key_after_commit(fake_session):
+    calls = []
+    after_commit.call_after_commit("first", lambda: calls.append("first"))
+    after_commit.call_after_commit("second", lambda: calls.append("second"))
+    after_commit.call_after_commit("first", lambda: calls.append("first-again"))
+    assert calls == []
+    after_commit._run_pending_callbacks(fake_session)
+    assert calls == ["first", "second"]
+    after_commit._run_pending_callbacks(fake_session)
+    assert calls == ["first", "second"]
+
+
+def test_failing_callback_does_not_prevent_others(fake_session):
+    calls = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    after_commit.call_after_commit("failing", fail)
+    after_commit.call_after_commit("other", lambda: calls.append("other"))
+    after_commit._run_pending_callbacks(fake_session)
+    assert calls == ["other"]
+
+
+@pytest.mark.parametrize(
+    "parent, expected_calls",
+    [
+        pytest.param(None, [], id="outermost-rollback"),
+        pytest.param(mock.MagicMock(), ["kept"], id="nested-rollback"),
+    ],
+)
+def test_callbacks_discarded_on_rollback(fake_session, parent, expected_calls):
+    calls = []
+    after_commit.call_after_commit("kept", lambda: calls.append("kept"))
+    after_commit._discard_pending_callbacks(fake_session, mock.MagicMock(parent=parent))
+    after_commit._run_pending_callbacks(fake_session)
+    assert calls == expected_calls
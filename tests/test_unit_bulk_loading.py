@@ -0,0 +1,170 @@
+import csv
+from unittest import mock
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr.cli import (
+    _CkanEmcDataset,
+    _CkanResource,
+    bulk_loading,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def _read_rows(buffer):
+    buffer.seek(0)
+    return list(csv.reader(buffer))
+
+
+def _build_dataset(**kwargs):
+    params = {
+        "name": "dummy",
+        "private": False,
+        "notes": "dummy notes",
+        "reference_date": "2022-01-01",
+        "iso_topic_category": "farming",
+        "owner_org": "dummy-org",
+        "maintainer": "someone",
+        "resources": [
+            _CkanResource("http://fake.com", format="shp", format_version="1")
+        ],
+        "spatial": '{"type": "Polygon", "coordinates": []}',
+        "equivalent_scale": "500",
+        "spatial_representation_type": "001",
+        "spatial_reference_system": "EPSG:4326",
+        "dataset_language": "en",
+        "metadata_language": "en",
+        "dataset_character_set": "utf-8",
+        "sasdi_theme": "Cadastre",
+        "tags": [{"name": "sample-data", "vocabulary_id": None}],
+    }
+    params.update(kwargs)
+    return _CkanEmcDataset(**params)
+
+
+def _add_to_batch(dataset, free_tags=None):
+    if free_tags is None:
+        free_tags = {"sample-data": "free-tag-id"}
+    batch = bulk_loading._BulkBatch()
+    bulk_loading._add_dataset_to_batch(
+        batch,
+        dataset,
+        owner_org_id="org-id",
+        creator_user_id="user-id",
+        timestamp="2022-01-01T00:00:00",
+        vocabulary_tags={
+            ("sasdi_themes", "Cadastre"): "theme-tag-id",
+            ("iso_topic_categories", "farming"): "category-tag-id",
+        },
+        free_tags=free_tags,
+    )
+    return batch
+
+
+def test_add_dataset_to_batch():
+    batch = _add_to_batch(_build_dataset())
+    packages = _read_rows(batch.packages)
+    assert len(packages) == 1
+    assert packages[0][1] == "dummy"
+    extra_keys = {row[2] for row in _read_rows(batch.extras)}
+    assert "spatial" in extra_keys
+    assert "reference_date" in extra_keys
+    assert not extra_keys.intersection(("name", "sasdi_theme", "resources", "tags"))
+    tag_ids = {row[2] for row in _read_rows(batch.package_tags)}
+    assert tag_ids == {"theme-tag-id", "category-tag-id", "free-tag-id"}
+    assert len(_read_rows(batch.resources)) == 1
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        pytest.param("500", "500", id="str"),
+        pytest.param(True, "true", id="true-bool"),
+        pytest.param(False, "false", id="false-bool"),
+        pytest.param(3, "3", id="int"),
+        pytest.param(["first", "second"], '["first", "second"]', id="list"),
+        pytest.param({"first": 1}, '{"first": 1}', id="dict"),
+        pytest.param(None, None, id="none-is-skipped"),
+    ],
+)
+def test_add_dataset_to_batch_serializes_extras(monkeypatch, value, expected):
+    dataset = _build_dataset()
+    data_dict = dataset.to_data_dict()
+    data_dict["some_extra"] = value
+    monkeypatch.setattr(dataset, "to_data_dict", lambda: data_dict)
+    batch = _add_to_batch(dataset)
+    extras = {row[2]: row[3] for row in _read_rows(batch.extras)}
+    assert extras.get("some_extra") == expected
+    assert extras["featured"] == "false"
+
+
+def test_add_dataset_to_batch_tags(monkeypatch):
+    created_tags = []
+
+    def fake_get_or_create_free_tag(name):
+        created_tags.append(name)
+        return f"{name}-id"
+
+    monkeypatch.setattr(
+        bulk_loading, "_get_or_create_free_tag", fake_get_or_create_free_tag
+    )
+    free_tags = {"sample-data": "free-tag-id"}
+    dataset = _build_dataset(
+        sasdi_theme="unknown theme",
+        tags=[
+            {"name": "sample-data", "vocabulary_id": None},
+            {"name": "new-tag", "vocabulary_id": None},
+        ],
+    )
+    first_batch = _add_to_batch(dataset, free_tags=free_tags)
+    second_batch = _add_to_batch(dataset, free_tags=free_tags)
+    assert created_tags == ["new-tag"]
+    assert free_tags == {"sample-data": "free-tag-id", "new-tag": "new-tag-id"}
+    for batch in (first_batch, second_batch):
+        package_id = _read_rows(batch.packages)[0][0]
+        rows = _read_rows(batch.package_tags)
+        assert {row[1] for row in rows} == {package_id}
+        assert sorted(row[2] for row in rows) == [
+            "category-tag-id",
+            "free-tag-id",
+            "new-tag-id",
+        ]
+
+
+def test_add_dataset_to_batch_escapes_values_for_copy():
+    awkward_text = 'tab\there, new\nline, back\\slash and "quotes", with commas'
+    batch = _add_to_batch(
+        _build_dataset(notes=awkward_text, equivalent_scale=awkward_text)
+    )
+    # COPY's CSV format takes backslashes literally, so only quoting is needed
+    quoted = '"{}"'.format(awkward_text.replace('"', '""'))
+    assert quoted in batch.packages.getvalue()
+    assert quoted in batch.extras.getvalue()
+    packages = _read_rows(batch.packages)
+    assert len(packages) == 1
+    assert packages[0][3] == awkward_text
+    extras = {row[2]: row[3] for row in _read_rows(batch.extras)}
+    assert extras["equivalent_scale"] == awkward_text
+
+
+def test_index_chunk_sends_chunk_in_a_single_request(monkeypatch):
+    def fake_rebuild(package_ids, **kwargs):
+        for package_id in package_ids:
+            bulk_loading.search_index.make_connection().add(
+                docs=[{"id": package_id}], commit=False
+            )
+
+    original_make_connection = bulk_loading.search_index.make_connection
+    fake_connection = mock.MagicMock()
+    monkeypatch.setattr(bulk_loading.search, "rebuild", fake_rebuild)
+    monkeypatch.setattr(
+        bulk_loading.search, "make_connection", lambda *args: fake_connection
+    )
+    monkeypatch.setattr(bulk_loading.model, "Session", mock.MagicMock())
+    num_indexed = bulk_loading._index_chunk(["first", "second"])
+    assert num_indexed == 2
+    fake_connection.add.assert_called_once_with(
+        docs=[{"id": "first"}, {"id": "second"}], commit=True
+    )
+    assert bulk_loading.search_index.make_connection is original_make_connection
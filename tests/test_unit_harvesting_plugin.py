@@ -0,0 +1,81 @@
+import pytest
+
+from ckanext.dalrrd_emc_dcpr import helpers
+from ckanext.dalrrd_emc_dcpr.constants import (
+    HARVESTED_CONTENT_HASH_FIELD_NAME,
+    HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY,
+)
+from ckanext.dalrrd_emc_dcpr.plugins import harvesting_plugin
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize(
+    "iso_values, expected",
+    [
+        pytest.param({"temporal-extent-begin": ["2021-06-01"]}, "2021-06-01"),
+        pytest.param({}, None),
+        pytest.param({"temporal-extent-begin": ["not-a-date"]}, None),
+    ],
+)
+def test_get_reference_date(iso_values, expected):
+    result = harvesting_plugin._get_reference_date(iso_values)
+    if expected is None:
+        assert result is None
+    else:
+        assert result.startswith(expected)
+
+
+@pytest.mark.parametrize(
+    "source_code, expected",
+    [
+        pytest.param("en", "en", id="str"),
+        pytest.param(["en"], "en", id="list"),
+        pytest.param([], "en", id="empty-list"),
+        pytest.param(None, "en", id="none"),
+    ],
+)
+def test_get_language_code(source_code, expected):
+    assert harvesting_plugin._get_language_code(source_code) == expected
+
+
+def test_get_package_dict_content_hash_is_stable():
+    harvested_record = {
+        "package_dict": {
+            "name": "harvested",
+            "title": "Harvested dataset",
+            "notes": "Abstract",
+            "owner_org": "dummy-org",
+            "resources": [],
+            "tags": [],
+        },
+        "iso_values": {
+            "guid": "harvested-guid",
+            "date_updated": "2022-01-01T00:00:00",
+            "dataset-language": ["en"],
+            "metadata-language": "en",
+        },
+    }
+    plugin = harvesting_plugin.HarvestingPlugin()
+    first = plugin.get_package_dict({}, harvested_record)
+    second = plugin.get_package_dict({}, harvested_record)
+    assert first[HARVESTED_CONTENT_HASH_FIELD_NAME] is not None
+    assert (
+        first[HARVESTED_CONTENT_HASH_FIELD_NAME]
+        == second[HARVESTED_CONTENT_HASH_FIELD_NAME]
+    )
+
+
+def test_get_package_dict_marks_context_as_harvester_call():
+    harvested_record = {
+        "package_dict": {"name": "harvested", "owner_org": "dummy-org"},
+        "iso_values": {"guid": "harvested-guid", "metadata-language": "en"},
+    }
+    context = {}
+    plugin = harvesting_plugin.HarvestingPlugin()
+    result = plugin.get_package_dict(context, harvested_record)
+    unhashed_fields = context[HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY]
+    assert unhashed_fields == ("reference_date",)
+    assert result[HARVESTED_CONTENT_HASH_FIELD_NAME] == (
+        helpers.compute_harvested_content_hash(result, unhashed_fields)
+    )
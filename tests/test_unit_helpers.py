@@ -21,3 +21,19 @@ pytestmark = pytest.mark.unit
 )
 def test_convert_geojson_to_bbox(value, expected):
     assert helpers.convert_geojson_to_bbox(value) == expected
+
+
+@pytest.mark.parametrize(
+    "first, second, unhashed_fields, expected",
+    [
+        pytest.param({"a": 1, "b": [1, 2]}, {"b": [1, 2], "a": 1}, (), True),
+        pytest.param({"a": 1, "b": [1, 2]}, {"a": 1, "b": [2, 1]}, (), False),
+        pytest.param({"a": {"c": 1, "d": 2}}, {"a": {"d": 2, "c": 1}}, (), True),
+        pytest.param({"a": 1, "id": "x"}, {"a": 1, "id": "y"}, (), True),
+        pytest.param({"a": 1, "b": 2}, {"a": 1, "b": 3}, ("b",), True),
+    ],
+)
+def test_compute_harvested_content_hash(first, second, unhashed_fields, expected):
+    first_hash = helpers.compute_harvested_content_hash(first, unhashed_fields)
+    second_hash = helpers.compute_harvested_content_hash(second, unhashed_fields)
+    assert (first_hash == second_hash) == expected
@@ -0,0 +1,53 @@
+import json
+from unittest import mock
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr import homepage
+
+pytestmark = pytest.mark.unit
+
+
+def test_get_dataset_card():
+    package = {
+        "id": "some-id",
+        "name": "some-dataset",
+        "type": "dataset",
+        "title": "Some dataset",
+        "notes": "Some description",
+        "organization": {"name": "some-org", "title": "Some org", "id": "org-id"},
+        "metadata_modified": "2022-06-01T10:00:00",
+        "resources": [
+            {"format": "WMS", "url": "http://fake.com/wms"},
+            {"format": "PNG", "url": "http://fake.com/thumbnail.png"},
+        ],
+        "extras": [{"key": "something", "value": "else"}],
+    }
+    assert homepage.get_dataset_card(package) == {
+        "id": "some-id",
+        "name": "some-dataset",
+        "type": "dataset",
+        "title": "Some dataset",
+        "notes": "Some description",
+        "organization": {"name": "some-org", "title": "Some org"},
+        "thumbnail_url": "http://fake.com/thumbnail.png",
+        "metadata_modified": "2022-06-01T10:00:00",
+    }
+
+
+@pytest.mark.parametrize(
+    "pkg_dict, expected",
+    [
+        pytest.param({"id": "other", "private": False}, True, id="public"),
+        pytest.param({"id": "other", "private": True}, False, id="private-not-shown"),
+        pytest.param({"id": "shown", "private": True}, True, id="private-shown"),
+        pytest.param({"id": "shown", "state": "deleted"}, True, id="deleted-shown"),
+    ],
+)
+def test_is_relevant_change(monkeypatch, pkg_dict, expected):
+    fake_redis = mock.MagicMock()
+    fake_redis.get.return_value = json.dumps(
+        {"featured": [{"id": "shown"}], "recent": []}
+    )
+    monkeypatch.setattr(homepage, "connect_to_redis", lambda: fake_redis)
+    assert homepage.is_relevant_change(pkg_dict) == expected
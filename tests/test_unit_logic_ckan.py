@@ -0,0 +1,125 @@
+from functools import partial
+from unittest import mock
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr import helpers
+from ckanext.dalrrd_emc_dcpr.constants import (
+    HARVESTED_CONTENT_HASH_FIELD_NAME,
+    HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY,
+)
+from ckanext.dalrrd_emc_dcpr.logic.action import ckan as ckan_actions
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def fake_toolkit(monkeypatch):
+    check_access = mock.MagicMock(return_value=True)
+    package_show = mock.MagicMock(return_value={"id": "harvested-id"})
+    actions = {"package_show": package_show}
+    monkeypatch.setattr(ckan_actions.toolkit, "check_access", check_access)
+    monkeypatch.setattr(ckan_actions.toolkit, "get_action", actions.__getitem__)
+    return mock.MagicMock(
+        check_access=check_access, package_show=package_show, actions=actions
+    )
+
+
+def _build_update_context(stored_hash, harvester_call):
+    model = mock.MagicMock()
+    model.State.ACTIVE = "active"
+    model.Package.get.return_value = mock.MagicMock(
+        state="active", extras={HARVESTED_CONTENT_HASH_FIELD_NAME: stored_hash}
+    )
+    context = {"model": model, "session": mock.MagicMock(), "user": "someone"}
+    if harvester_call:
+        context[HARVESTER_UNHASHED_FIELDS_CONTEXT_KEY] = ()
+    return context
+
+
+def _build_harvested_data(title):
+    data = {"id": "harvested-id", "title": title, "private": True}
+    data[HARVESTED_CONTENT_HASH_FIELD_NAME] = helpers.compute_harvested_content_hash(
+        data
+    )
+    return data
+
+
+def test_package_update_skips_unchanged_harvested_package(fake_toolkit):
+    data = _build_harvested_data("harvested")
+    context = _build_update_context(
+        data[HARVESTED_CONTENT_HASH_FIELD_NAME], harvester_call=True
+    )
+    original_action = mock.MagicMock()
+    result = ckan_actions.package_update(original_action, context, data)
+    original_action.assert_not_called()
+    fake_toolkit.check_access.assert_called_once_with("package_update", context, data)
+    assert result == {"id": "harvested-id"}
+
+
+@pytest.mark.parametrize(
+    "harvester_call",
+    [
+        pytest.param(False, id="api-client"),
+        pytest.param(True, id="harvester"),
+    ],
+)
+def test_package_update_persists_changes_submitted_with_old_hash(
+    fake_toolkit, harvester_call
+):
+    data = _build_harvested_data("harvested")
+    context = _build_update_context(
+        data[HARVESTED_CONTENT_HASH_FIELD_NAME], harvester_call=harvester_call
+    )
+    data["title"] = "edited"
+    original_action = mock.MagicMock(return_value={"id": "harvested-id"})
+    ckan_actions.package_update(original_action, context, data)
+    original_action.assert_called_once()
+    assert original_action.call_args[0][1]["title"] == "edited"
+
+
+def test_package_update_checks_access_before_skipping(fake_toolkit):
+    data = _build_harvested_data("harvested")
+    context = _build_update_context(
+        data[HARVESTED_CONTENT_HASH_FIELD_NAME], harvester_call=True
+    )
+    fake_toolkit.check_access.side_effect = ckan_actions.toolkit.NotAuthorized
+    original_action = mock.MagicMock()
+    with pytest.raises(ckan_actions.toolkit.NotAuthorized):
+        ckan_actions.package_update(original_action, context, data)
+    original_action.assert_not_called()
+    fake_toolkit.package_show.assert_not_called()
+
+
+def test_package_patch_adds_derived_spatial_fields(fake_toolkit):
+    fake_toolkit.package_show.return_value = {
+        "id": "dummy-id",
+        "title": "Dummy",
+        "private": True,
+        "spatial": "10, 0, 0, 10",
+        "spatial_min_lon": 0.0,
+        "spatial_max_lon": 10.0,
+    }
+    original_update = mock.MagicMock(return_value={"id": "dummy-id"})
+    fake_toolkit.actions["package_update"] = partial(
+        ckan_actions.package_update, original_update
+    )
+    context = {"model": mock.MagicMock(), "session": mock.MagicMock(), "user": "me"}
+    ckan_actions.package_patch(
+        mock.MagicMock(), context, {"id": "dummy-id", "spatial": "20, 5, 10, 15"}
+    )
+    fake_toolkit.check_access.assert_any_call(
+        "package_patch", context, {"id": "dummy-id", "spatial": "20, 5, 10, 15"}
+    )
+    original_update.assert_called_once()
+    updated = original_update.call_args[0][1]
+    assert updated["title"] == "Dummy"
+    assert updated["spatial"] == "20, 5, 10, 15"
+    expected = helpers.get_derived_spatial_fields(
+        {
+            "type": "Polygon",
+            "coordinates": [[[5, 10], [15, 10], [15, 20], [5, 20], [5, 10]]],
+        }
+    )
+    assert {k: updated[k] for k in expected} == expected
+    assert updated["spatial_min_lon"] == 5.0
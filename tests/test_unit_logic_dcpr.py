@@ -0,0 +1,38 @@
+import datetime as dt
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr.logic.action.dcpr import get
+
+pytestmark = pytest.mark.unit
+
+_LAST_MODIFIED = dt.datetime(2022, 5, 18, 10, 30, 15, 123456)
+
+
+@pytest.mark.parametrize(
+    "if_none_match, if_modified_since, expected",
+    [
+        pytest.param(None, None, False, id="unconditional"),
+        pytest.param('"abc"', None, True, id="matching-etag"),
+        pytest.param('"other", W/"abc"', None, True, id="matching-weak-etag"),
+        pytest.param("*", None, True, id="any-etag"),
+        pytest.param('"other"', None, False, id="other-etag"),
+        pytest.param(
+            '"other"',
+            dt.datetime(2022, 5, 18, 10, 30, 15),
+            False,
+            id="etag-takes-precedence",
+        ),
+        pytest.param(
+            None, dt.datetime(2022, 5, 18, 10, 30, 15), True, id="not-modified-since"
+        ),
+        pytest.param(
+            None, dt.datetime(2022, 5, 18, 10, 30, 14), False, id="modified-since"
+        ),
+    ],
+)
+def test_is_not_modified(if_none_match, if_modified_since, expected):
+    result = get._is_not_modified(
+        "abc", _LAST_MODIFIED, if_none_match, if_modified_since
+    )
+    assert result == expected
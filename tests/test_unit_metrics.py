@@ -0,0 +1,40 @@
+import pytest
+from ckan.plugins import toolkit
+
+from ckanext.dalrrd_emc_dcpr import metrics
+
+pytestmark = pytest.mark.unit
+
+
+def _dummy_action(context, data_dict):
+    return data_dict["value"]
+
+
+def test_instrument_functions_disabled(ckan_config, monkeypatch):
+    monkeypatch.setitem(ckan_config, "ckan.dalrrd_emc_dcpr.metrics.enabled", "false")
+    functions = {"dummy": _dummy_action}
+    assert metrics.instrument_functions("action", functions) is functions
+
+
+def test_instrument_functions_enabled(ckan_config, monkeypatch):
+    monkeypatch.setitem(ckan_config, "ckan.dalrrd_emc_dcpr.metrics.enabled", "true")
+    action = toolkit.side_effect_free(_dummy_action)
+    instrumented = metrics.instrument_functions("action", {"dummy": action})["dummy"]
+    assert instrumented is not action
+    assert getattr(instrumented, "side_effect_free", False)
+    assert instrumented({}, {"value": 1}) == 1
+    rendered = metrics.render_prometheus_metrics()
+    assert 'emc_calls_total{kind="action",name="dummy"}' in rendered
+    assert 'emc_call_duration_seconds_bucket{kind="action",name="dummy",le="+Inf"}' in (
+        rendered
+    )
+
+
+def test_function_metrics_observe():
+    function_metrics = metrics._FunctionMetrics()
+    function_metrics.observe(0.003, num_queries=2)
+    function_metrics.observe(20, num_queries=1)
+    assert function_metrics.num_calls == 2
+    assert function_metrics.num_queries == 3
+    assert function_metrics.bucket_counts[0] == 1
+    assert function_metrics.bucket_counts[-1] == 1
@@ -0,0 +1,75 @@
+from unittest import mock
+
+import flask
+import pytest
+
+from ckanext.dalrrd_emc_dcpr import page_cache
+
+pytestmark = pytest.mark.unit
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+
+
+@pytest.fixture
+def page_cache_app(monkeypatch):
+    fake_redis = _FakeRedis()
+    monkeypatch.setattr(page_cache, "connect_to_redis", lambda: fake_redis)
+    monkeypatch.setattr(page_cache, "page_cache_enabled", lambda: True)
+    render = mock.MagicMock(return_value="<p>Datasets</p>")
+    app = flask.Flask(__name__)
+    app.add_url_rule("/dataset/", "search", render)
+    page_cache.register_request_hooks(app)
+    return app, render
+
+
+def test_get_cache_key_normalizes_query_string():
+    first = page_cache.get_cache_key(
+        b"1", "en", "/dataset/", [("tags", "b"), ("q", ""), ("tags", "a")]
+    )
+    second = page_cache.get_cache_key(
+        b"1", "en", "/dataset", [("tags", "a"), ("tags", "b")]
+    )
+    assert first == second
+    assert first != page_cache.get_cache_key(b"2", "en", "/dataset", [("tags", "a")])
+    assert first != page_cache.get_cache_key(
+        b"1", "fr", "/dataset", [("tags", "a"), ("tags", "b")]
+    )
+
+
+def test_anonymous_pages_are_cached_until_invalidated(page_cache_app):
+    app, render = page_cache_app
+    client = app.test_client()
+    first = client.get("/dataset/")
+    assert first.headers["X-EMC-Page-Cache"] == "MISS"
+    second = client.get("/dataset/")
+    assert second.headers["X-EMC-Page-Cache"] == "HIT"
+    assert second.get_data(as_text=True) == "<p>Datasets</p>"
+    assert render.call_count == 1
+    not_modified = client.get(
+        "/dataset/", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert not_modified.status_code == 304
+    page_cache.invalidate_page_cache()
+    assert client.get("/dataset/").headers["X-EMC-Page-Cache"] == "MISS"
+    assert render.call_count == 2
+
+
+def test_pages_are_cached_per_language(page_cache_app):
+    app, render = page_cache_app
+    client = app.test_client()
+    assert client.get("/dataset/").headers["X-EMC-Page-Cache"] == "MISS"
+    french = client.get("/dataset/", environ_overrides={"CKAN_LANG": "fr"})
+    assert french.headers["X-EMC-Page-Cache"] == "MISS"
+    assert render.call_count == 2
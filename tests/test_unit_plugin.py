@@ -1,5 +1,9 @@
+import datetime as dt
+from unittest import mock
+
 import pytest
 
+from ckanext.dalrrd_emc_dcpr import jobs
 from ckanext.dalrrd_emc_dcpr.plugins import emc_dcpr_plugin
 
 pytestmark = pytest.mark.unit
@@ -16,3 +20,148 @@ pytestmark = pytest.mark.unit
 def test_parse_date(raw_date, expected):
     result = emc_dcpr_plugin._parse_date(raw_date)
     assert result == expected
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date, expected",
+    [
+        pytest.param(
+            None,
+            None,
+            emc_dcpr_plugin._HistogramRange(
+                start="1900-01-01T00:00:00Z/YEAR", end="NOW/YEAR+1YEAR", gap="YEAR"
+            ),
+            id="no-range",
+        ),
+        pytest.param(
+            "2010-01-01T00:00:00Z",
+            "2022-02-23T00:00:00Z",
+            emc_dcpr_plugin._HistogramRange(
+                start="2010-01-01T00:00:00Z/YEAR",
+                end="2022-02-23T00:00:00Z/YEAR+1YEAR",
+                gap="YEAR",
+            ),
+            id="multiple-years",
+        ),
+        pytest.param(
+            "2021-01-01T00:00:00Z",
+            "2021-12-31T00:00:00Z",
+            emc_dcpr_plugin._HistogramRange(
+                start="2021-01-01T00:00:00Z/MONTH",
+                end="2021-12-31T00:00:00Z/MONTH+1MONTH",
+                gap="MONTH",
+            ),
+            id="single-year",
+        ),
+        pytest.param(
+            "2022-01-01T00:00:00Z", "2021-01-01T00:00:00Z", None, id="end-before-start"
+        ),
+        pytest.param("2999-01-01T00:00:00Z", None, None, id="start-in-the-future"),
+    ],
+)
+def test_get_reference_date_histogram_range(start_date, end_date, expected):
+    result = emc_dcpr_plugin._get_reference_date_histogram_range(start_date, end_date)
+    assert result == expected
+
+
+def test_build_reference_date_histogram():
+    counts = ["2021-01-01T00:00:00Z", 3, "2021-02-01T00:00:00Z", 1]
+    result = emc_dcpr_plugin._build_reference_date_histogram(counts, "MONTH")
+    assert result["gap"] == "month"
+    assert result["items"] == [
+        {
+            "name": "2021-01",
+            "display_name": "2021-01",
+            "count": 3,
+            "start_date": "2021-01-01",
+            "end_date": "2021-01-31",
+        },
+        {
+            "name": "2021-02",
+            "display_name": "2021-02",
+            "count": 1,
+            "start_date": "2021-02-01",
+            "end_date": "2021-02-28",
+        },
+    ]
+
+
+@pytest.mark.parametrize(
+    "extras, expected_fq",
+    [
+        pytest.param({}, "+dataset_type:dataset", id="no-range"),
+        pytest.param(
+            {
+                "ext_start_reference_date": "2021-01-01",
+                "ext_end_reference_date": "2021-01-31",
+            },
+            "+dataset_type:dataset reference_date:[2021-01-01T00:00:00Z TO "
+            "2021-01-31T00:00:00Z/DAY+1DAY}",
+            id="inclusive-end-date",
+        ),
+        pytest.param(
+            {"ext_start_reference_date": "2021-01-01"},
+            "+dataset_type:dataset reference_date:[2021-01-01T00:00:00Z TO *}",
+            id="open-end",
+        ),
+    ],
+)
+def test_before_search_temporal_query(extras, expected_fq):
+    plugin = emc_dcpr_plugin.DalrrdEmcDcprPlugin()
+    search_params = {"fq": "+dataset_type:dataset", "extras": extras}
+    assert plugin.before_search(search_params)["fq"] == expected_fq
+
+
+@pytest.mark.parametrize(
+    "relation, view_changed, expected_jobs, expect_refresh",
+    [
+        pytest.param(
+            "records_table", False, [jobs.update_pycsw_record], False, id="table"
+        ),
+        pytest.param(
+            "materialized_view",
+            True,
+            [jobs.update_pycsw_document],
+            True,
+            id="view-first-change",
+        ),
+        pytest.param(
+            "materialized_view",
+            False,
+            [jobs.update_pycsw_document],
+            False,
+            id="view-refresh-already-scheduled",
+        ),
+    ],
+)
+def test_enqueue_pycsw_jobs(
+    ckan_config, monkeypatch, relation, view_changed, expected_jobs, expect_refresh
+):
+    monkeypatch.setitem(ckan_config, "ckan.dalrrd_emc_dcpr.pycsw_relation", relation)
+    monkeypatch.setitem(
+        ckan_config, "ckan.dalrrd_emc_dcpr.pycsw_refresh_debounce_seconds", "10"
+    )
+    enqueue_job = mock.MagicMock()
+    monkeypatch.setattr(emc_dcpr_plugin.toolkit, "enqueue_job", enqueue_job)
+    mark_as_changed = mock.MagicMock(return_value=view_changed)
+    monkeypatch.setattr(
+        emc_dcpr_plugin.pycsw_catalogue,
+        "mark_materialized_view_as_changed",
+        mark_as_changed,
+    )
+    get_queue = mock.MagicMock()
+    monkeypatch.setattr(emc_dcpr_plugin.ckan_jobs, "get_queue", get_queue)
+    emc_dcpr_plugin._enqueue_pycsw_jobs("dummy-id")
+    assert [c.args[0] for c in enqueue_job.call_args_list] == expected_jobs
+    assert all(c.kwargs["args"] == ["dummy-id"] for c in enqueue_job.call_args_list)
+    assert mark_as_changed.called == (relation == "materialized_view")
+    enqueue_in = get_queue.return_value.enqueue_in
+    if expect_refresh:
+        get_queue.assert_called_once_with("emc_pycsw")
+        enqueue_in.assert_called_once()
+        assert enqueue_in.call_args.args[:2] == (
+            dt.timedelta(seconds=10),
+            jobs.refresh_pycsw_materialized_view,
+        )
+    else:
+        enqueue_in.assert_not_called()
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from ckanext.dalrrd_emc_dcpr.cli import profiling
+
+pytestmark = pytest.mark.unit
+
+
+def _busy_function():
+    start = time.perf_counter()
+    while time.perf_counter() - start < 0.05:
+        sum(range(1000))
+
+
+@pytest.mark.parametrize(
+    "profiler",
+    [
+        pytest.param(profiling.Profiler.CPROFILE),
+        pytest.param(profiling.Profiler.SAMPLING),
+    ],
+)
+def test_profile_callable(profiler):
+    result = profiling.profile_callable(_busy_function, num_runs=2, profiler=profiler)
+    assert len(result.wall_times) == 2
+    assert result.num_queries == 0
+    assert "_busy_function" in result.hot_functions
+    if profiler == profiling.Profiler.SAMPLING:
+        assert any("_busy_function" in stack for stack in result.collapsed_stacks)
+    else:
+        assert result.collapsed_stacks is None
+
+
+def test_write_collapsed_stacks(tmp_path):
+    result = profiling.ProfilingResult(
+        wall_times=[1.0],
+        num_queries=0,
+        sql_seconds=0,
+        hot_functions="",
+        collapsed_stacks={"main;first": 3, "main;second": 1},
+    )
+    target = tmp_path / "stacks.txt"
+    result.write_collapsed_stacks(target)
+    assert target.read_text() == "main;first 3\nmain;second 1\n"
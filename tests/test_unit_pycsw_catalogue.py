@@ -0,0 +1,141 @@
+from unittest import mock
+
+import pytest
+from lxml import etree
+
+from ckanext.dalrrd_emc_dcpr import pycsw_catalogue
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize(
+    "package, expected",
+    [
+        pytest.param({"resources": []}, ""),
+        pytest.param(
+            {
+                "resources": [
+                    {
+                        "name": "first",
+                        "description": "some, description",
+                        "format": "WMS",
+                        "url": "http://fake.com/wms",
+                    },
+                    {"name": "second", "url": "http://fake.com/second^"},
+                ]
+            },
+            "first,some  description,WMS,http://fake.com/wms^second,,,http://fake.com/second ",
+        ),
+    ],
+)
+def test_get_pycsw_links(package, expected):
+    assert pycsw_catalogue.get_pycsw_links(package) == expected
+
+
+@pytest.mark.parametrize(
+    "raw_spatial, expected",
+    [
+        pytest.param(
+            '{"type": "Polygon", "coordinates": [[[16.1, -34.8], [32.9, -34.8], '
+            "[32.9, -22.1], [16.1, -22.1], [16.1, -34.8]]]}",
+            {"west": 16.1, "east": 32.9, "south": -34.8, "north": -22.1},
+        ),
+        pytest.param(None, None),
+        pytest.param("not json", None),
+        pytest.param('{"type": "Polygon"}', None),
+    ],
+)
+def test_get_bbox(raw_spatial, expected):
+    assert pycsw_catalogue._get_bbox(raw_spatial) == expected
+
+
+_GMD_NAMESPACES = {
+    "gmd": "http://www.isotc211.org/2005/gmd",
+    "gco": "http://www.isotc211.org/2005/gco",
+}
+
+
+def _build_package(**kwargs):
+    package = {
+        "id": "dummy-id",
+        "name": "dummy",
+        "title": "Rivers & <streams>",
+        "notes": "Flow < 5 m/s & depth > 2 m",
+        "state": "active",
+        "private": False,
+        "metadata_language": "en",
+        "dataset_language": "en",
+        "iso_topic_category": "inlandWaters",
+        "tags": [{"name": "water & sanitation"}],
+        "spatial": '{"type": "Polygon", "coordinates": [[[16.1, -34.8], '
+        "[32.9, -34.8], [32.9, -22.1], [16.1, -22.1], [16.1, -34.8]]]}",
+        "resources": [
+            {
+                "name": "WMS <layer>",
+                "url": "http://fake.com/wms?service=WMS&request=GetCapabilities",
+                "format": "WMS",
+            }
+        ],
+    }
+    package.update(kwargs)
+    return package
+
+
+def test_render_iso_19139_document_escapes_special_characters():
+    package = _build_package()
+    rendered = pycsw_catalogue.render_iso_19139_document(package)
+    # this is how pycsw parses stored documents
+    root = etree.fromstring(rendered, etree.XMLParser(resolve_entities=False))
+    assert (
+        root.findtext(
+            "gmd:identificationInfo//gmd:title/gco:CharacterString",
+            namespaces=_GMD_NAMESPACES,
+        )
+        == package["title"]
+    )
+    assert (
+        root.findtext(
+            "gmd:identificationInfo//gmd:abstract/gco:CharacterString",
+            namespaces=_GMD_NAMESPACES,
+        )
+        == package["notes"]
+    )
+    assert root.xpath(
+        "//gmd:keyword/gco:CharacterString/text()", namespaces=_GMD_NAMESPACES
+    ) == ["water & sanitation"]
+    assert package["resources"][0]["url"] in root.xpath(
+        "//gmd:linkage/gmd:URL/text()", namespaces=_GMD_NAMESPACES
+    )
+
+
+@pytest.mark.parametrize(
+    "package, expect_document",
+    [
+        pytest.param(_build_package(), True, id="public"),
+        pytest.param(_build_package(private=True), False, id="private"),
+        pytest.param(_build_package(state="deleted"), False, id="deleted"),
+        pytest.param(None, False, id="missing"),
+    ],
+)
+def test_update_document(monkeypatch, package, expect_document):
+    def fake_package_show(context, data_dict):
+        if package is None:
+            raise pycsw_catalogue.toolkit.ObjectNotFound()
+        return package
+
+    monkeypatch.setattr(
+        pycsw_catalogue.toolkit, "get_action", lambda name: fake_package_show
+    )
+    fake_model = mock.MagicMock()
+    monkeypatch.setattr(pycsw_catalogue, "model", fake_model)
+    pycsw_catalogue.update_document("dummy-id")
+    conn = fake_model.meta.engine.begin.return_value.__enter__.return_value
+    conn.execute.assert_called_once()
+    statement, params = conn.execute.call_args
+    if expect_document:
+        assert str(statement[0]).startswith("INSERT INTO")
+        etree.fromstring(params["xml"])
+        assert params["links"] == pycsw_catalogue.get_pycsw_links(package)
+    else:
+        assert str(statement[0]).startswith("DELETE FROM")
+        assert params == {"package_id": "dummy-id"}
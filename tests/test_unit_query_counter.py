@@ -0,0 +1,38 @@
+import pytest
+
+from ckanext.dalrrd_emc_dcpr import query_counter
+
+pytestmark = pytest.mark.unit
+
+
+def test_query_counter_threshold():
+    counter = query_counter.QueryCounter(threshold=2)
+    for _ in range(2):
+        counter.record("SELECT 1")
+    assert not counter.threshold_exceeded
+    assert counter.threshold_stack is None
+    counter.record("SELECT   2")
+    assert counter.threshold_exceeded
+    assert counter.threshold_stack is not None
+    summary = counter.summary()
+    assert "3 queries issued" in summary
+    assert "2x SELECT 1" in summary
+    assert "1x SELECT 2" in summary
+
+
+def test_query_counter_without_threshold():
+    counter = query_counter.QueryCounter()
+    counter.record("SELECT 1")
+    assert not counter.threshold_exceeded
+
+
+def test_query_counter_records_active_counters_and_thread_total():
+    before = query_counter.get_num_queries()
+    with query_counter.QueryCounter() as outer:
+        query_counter._before_execute(None, None, "SELECT 1", None, None, False)
+        with query_counter.QueryCounter() as inner:
+            query_counter._before_execute(None, None, "SELECT 2", None, None, False)
+    query_counter._before_execute(None, None, "SELECT 3", None, None, False)
+    assert outer.num_queries == 2
+    assert inner.num_queries == 1
+    assert query_counter.get_num_queries() - before == 3
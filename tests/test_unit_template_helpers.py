@@ -96,3 +96,134 @@ def test_get_default_spatial_search_extent(
         result = helpers.get_default_spatial_search_extent(padding_degrees=padding)
         result_geom = geometry.shape(json.loads(result))
         assert result_geom.almost_equals(expected)
+
+
+def test_get_pages_nav_links_is_cached_until_invalidated(monkeypatch):
+    fake_redis = mock.MagicMock()
+    fake_redis.get.return_value = b"1"
+    fake_pages_list = mock.MagicMock(
+        return_value=[{"name": "about-emc", "title": "About", "page_type": "page"}]
+    )
+    monkeypatch.setattr(helpers, "connect_to_redis", lambda: fake_redis)
+    monkeypatch.setattr(helpers, "_pages_nav_cache", {})
+    monkeypatch.setattr(helpers.toolkit, "get_action", lambda name: fake_pages_list)
+    first = helpers._get_pages_nav_links()
+    second = helpers._get_pages_nav_links()
+    assert fake_pages_list.call_count == 1
+    assert first == second
+    assert first[0][0] == "about-emc"
+    assert 'href="/pages/about-emc"' in first[0][1]
+    fake_redis.get.return_value = b"2"
+    helpers._get_pages_nav_links()
+    assert fake_pages_list.call_count == 2
+
+
+def test_get_vocabulary_tags_uses_shared_cache(monkeypatch):
+    redis_values = {}
+    fake_redis = mock.MagicMock()
+    fake_redis.get.side_effect = redis_values.get
+    fake_redis.set.side_effect = lambda key, value, ex=None: redis_values.update(
+        {key: value}
+    )
+    fake_redis.incr.side_effect = lambda key: redis_values.update(
+        {key: int(redis_values.get(key, 0)) + 1}
+    )
+    fake_tag_list = mock.MagicMock(return_value=["first-theme", "second-theme"])
+    monkeypatch.setattr(helpers, "connect_to_redis", lambda: fake_redis)
+    monkeypatch.setattr(helpers, "_vocabulary_cache", {})
+    monkeypatch.setattr(helpers.toolkit, "get_action", lambda name: fake_tag_list)
+    assert helpers.get_vocabulary_tags("sasdi_themes") == [
+        "first-theme",
+        "second-theme",
+    ]
+    # simulate another process, which only has the shared cache available
+    monkeypatch.setattr(helpers, "_vocabulary_cache", {})
+    assert helpers.get_vocabulary_tags("sasdi_themes") == [
+        "first-theme",
+        "second-theme",
+    ]
+    assert fake_tag_list.call_count == 1
+    helpers.invalidate_vocabulary_cache()
+    helpers.get_vocabulary_tags("sasdi_themes")
+    assert fake_tag_list.call_count == 2
+
+
+def test_get_spatial_defaults(app, ckan_config, monkeypatch):
+    extent = json.dumps(
+        {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+    )
+    with app.flask_app.app_context():
+        monkeypatch.setitem(
+            ckan_config, "ckan.dalrrd_emc_dcpr.default_spatial_search_extent", extent
+        )
+        spatial_defaults = helpers.get_spatial_defaults()
+        assert helpers.get_spatial_defaults() is spatial_defaults
+        assert spatial_defaults.bounding_box == [1, 0, 0, 1]
+        assert json.loads(spatial_defaults.padded_extent_json) == (
+            spatial_defaults.padded_extent
+        )
+        padded_geom = geometry.shape(spatial_defaults.padded_extent)
+        assert padded_geom.contains(geometry.shape(json.loads(extent)))
+        monkeypatch.setitem(
+            ckan_config, "ckan.dalrrd_emc_dcpr.default_spatial_search_extent", None
+        )
+        assert helpers.get_spatial_defaults().bounding_box is None
+
+
+@pytest.mark.parametrize(
+    "geojson, expected",
+    [
+        pytest.param(
+            {
+                "type": "Polygon",
+                "coordinates": [
+                    [[16, -35], [33, -35], [33, -22], [16, -22], [16, -35]]
+                ],
+            },
+            {
+                "spatial_min_lon": 16,
+                "spatial_min_lat": -35,
+                "spatial_max_lon": 33,
+                "spatial_max_lat": -22,
+                "spatial_centroid_lon": 24.5,
+                "spatial_centroid_lat": -28.5,
+                "spatial_area": 221,
+            },
+            id="polygon",
+        ),
+        pytest.param(None, {}, id="missing"),
+    ],
+)
+def test_get_derived_spatial_fields(geojson, expected):
+    assert helpers.get_derived_spatial_fields(geojson) == expected
+
+
+@pytest.mark.parametrize(
+    "pkg_dict, expected",
+    [
+        pytest.param(
+            {
+                "spatial_min_lon": "16",
+                "spatial_min_lat": "-35",
+                "spatial_max_lon": "33",
+                "spatial_max_lat": "-22",
+                "spatial": None,
+            },
+            [-22, 16, -35, 33],
+            id="stored-fields",
+        ),
+        pytest.param(
+            {
+                "spatial": {
+                    "type": "Polygon",
+                    "coordinates": [[[16, -35], [33, -35], [33, -22], [16, -22]]],
+                }
+            },
+            [-22, 16, -35, 33],
+            id="computed-from-spatial",
+        ),
+        pytest.param({}, None, id="missing"),
+    ],
+)
+def test_get_dataset_bounding_box(pkg_dict, expected):
+    assert helpers.get_dataset_bounding_box(pkg_dict) == expected